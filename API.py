@@ -1,13 +1,37 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, Response, stream_with_context, has_request_context, send_file
 from flask_cors import CORS
 import mysql.connector
 from mysql.connector import Error
-from werkzeug.security import generate_password_hash, check_password_hash
+import config
+from config import db_config
+from db_pool import PoolConexiones
+from almacen_sqlite import PoolSQLite
+import resumen
+from cache import CacheTTL
+import metricas
+import migrar
+import consultas
+import serializacion
+import reportes
+import liquidacion
+import busqueda
+import cambios
+import eventos
+from auth import VerificadorTokens, TokenInvalido
+import contrasenas
 import jwt
 from datetime import datetime, timedelta
+import csv
+import io
+from functools import wraps
+import hashlib
+import threading
+import time
 import os
 
 app = Flask(__name__)
+# jsonify usa el backend de serializacion.py (orjson si está disponible)
+app.json = serializacion.ProveedorJSON(app)
 
 # Configuración CORS
 CORS(app, supports_credentials=True)
@@ -22,8 +46,8 @@ def add_cors_headers(response):
     
     response.headers['Access-Control-Allow-Credentials'] = 'true'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Origin, Content-Type, Accept, Authorization, X-Request-With'
-    response.headers['Access-Control-Expose-Headers'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Origin, Content-Type, Accept, Authorization, X-Request-With, If-None-Match, Idempotency-Key'
+    response.headers['Access-Control-Expose-Headers'] = '*, X-Next-Cursor, ETag, Idempotent-Replayed'
     
     if request.method == 'OPTIONS':
         response.headers['Access-Control-Max-Age'] = '1728000'
@@ -31,26 +55,395 @@ def add_cors_headers(response):
     
     return response
 
-app.config['SECRET_KEY'] = os.urandom(24)
+app.config['SECRET_KEY'] = config.SECRET_KEY
 
-# Configuración de la base de datos
-db_config = {
-    'host': 'bglucmgbm4ndh8uojido-mysql.services.clever-cloud.com',
-    'database': 'bglucmgbm4ndh8uojido',
-    'user': 'u0mi0h3vk85jpjrk',
-    'password': '2OMj4BJWJKwHLrC6HfEa',
-    'port': '3306'
-}
+# Pool de conexiones compartido por todas las rutas (MySQL central o SQLite local, ver DB_BACKEND)
+if config.DB_BACKEND == 'sqlite':
+    db_pool = PoolSQLite(config.SQLITE_PATH, tamano=config.DB_POOL_SIZE, espera=config.DB_POOL_TIMEOUT)
+else:
+    db_pool = PoolConexiones(
+        db_config,
+        tamano=config.DB_POOL_SIZE,
+        espera=config.DB_POOL_TIMEOUT,
+        reciclar=config.DB_POOL_RECYCLE,
+        ping_tras=config.DB_POOL_PING_AFTER
+    )
+
+# Métricas de requests y de base de datos (expuestas en /metrics)
+CONSULTA_LENTA_MS = float(os.environ.get('SLOW_QUERY_MS', 0))
+metrica_latencia = metricas.Histograma('api_request_duration_seconds', 'Latencia de cada request', ('method', 'route', 'status'))
+metrica_tamano = metricas.Histograma('api_response_size_bytes', 'Tamaño del cuerpo de la respuesta', ('route',), metricas.BUCKETS_BYTES)
+metrica_espera_db = metricas.Histograma('api_db_connection_acquire_seconds', 'Tiempo para obtener una conexión del pool', ('route',))
+metrica_consulta = metricas.Histograma('api_db_query_duration_seconds', 'Tiempo de ejecución de cada consulta', ('route', 'operation'))
+metrica_db_request = metricas.Histograma('api_request_db_seconds', 'Tiempo total en base de datos por request', ('route',))
+metrica_filas = metricas.Histograma('api_db_rows_returned', 'Filas leídas de la base de datos por request', ('route',), metricas.BUCKETS_FILAS)
+metrica_lentas = metricas.Contador('api_db_slow_queries_total', 'Consultas por encima de SLOW_QUERY_MS', ('route',))
+
+def ruta_actual():
+    if has_request_context() and request.url_rule:
+        return request.url_rule.rule
+    return 'sin_ruta'
+
+def medir_consulta(sql, segundos):
+    ruta = ruta_actual()
+    operacion = sql.split(None, 1)[0].upper() if sql.strip() else ''
+    metrica_consulta.observar(segundos, ruta, operacion)
+    if has_request_context():
+        g.db_segundos = g.get('db_segundos', 0) + segundos
+    if CONSULTA_LENTA_MS and segundos * 1000 >= CONSULTA_LENTA_MS:
+        metrica_lentas.sumar(1, ruta)
+        print(f"Consulta lenta ({segundos * 1000:.1f} ms) en {ruta}: {' '.join(sql.split())}")
+
+def medir_filas(cantidad):
+    if has_request_context():
+        g.db_filas = g.get('db_filas', 0) + cantidad
+
+db_pool.envolver_cursor = lambda cursor: metricas.CursorMedido(cursor, medir_consulta, medir_filas)
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio_request = time.perf_counter()
+
+@app.after_request
+def registrar_metricas(response):
+    ruta = ruta_actual()
+    # En respuestas en streaming se mide hasta que empieza el envío del cuerpo
+    inicio = g.get('inicio_request', time.perf_counter())
+    metrica_latencia.observar(time.perf_counter() - inicio, request.method, ruta, str(response.status_code))
+    if response.content_length is not None:
+        metrica_tamano.observar(response.content_length, ruta)
+    if 'db_segundos' in g:
+        metrica_db_request.observar(g.db_segundos, ruta)
+    if 'db_conexiones' in g:
+        metrica_filas.observar(g.get('db_filas', 0), ruta)
+    return response
+
+@app.after_request
+def comprimir(response):
+    return serializacion.comprimir_respuesta(request, response)
+
+# Autenticación: se verifica el token si viene y, con AUTH_REQUIRED, se exige.
+# El usuario no se consulta aquí; las rutas que lo necesiten usan usuario_actual().
+verificador_tokens = VerificadorTokens(
+    app.config['SECRET_KEY'],
+    max_entradas=config.AUTH_CACHE_SIZE,
+    ttl_maximo=config.AUTH_CACHE_TTL
+)
+RUTAS_PUBLICAS = ('/api/auth/', '/health/', '/metrics')
+
+@app.before_request
+def verificar_autenticacion():
+    if request.method == 'OPTIONS' or request.path.startswith(RUTAS_PUBLICAS):
+        return None
+    encabezado = request.headers.get('Authorization', '')
+    if not encabezado and request.path == '/api/eventos' and request.args.get('token'):
+        # EventSource no permite encabezados: el canal de eventos acepta ?token=
+        encabezado = 'Bearer ' + request.args['token']
+    tipo, _, token = encabezado.partition(' ')
+    if tipo.lower() != 'bearer' or not token:
+        if config.AUTH_REQUIRED:
+            return jsonify({"message": "Token requerido"}), 401
+        return None
+    try:
+        payload = verificador_tokens.verificar(token.strip())
+    except TokenInvalido:
+        return jsonify({"message": "Token inválido o expirado"}), 401
+    g.usuario_id = payload.get('user_id')
+    return None
+
+def usuario_actual():
+    # Carga perezosa del usuario autenticado, una sola vez por request
+    if 'usuario' not in g:
+        g.usuario = None
+        if g.get('usuario_id') is not None:
+            connection = get_db_connection()
+            if connection and connection.is_connected():
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute("SELECT id, username, email FROM usuarios WHERE id = %s", (g.usuario_id,))
+                g.usuario = cursor.fetchone()
+                cursor.close()
+                connection.close()
+    return g.usuario
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    lineas = []
+    for metrica in (metrica_latencia, metrica_tamano, metrica_espera_db, metrica_consulta,
+                    metrica_db_request, metrica_filas, metrica_lentas):
+        lineas.extend(metrica.exponer())
+    lineas.extend(metricas.exponer_gauges('api_db_pool', 'Estadísticas del pool de conexiones', db_pool.estadisticas()))
+    lineas.extend(metricas.exponer_gauges('api_cache_catalogos', 'Estadísticas del cache de catálogos', cache_catalogos.estadisticas()))
+    lineas.extend(metricas.exponer_gauges('api_eventos', 'Clientes y eventos del canal SSE', broker_eventos.estadisticas()))
+    return Response("\n".join(lineas) + "\n", mimetype='text/plain; version=0.0.4')
 
 # Función para conectar a la base de datos
+# Devuelve una conexión del pool; connection.close() la regresa al pool.
 def get_db_connection():
     try:
-        connection = mysql.connector.connect(**db_config)
+        inicio = time.perf_counter()
+        connection = db_pool.obtener()
+        metrica_espera_db.observar(time.perf_counter() - inicio, ruta_actual())
+        g.setdefault('db_conexiones', []).append(connection)
         return connection
     except Error as e:
         print(f"Error al conectar a MySQL: {e}")
         return None
 
+# Migraciones del esquema al arrancar (opcional; también: python migrar.py). En SQLite el esquema lo crea el pool.
+if os.environ.get('DB_MIGRATE_ON_START') == '1' and config.DB_BACKEND != 'sqlite':
+    try:
+        with db_pool.conexion() as connection:
+            migrar.aplicar(connection)
+    except Exception as e:
+        print(f"Error al aplicar migraciones: {e}")
+
+@app.teardown_appcontext
+def liberar_conexiones(exception=None):
+    # Devolver al pool las conexiones que un handler no cerró (p. ej. por una excepción)
+    for connection in g.pop('db_conexiones', []):
+        connection.close()
+
+# Liveness: el proceso responde. Readiness: además hay conexión a la base.
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    try:
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            connection.close()
+            return jsonify({"status": "ok", "pid": os.getpid()})
+    except Error as e:
+        return jsonify({"status": "error", "detalle": str(e)}), 503
+    return jsonify({"status": "error", "detalle": "Sin conexión a la base de datos"}), 503
+
+@app.route('/api/pool/estadisticas', methods=['GET'])
+def pool_estadisticas():
+    return jsonify(db_pool.estadisticas())
+
+# Cache de catálogos (empleados y fincas) que usan los formularios; cada entrada lleva la versión de su tabla
+cache_catalogos = CacheTTL(
+    max_entradas=int(os.environ.get('CACHE_MAX_ENTRIES', 128)),
+    ttl=float(os.environ.get('CACHE_TTL', 300))
+)
+
+@app.route('/api/cache/estadisticas', methods=['GET'])
+def cache_estadisticas():
+    return jsonify({**cache_catalogos.estadisticas(), "tokens": verificador_tokens.estadisticas(),
+                    "busqueda_empleados": indice_empleados.estadisticas()})
+
+# Versiones por tabla para ETags: cada escritura incrementa la versión de su tabla
+# dentro de la misma transacción, así todos los procesos ven el mismo valor.
+_tablas_listas = set()
+_tablas_listas_lock = threading.Lock()
+
+def asegurar_tabla(nombre, ddl):
+    # El DDL hace commit implícito en MySQL, por eso se crea aparte y una sola vez por proceso
+    if nombre in _tablas_listas:
+        return
+    with _tablas_listas_lock:
+        if nombre in _tablas_listas:
+            return
+        with db_pool.conexion() as connection:
+            cursor = connection.cursor()
+            cursor.execute(ddl)
+            cursor.close()
+        _tablas_listas.add(nombre)
+
+def asegurar_tabla_versiones():
+    asegurar_tabla('versiones_tablas', """
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+
+def incrementar_version(connection, *tablas):
+    # Cursor propio para no pisar el lastrowid del cursor del handler
+    asegurar_tabla_versiones()
+    cursor = connection.cursor()
+    for tabla in tablas:
+        cursor.execute(consultas.SQL_INCREMENTAR_VERSION, (tabla,))
+    cursor.close()
+
+def registrar_cambio(connection, tabla, operacion, *ids):
+    # Anota la escritura en el registro de cambios (GET /api/changes), en la misma transacción
+    asegurar_tabla('cambios', cambios.DDL)
+    cursor = connection.cursor()
+    cambios.registrar(cursor, tabla, operacion, *ids)
+    cursor.close()
+    g.hubo_cambios = True
+
+def leer_versiones(tablas):
+    asegurar_tabla_versiones()
+    with db_pool.conexion() as connection:
+        cursor = connection.cursor()
+        marcadores = ", ".join(["%s"] * len(tablas))
+        cursor.execute(f"SELECT tabla, version FROM versiones_tablas WHERE tabla IN ({marcadores})", tuple(tablas))
+        versiones = dict(cursor.fetchall())
+        cursor.close()
+    return {t: versiones.get(t, 0) for t in tablas}
+
+def calcular_etag(versiones):
+    # Los filtros cambian el contenido, por eso la URL completa forma parte del ETag
+    firma = request.full_path + "|" + "|".join(f"{t}:{v}" for t, v in versiones.items())
+    return hashlib.sha1(firma.encode()).hexdigest()
+
+def con_etag(*tablas):
+    """Responde 304 sin ejecutar la vista si If-None-Match coincide con la versión actual."""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                versiones = leer_versiones(tablas)
+            except Error as e:
+                print(f"No se pudo calcular el ETag: {e}")
+                return vista(*args, **kwargs)
+            etag = calcular_etag(versiones)
+
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                g.versiones_etag = versiones
+                response = app.make_response(vista(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Si la vista sirvió un cuerpo leído en otra versión (p. ej. del cache),
+                # el ETag se firma con esa versión y no con la recién consultada
+                cuerpo = g.get('versiones_cuerpo')
+                if cuerpo and cuerpo != versiones:
+                    etag = calcular_etag(cuerpo)
+            response.set_etag(etag)
+            # Obliga al navegador a revalidar en cada uso en vez de servir una copia vieja
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return envoltura
+    return decorador
+
+# Idempotency-Key en escrituras: la primera vez se reserva la clave y se guarda la
+# respuesta; los reintentos con la misma clave reciben esa respuesta sin re-ejecutar.
+IDEMPOTENCIA_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+IDEMPOTENCIA_PURGA = 300
+_ultima_purga_idempotencia = 0.0
+
+def purgar_idempotencia(cursor):
+    global _ultima_purga_idempotencia
+    if time.monotonic() - _ultima_purga_idempotencia < IDEMPOTENCIA_PURGA:
+        return
+    _ultima_purga_idempotencia = time.monotonic()
+    cursor.execute("DELETE FROM idempotencia WHERE expira < NOW() LIMIT 1000")
+
+def reservar_idempotencia(clave, ruta, huella):
+    """Reserva la clave y devuelve None, o devuelve la fila existente (vigente) de un request anterior."""
+    asegurar_tabla('idempotencia', """
+        CREATE TABLE IF NOT EXISTS idempotencia (
+            clave VARCHAR(255) NOT NULL,
+            ruta VARCHAR(255) NOT NULL,
+            huella CHAR(40) NOT NULL,
+            estado SMALLINT NULL,
+            cuerpo MEDIUMBLOB NULL,
+            creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expira DATETIME NOT NULL,
+            PRIMARY KEY (clave, ruta),
+            KEY idx_idempotencia_expira (expira)
+        )
+    """)
+    with db_pool.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            purgar_idempotencia(cursor)
+            connection.commit()
+            for _ in range(3):
+                try:
+                    cursor.execute("""
+                        INSERT INTO idempotencia (clave, ruta, huella, expira)
+                        VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+                    """, (clave, ruta, huella, IDEMPOTENCIA_TTL))
+                    connection.commit()
+                    return None
+                except Error as e:
+                    connection.rollback()
+                    if e.errno != 1062:
+                        raise
+                cursor.execute("""
+                    SELECT huella, estado, cuerpo, expira < NOW() AS expirada
+                    FROM idempotencia WHERE clave = %s AND ruta = %s
+                """, (clave, ruta))
+                fila = cursor.fetchone()
+                if fila and not fila['expirada']:
+                    return fila
+                # Clave vencida (o borrada entre medio): se libera y se vuelve a intentar
+                cursor.execute("DELETE FROM idempotencia WHERE clave = %s AND ruta = %s AND expira < NOW()", (clave, ruta))
+                connection.commit()
+            raise Error(msg="No se pudo reservar la Idempotency-Key")
+        finally:
+            cursor.close()
+
+def cerrar_idempotencia(clave, ruta, response=None):
+    # Con response se guarda el resultado; sin ella se libera la clave para que el cliente reintente
+    try:
+        with db_pool.conexion() as connection:
+            cursor = connection.cursor()
+            if response is None:
+                cursor.execute("DELETE FROM idempotencia WHERE clave = %s AND ruta = %s", (clave, ruta))
+            else:
+                cursor.execute("UPDATE idempotencia SET estado = %s, cuerpo = %s WHERE clave = %s AND ruta = %s",
+                               (response.status_code, response.get_data(), clave, ruta))
+            connection.commit()
+            cursor.close()
+    except Error as e:
+        print(f"No se pudo actualizar la Idempotency-Key {clave}: {e}")
+
+def con_idempotencia(vista):
+    """Aplica el encabezado Idempotency-Key (opcional) a una ruta de escritura."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = request.headers.get('Idempotency-Key')
+        if not clave:
+            return vista(*args, **kwargs)
+        if len(clave) > 255:
+            return jsonify({"error": "Idempotency-Key demasiado larga"}), 400
+
+        ruta = f"{request.method} {request.path}"
+        huella = hashlib.sha1(request.get_data()).hexdigest()
+        try:
+            previa = reservar_idempotencia(clave, ruta, huella)
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+
+        if previa is not None:
+            if previa['huella'] != huella:
+                return jsonify({"error": "La Idempotency-Key ya se usó con otro contenido"}), 422
+            if previa['estado'] is None:
+                response = jsonify({"error": "Hay un request con la misma Idempotency-Key en proceso"})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            response = app.response_class(previa['cuerpo'], status=previa['estado'], mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = app.make_response(vista(*args, **kwargs))
+        except Exception:
+            cerrar_idempotencia(clave, ruta)
+            raise
+        # Los errores del servidor no se guardan: el reintento debe poder ejecutarse
+        cerrar_idempotencia(clave, ruta, response if response.status_code < 500 else None)
+        return response
+    return envoltura
+
+# Intentos de login por usuario e IP (LOGIN_MAX_ATTEMPTS cada LOGIN_WINDOW segundos)
+limitador_login = contrasenas.LimitadorIntentos(
+    maximo=int(os.environ.get('LOGIN_MAX_ATTEMPTS', 5)),
+    ventana=float(os.environ.get('LOGIN_WINDOW', 60))
+)
+
 # Rutas de autenticación
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -71,13 +464,17 @@ def register():
                 return jsonify({"message": "El usuario ya existe"}), 400
             
             # Crear nuevo usuario
-            hashed_password = generate_password_hash(data['password'])
+            hashed_password = contrasenas.generar(data['password'])
             query = "INSERT INTO usuarios (username, password, email) VALUES (%s, %s, %s)"
             cursor.execute(query, (data['username'], hashed_password, data['email']))
             connection.commit()
             cursor.close()
             connection.close()
             return jsonify({"message": "Usuario registrado exitosamente"}), 201
+    except contrasenas.LoginSaturado:
+        response = jsonify({"message": "Servidor ocupado, intente de nuevo"})
+        response.headers['Retry-After'] = '2'
+        return response, 503
     except Error as e:
         return jsonify({"error": str(e)}), 500
     return jsonify({"message": "Error al registrar usuario"}), 500
@@ -88,6 +485,13 @@ def login():
         data = request.get_json()
         if not data or not all(k in data for k in ['username', 'password']):
             return jsonify({"message": "Datos incompletos"}), 400
+
+        clave_intentos = (data['username'], request.remote_addr)
+        espera = limitador_login.permitir(clave_intentos)
+        if espera:
+            response = jsonify({"message": "Demasiados intentos, intente más tarde"})
+            response.headers['Retry-After'] = str(int(espera) + 1)
+            return response, 429
         
         connection = get_db_connection()
         if connection and connection.is_connected():
@@ -97,7 +501,10 @@ def login():
             cursor.close()
             connection.close()
             
-            if user and check_password_hash(user['password'], data['password']):
+            if user and contrasenas.verificar(user['password'], data['password']):
+                limitador_login.reiniciar(clave_intentos)
+                if contrasenas.necesita_rehash(user['password']):
+                    actualizar_hash(user, data['password'])
                 token = jwt.encode({
                     'user_id': user['id'],
                     'exp': datetime.utcnow() + timedelta(days=1)
@@ -110,25 +517,109 @@ def login():
                     }
                 })
             return jsonify({"message": "Credenciales inválidas"}), 401
+    except contrasenas.LoginSaturado:
+        response = jsonify({"message": "Servidor ocupado, intente de nuevo"})
+        response.headers['Retry-After'] = '2'
+        return response, 503
     except Error as e:
         return jsonify({"error": str(e)}), 500
     return jsonify({"message": "Error en el login"}), 500
 
-# Rutas de empleados
-@app.route('/api/empleados', methods=['GET'])
-def get_empleados():
+def actualizar_hash(user, password):
+    # Guarda el hash con el método configurado; si falla, el login sigue siendo válido
     try:
+        nuevo = contrasenas.generar(password)
         connection = get_db_connection()
         if connection and connection.is_connected():
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM empleados")
-            empleados = cursor.fetchall()
+            cursor = connection.cursor()
+            # La condición sobre el hash viejo evita pisar un cambio de contraseña concurrente
+            cursor.execute("UPDATE usuarios SET password = %s WHERE id = %s AND password = %s",
+                           (nuevo, user['id'], user['password']))
+            connection.commit()
             cursor.close()
             connection.close()
-            return jsonify(empleados)
+    except (Error, contrasenas.LoginSaturado) as e:
+        print(f"No se pudo actualizar el hash del usuario {user['id']}: {e}")
+
+@app.route('/api/usuario', methods=['GET'])
+def get_usuario():
+    try:
+        usuario = usuario_actual()
+        if usuario is None:
+            return jsonify({"message": "No autenticado"}), 401
+        return jsonify(usuario)
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+
+def version_tabla(tabla):
+    asegurar_tabla_versiones()
+    with db_pool.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT version FROM versiones_tablas WHERE tabla = %s", (tabla,))
+        fila = cursor.fetchone()
+        cursor.close()
+    return fila[0] if fila else 0
+
+def leer_catalogo(tabla):
+    # Cada entrada guarda la versión de versiones_tablas con que se leyó; si otro proceso
+    # escribió (o una escritura se cruzó con esta lectura) la versión ya no coincide y se recarga.
+    # con_etag ya consultó la versión; se reutiliza para que ETag y cuerpo coincidan.
+    version = g.get('versiones_etag', {}).get(tabla)
+    if version is None:
+        version = version_tabla(tabla)
+    g.versiones_cuerpo = {tabla: version}
+    entrada = cache_catalogos.get(tabla)
+    if entrada is not None and entrada[0] == version:
+        return entrada[1]
+
+    # La versión se lee antes que las filas: el cuerpo nunca queda más viejo que su versión
+    with db_pool.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT * FROM {tabla}")
+        filas = cursor.fetchall()
+        cursor.close()
+    cache_catalogos.set(tabla, (version, filas))
+    return filas
+
+# Rutas de empleados
+@app.route('/api/empleados', methods=['GET'])
+@con_etag('empleados')
+def get_empleados():
+    try:
+        return jsonify(leer_catalogo('empleados'))
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+
+# Búsqueda de empleados (typeahead) sobre un índice en memoria; ver busqueda.py
+BUSQUEDA_LIMITE_MAXIMO = 50
+
+def version_empleados():
+    return version_tabla('empleados')
+
+def cargar_empleados():
+    with db_pool.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM empleados")
+        empleados = cursor.fetchall()
+        cursor.close()
+    return empleados
+
+indice_empleados = busqueda.IndiceEmpleados(
+    cargar_empleados, version_empleados,
+    revisar=float(os.environ.get('SEARCH_REFRESH_SECONDS', 2))
+)
+
+@app.route('/api/empleados/buscar', methods=['GET'])
+def buscar_empleados():
+    texto = request.args.get('q', '').strip()
+    limite = request.args.get('limite', 10, type=int)
+    limite = max(1, min(limite, BUSQUEDA_LIMITE_MAXIMO))
+    if not texto:
+        return jsonify([])
+    try:
+        return jsonify(indice_empleados.buscar(texto, limite))
     except Error as e:
         return jsonify({"error": str(e)}), 500
-    return jsonify([])
 
 @app.route('/api/empleados', methods=['POST'])
 def create_empleado():
@@ -142,8 +633,13 @@ def create_empleado():
             cursor = connection.cursor()
             query = "INSERT INTO empleados (nombre, cedula, telefono) VALUES (%s, %s, %s)"
             cursor.execute(query, (data['nombre'], data['cedula'], data['telefono']))
-            connection.commit()
             new_id = cursor.lastrowid
+            incrementar_version(connection, 'empleados')
+            registrar_cambio(connection, 'empleados', 'I', new_id)
+            connection.commit()
+            cache_catalogos.invalidar('empleados')
+            indice_empleados.guardar({"id": new_id, "nombre": data['nombre'],
+                                      "cedula": data['cedula'], "telefono": data['telefono']})
             cursor.close()
             connection.close()
             return jsonify({"id": new_id, "message": "Empleado creado exitosamente"}), 201
@@ -163,7 +659,14 @@ def update_empleado(id):
             cursor = connection.cursor()
             query = "UPDATE empleados SET nombre = %s, cedula = %s, telefono = %s WHERE id = %s"
             cursor.execute(query, (data['nombre'], data['cedula'], data['telefono'], id))
+            incrementar_version(connection, 'empleados')
+            if cursor.rowcount:
+                registrar_cambio(connection, 'empleados', 'U', id)
             connection.commit()
+            cache_catalogos.invalidar('empleados')
+            if cursor.rowcount:
+                indice_empleados.guardar({"id": id, "nombre": data['nombre'],
+                                          "cedula": data['cedula'], "telefono": data['telefono']})
             cursor.close()
             connection.close()
             return jsonify({"message": "Empleado actualizado exitosamente"}), 200
@@ -179,7 +682,12 @@ def delete_empleado(id):
             cursor = connection.cursor()
             query = "DELETE FROM empleados WHERE id = %s"
             cursor.execute(query, (id,))
+            incrementar_version(connection, 'empleados')
+            if cursor.rowcount:
+                registrar_cambio(connection, 'empleados', 'D', id)
             connection.commit()
+            cache_catalogos.invalidar('empleados')
+            indice_empleados.eliminar(id)
             cursor.close()
             connection.close()
             return jsonify({"message": "Empleado eliminado exitosamente"}), 200
@@ -189,19 +697,12 @@ def delete_empleado(id):
 
 # Rutas de fincas
 @app.route('/api/fincas', methods=['GET'])
+@con_etag('fincas')
 def get_fincas():
     try:
-        connection = get_db_connection()
-        if connection and connection.is_connected():
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM fincas")
-            fincas = cursor.fetchall()
-            cursor.close()
-            connection.close()
-            return jsonify(fincas)
+        return jsonify(leer_catalogo('fincas'))
     except Error as e:
         return jsonify({"error": str(e)}), 500
-    return jsonify([])
 
 @app.route('/api/fincas', methods=['POST'])
 def create_finca():
@@ -215,8 +716,11 @@ def create_finca():
             cursor = connection.cursor()
             query = "INSERT INTO fincas (nombre, ubicacion) VALUES (%s, %s)"
             cursor.execute(query, (data['nombre'], data['ubicacion']))
-            connection.commit()
             new_id = cursor.lastrowid
+            incrementar_version(connection, 'fincas')
+            registrar_cambio(connection, 'fincas', 'I', new_id)
+            connection.commit()
+            cache_catalogos.invalidar('fincas')
             cursor.close()
             connection.close()
             return jsonify({"id": new_id, "message": "Finca creada exitosamente"}), 201
@@ -236,7 +740,11 @@ def update_finca(id):
             cursor = connection.cursor()
             query = "UPDATE fincas SET nombre = %s, ubicacion = %s WHERE id = %s"
             cursor.execute(query, (data['nombre'], data['ubicacion'], id))
+            incrementar_version(connection, 'fincas')
+            if cursor.rowcount:
+                registrar_cambio(connection, 'fincas', 'U', id)
             connection.commit()
+            cache_catalogos.invalidar('fincas')
             cursor.close()
             connection.close()
             return jsonify({"message": "Finca actualizada exitosamente"}), 200
@@ -252,7 +760,11 @@ def delete_finca(id):
             cursor = connection.cursor()
             query = "DELETE FROM fincas WHERE id = %s"
             cursor.execute(query, (id,))
+            incrementar_version(connection, 'fincas')
+            if cursor.rowcount:
+                registrar_cambio(connection, 'fincas', 'D', id)
             connection.commit()
+            cache_catalogos.invalidar('fincas')
             cursor.close()
             connection.close()
             return jsonify({"message": "Finca eliminada exitosamente"}), 200
@@ -261,53 +773,32 @@ def delete_finca(id):
     return jsonify({"message": "Error al eliminar finca"}), 500
 
 @app.route('/api/asignaciones', methods=['GET'])
+@con_etag('asignaciones', 'empleados', 'fincas')
 def get_asignaciones():
     try:
+        try:
+            formato = consultas.formato_lista(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
         connection = get_db_connection()
         if connection and connection.is_connected():
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT 
-                    a.*,
-                    e.nombre as empleado_nombre,
-                    e.cedula as empleado_dpi,
-                    e.telefono as empleado_telefono,
-                    f.nombre as finca_nombre,
-                    f.ubicacion as finca_ubicacion
-                FROM asignaciones a 
-                LEFT JOIN empleados e ON a.empleado_id = e.id 
-                LEFT JOIN fincas f ON a.finca_id = f.id
-            """)
+            cursor.execute(consultas.SQL_ASIGNACIONES)
             asignaciones = cursor.fetchall()
             cursor.close()
             connection.close()
             
-            formatted_asignaciones = []
-            for asignacion in asignaciones:
-                formatted_asignacion = {
-                    "id": asignacion["id"],
-                    "fecha_asignacion": asignacion["fecha_asignacion"],
-                    "descripcion": asignacion.get("descripcion", ""),  # Nuevo campo
-                    "empleado": {
-                        "id": asignacion["empleado_id"],
-                        "nombre": asignacion["empleado_nombre"],
-                        "dpi": asignacion["empleado_dpi"],
-                        "telefono": asignacion["empleado_telefono"]
-                    },
-                    "finca": {
-                        "id": asignacion["finca_id"],
-                        "nombre": asignacion["finca_nombre"],
-                        "ubicacion": asignacion["finca_ubicacion"]
-                    }
-                }
-                formatted_asignaciones.append(formatted_asignacion)
-            
+            if formato == 'columnar':
+                return jsonify(consultas.formatear_columnar(asignaciones, consultas.COLUMNAR_ASIGNACIONES))
+            formatted_asignaciones = [consultas.formatear_asignacion(a) for a in asignaciones]
             return jsonify(formatted_asignaciones)
     except Error as e:
         return jsonify({"error": str(e)}), 500
     return jsonify([])
 
 @app.route('/api/asignaciones', methods=['POST'])
+@con_idempotencia
 def create_asignacion():
     try:
         data = request.get_json()
@@ -328,8 +819,10 @@ def create_asignacion():
                 data.get('fecha_asignacion', datetime.now().strftime('%Y-%m-%d')),
                 data.get('descripcion', '')  # Nuevo campo
             ))
-            connection.commit()
             new_id = cursor.lastrowid
+            incrementar_version(connection, 'asignaciones')
+            registrar_cambio(connection, 'asignaciones', 'I', new_id)
+            connection.commit()
             cursor.close()
             connection.close()
             return jsonify({
@@ -342,10 +835,10 @@ def create_asignacion():
     return jsonify({"message": "Error al crear asignación"}), 500
 
 @app.route('/api/asignaciones/<int:id>', methods=['PUT'])
+@con_idempotencia
 def update_asignacion(id):
     try:
         data = request.get_json()
-        print("Datos recibidos:", data)  # Debug
         
         if not data or not all(k in data for k in ['empleado_id', 'finca_id', 'fecha_asignacion']):
             return jsonify({"message": "Datos incompletos"}), 400
@@ -384,9 +877,12 @@ def update_asignacion(id):
                 descripcion,  # Nuevo campo
                 id
             ))
-            connection.commit()
             
             if cursor.rowcount > 0:
+                # Solo una fila realmente modificada emite evento e invalida el ETag
+                incrementar_version(connection, 'asignaciones')
+                registrar_cambio(connection, 'asignaciones', 'U', id)
+                connection.commit()
                 cursor.close()
                 connection.close()
                 return jsonify({
@@ -398,9 +894,10 @@ def update_asignacion(id):
                     "descripcion": descripcion  # Nuevo campo
                 }), 200
             else:
+                connection.rollback()
                 cursor.close()
                 connection.close()
-                return jsonify({"message": "No se pudo actualizar la asignación"}), 500
+                return jsonify({"message": "Asignación no encontrada"}), 404
     except ValueError as e:
         print("Error de conversión:", str(e))
         return jsonify({"error": "Error en el formato de los datos"}), 400
@@ -412,62 +909,79 @@ def update_asignacion(id):
         return jsonify({"error": "Error interno del servidor"}), 500
 
 # Rutas de pagos
+def parse_fecha_param(*nombres):
+    return consultas.parse_fecha(request.args, *nombres)
+
 @app.route('/api/pagos', methods=['GET'])
+@con_etag('pagos', 'empleados')
 def get_pagos():
     try:
+        try:
+            query, valores, limite = consultas.consulta_pagos(request.args)
+            formato = consultas.formato_lista(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
         connection = get_db_connection()
         if connection and connection.is_connected():
             cursor = connection.cursor(dictionary=True)
-            
-            # Consulta corregida (nombres de columnas exactos)
-            cursor.execute("""
-                SELECT
-                    p.id,
-                    p.fecha_pago,
-                    p.libras_totales AS libras,
-                    p.precio_libra_promedio AS precio_libra,
-                    p.total,
-                    e.id AS empleado_id,
-                    e.nombre AS empleado_nombre,
-                    e.cedula AS empleado_dpi,
-                    e.telefono AS empleado_telefono
-                FROM pagos p
-                LEFT JOIN empleados e ON p.empleados_id = e.id
-                ORDER BY p.fecha_pago DESC
-            """)
-
+            cursor.execute(query, valores)
             pagos = cursor.fetchall()
             cursor.close()
             connection.close()
 
+            pagos, siguiente_cursor = consultas.paginar_pagos(pagos, limite)
+
+            if formato == 'columnar':
+                response = jsonify(consultas.formatear_columnar(pagos, consultas.COLUMNAR_PAGOS))
+                if siguiente_cursor:
+                    response.headers['X-Next-Cursor'] = siguiente_cursor
+                return response, 200
+
             formatted_pagos = []
             for pago in pagos:
                 try:
-                    formatted_pagos.append({
-                        "id": pago["id"],
-                        "fecha_pago": pago["fecha_pago"].strftime("%Y-%m-%d") if pago["fecha_pago"] else None,
-                        "libras": float(pago["libras"]) if pago["libras"] else 0.0,
-                        "precio_libra": float(pago["precio_libra"]) if pago["precio_libra"] else 0.0,
-                        "total": float(pago["total"]) if pago["total"] else 0.0,
-                        "empleado": {
-                            "id": pago["empleado_id"],
-                            "nombre": pago["empleado_nombre"] or "Sin empleado",
-                            "dpi": pago["empleado_dpi"] or "",
-                            "telefono": pago["empleado_telefono"] or ""
-                        }
-                    })
+                    formatted_pagos.append(consultas.formatear_pago(pago))
                 except Exception as e:
                     print(f"Error formateando pago {pago['id']}: {str(e)}")
                     continue
 
-            return jsonify(formatted_pagos), 200
+            response = jsonify(formatted_pagos)
+            if siguiente_cursor:
+                response.headers['X-Next-Cursor'] = siguiente_cursor
+            return response, 200
 
     except Exception as e:
         print(f"Error en get_pagos: {str(e)}")
         return jsonify({"error": "Error al obtener los pagos", "detalle": str(e)}), 500
 
 
+@app.route('/api/pagos/por-periodo', methods=['GET'])
+@con_etag('pagos', 'empleados')
+def get_pagos_por_periodo():
+    try:
+        try:
+            query, valores, periodo, por_empleado = consultas.consulta_pagos_por_periodo(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, valores)
+            filas = cursor.fetchall()
+            cursor.close()
+            connection.close()
+
+            resultado = [consultas.formatear_periodo(fila, periodo, por_empleado) for fila in filas]
+            return jsonify(resultado), 200
+    except Exception as e:
+        print(f"Error en get_pagos_por_periodo: {str(e)}")
+        return jsonify({"error": "Error al obtener los pagos por período", "detalle": str(e)}), 500
+    return jsonify({"error": "Error al obtener los pagos por período"}), 500
+
 @app.route('/api/pagos', methods=['POST'])
+@con_idempotencia
 def create_pago():
     try:
         data = request.get_json()
@@ -505,38 +1019,17 @@ def create_pago():
                 total,
                 fecha_pago
             ))
-            
-            connection.commit()
             new_id = cursor.lastrowid
+            resumen.registrar_pago(cursor, empleado_id, fecha_pago, libras, total)
+            incrementar_version(connection, 'pagos')
+            registrar_cambio(connection, 'pagos', 'I', new_id)
             
-            # Obtener el pago recién creado para devolverlo
-            cursor.execute("""
-                SELECT p.*, e.nombre as empleado_nombre, e.cedula as empleado_dpi
-                FROM pagos p
-                LEFT JOIN empleados e ON p.empleados_id = e.id
-                WHERE p.id = %s
-            """, (new_id,))
-            
-            pago_creado = cursor.fetchone()
+            connection.commit()
             cursor.close()
             connection.close()
-            
-            if not pago_creado:
-                return jsonify({"error": "No se pudo recuperar el pago creado"}), 500
-                
-            return jsonify({
-                "id": pago_creado["id"],
-                "fecha_pago": pago_creado["fecha_pago"].strftime("%Y-%m-%d") if pago_creado["fecha_pago"] else None,
-                "libras": float(pago_creado["libras_totales"]),
-                "precio_libra": float(pago_creado["precio_libra_promedio"]),
-                "total": float(pago_creado["total"]),
-                "empleado": {
-                    "id": pago_creado["empleados_id"],
-                    "nombre": pago_creado["empleado_nombre"],
-                    "dpi": pago_creado["empleado_dpi"]
-                },
-                "message": "Pago creado exitosamente"
-            }), 201
+
+            return jsonify(consultas.formatear_pago_creado(new_id, empleado_id, fecha_pago,
+                                                           libras, precio_libra, total)), 201
             
     except Exception as e:
         print(f"Error en create_pago: {str(e)}")
@@ -546,6 +1039,7 @@ def create_pago():
         }), 500
 
 @app.route('/api/pagos/<int:id>', methods=['PUT'])
+@con_idempotencia
 def update_pago(id):
     try:
         data = request.get_json()
@@ -556,9 +1050,21 @@ def update_pago(id):
         
         connection = get_db_connection()
         if connection and connection.is_connected():
-            cursor = connection.cursor()
-            query = "UPDATE pagos SET empleado_id = %s, libras = %s, precio_libra = %s, total = %s WHERE id = %s"
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM pagos WHERE id = %s FOR UPDATE", (id,))
+            anterior = cursor.fetchone()
+            if not anterior:
+                cursor.close()
+                connection.close()
+                return jsonify({"message": "Pago no encontrado"}), 404
+
+            query = "UPDATE pagos SET empleados_id = %s, libras_totales = %s, precio_libra_promedio = %s, total = %s WHERE id = %s"
             cursor.execute(query, (data['empleado_id'], data['libras'], data['precio_libra'], total, id))
+            resumen.registrar_pago(cursor, anterior['empleados_id'], anterior['fecha_pago'],
+                                   anterior['libras_totales'], anterior['total'], signo=-1)
+            resumen.registrar_pago(cursor, data['empleado_id'], anterior['fecha_pago'], data['libras'], total)
+            incrementar_version(connection, 'pagos')
+            registrar_cambio(connection, 'pagos', 'U', id)
             connection.commit()
             cursor.close()
             connection.close()
@@ -568,13 +1074,28 @@ def update_pago(id):
     return jsonify({"message": "Error al actualizar pago"}), 500
 
 @app.route('/api/pagos/<int:id>', methods=['DELETE'])
+@con_idempotencia
 def delete_pago(id):
     try:
         connection = get_db_connection()
         if connection and connection.is_connected():
-            cursor = connection.cursor()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM pagos WHERE id = %s FOR UPDATE", (id,))
+            anterior = cursor.fetchone()
+            if not anterior:
+                cursor.close()
+                connection.close()
+                return jsonify({"message": "Pago no encontrado"}), 404
+
             query = "DELETE FROM pagos WHERE id = %s"
             cursor.execute(query, (id,))
+            # Las jornadas que cubría este pago vuelven a quedar pendientes de liquidar
+            if anterior.get('liquidacion_id') is not None:
+                cursor.execute("UPDATE jornadas SET pago_id = NULL WHERE pago_id = %s", (id,))
+            resumen.registrar_pago(cursor, anterior['empleados_id'], anterior['fecha_pago'],
+                                   anterior['libras_totales'], anterior['total'], signo=-1)
+            incrementar_version(connection, 'pagos')
+            registrar_cambio(connection, 'pagos', 'D', id)
             connection.commit()
             cursor.close()
             connection.close()
@@ -583,55 +1104,284 @@ def delete_pago(id):
         return jsonify({"error": str(e)}), 500
     return jsonify({"message": "Error al eliminar pago"}), 500
 
+# Liquidación de planilla: genera los pagos de un período desde las jornadas pendientes
+@app.route('/api/pagos/liquidar', methods=['POST'])
+@con_idempotencia
+def liquidar_planilla():
+    if config.DB_BACKEND == 'sqlite':
+        # En una estación las jornadas se sincronizan y la planilla se liquida en la base central
+        return jsonify({"error": "La liquidación solo está disponible en la base central"}), 409
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            inicio = consultas.parse_fecha(data, 'inicio')
+            fin = consultas.parse_fecha(data, 'fin')
+            fecha_pago = consultas.parse_fecha(data, 'fecha_pago') or datetime.now().date()
+            empleado_id = int(data['empleado_id']) if data.get('empleado_id') not in (None, '') else None
+            finca_id = int(data['finca_id']) if data.get('finca_id') not in (None, '') else None
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": "Datos inválidos", "detalle": str(e)}), 400
+        if not inicio or not fin or inicio > fin:
+            return jsonify({"error": "Datos incompletos", "campos_requeridos": ["inicio", "fin"]}), 400
+        if not config.LIQUIDACION_DESDE:
+            return jsonify({"error": "Falta configurar LIQUIDACION_DESDE, el primer día que se liquida"}), 409
+        if inicio < config.LIQUIDACION_DESDE:
+            # Antes del corte los pagos se hicieron a mano y las jornadas no están enlazadas
+            return jsonify({"error": "El período empieza antes del corte de liquidación",
+                            "liquidacion_desde": config.LIQUIDACION_DESDE}), 409
+
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            def antes_de_confirmar(liquidacion_id):
+                incrementar_version(connection, 'pagos', 'jornadas')
+                asegurar_tabla('cambios', cambios.DDL)
+                cursor = connection.cursor()
+                cambios.registrar_liquidacion(cursor, liquidacion_id)
+                cursor.close()
+
+            try:
+                liquidacion_id, pagos, jornadas = liquidacion.liquidar(
+                    connection, inicio, fin, fecha_pago, empleado_id, finca_id,
+                    antes_de_confirmar=antes_de_confirmar)
+            except liquidacion.LiquidacionOcupada:
+                connection.close()
+                return jsonify({"error": "Hay otra liquidación en curso, intente de nuevo"}), 409
+            if liquidacion_id is None:
+                connection.close()
+                return jsonify({"message": "No hay jornadas pendientes de pago en el período",
+                                "pagos": [], "jornadas": 0}), 200
+
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(consultas.SQL_PAGOS + " WHERE p.liquidacion_id = %s ORDER BY e.nombre, p.id",
+                           (liquidacion_id,))
+            creados = cursor.fetchall()
+            cursor.close()
+            connection.close()
+            return jsonify({
+                "liquidacion_id": liquidacion_id,
+                "inicio": inicio,
+                "fin": fin,
+                "fecha_pago": fecha_pago,
+                "jornadas": jornadas,
+                "total": sum(p["total"] for p in creados),
+                "pagos": [consultas.formatear_pago(p) for p in creados],
+                "message": f"{pagos} pagos creados"
+            }), 201
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"message": "Error al liquidar la planilla"}), 500
+
+# Exportación en streaming (CSV o NDJSON) sin cargar todo el resultado en memoria
+EXPORTACION_LOTE = int(os.environ.get('EXPORT_FETCH_SIZE', 1000))
+
+def respuesta_exportacion(nombre, query, valores=()):
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({"error": "Formato no válido", "formatos": ["csv", "ndjson"]}), 400
+
+    connection = get_db_connection()
+    if not (connection and connection.is_connected()):
+        return jsonify({"error": "Error al conectar a la base de datos"}), 500
+
+    def generar():
+        # Cursor sin buffer: las filas se traen del servidor por lotes con fetchmany
+        cursor = connection.cursor(buffered=False)
+        completo = False
+        try:
+            cursor.execute(query, tuple(valores))
+            columnas = cursor.column_names
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            if formato == 'csv':
+                escritor.writerow(columnas)
+            while True:
+                filas = cursor.fetchmany(EXPORTACION_LOTE)
+                if not filas:
+                    break
+                if formato == 'csv':
+                    escritor.writerows(filas)
+                else:
+                    for fila in filas:
+                        buffer.write(serializacion.dumps(dict(zip(columnas, fila))).decode('utf-8'))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+            completo = True
+        finally:
+            if completo:
+                cursor.close()
+                connection.close()
+            else:
+                # El cliente cortó la descarga: quedan filas sin leer, no se reutiliza la conexión
+                connection.descartar()
+
+    extension, mimetype = ('csv', 'text/csv') if formato == 'csv' else ('ndjson', 'application/x-ndjson')
+    return Response(stream_with_context(generar()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={nombre}.{extension}'
+    })
+
+def filtros_exportacion(columna_fecha, columna_empleado, columna_finca=None):
+    # Construye el WHERE común de las exportaciones; ValueError si una fecha es inválida
+    condiciones = []
+    valores = []
+    inicio = parse_fecha_param('inicio')
+    fin = parse_fecha_param('fin')
+    if inicio and columna_fecha:
+        condiciones.append(f"{columna_fecha} >= %s")
+        valores.append(inicio)
+    if fin and columna_fecha:
+        condiciones.append(f"{columna_fecha} <= %s")
+        valores.append(fin)
+    empleado_id = request.args.get('empleado_id', type=int)
+    if empleado_id is not None:
+        condiciones.append(f"{columna_empleado} = %s")
+        valores.append(empleado_id)
+    finca_id = request.args.get('finca_id', type=int)
+    if finca_id is not None and columna_finca:
+        condiciones.append(f"{columna_finca} = %s")
+        valores.append(finca_id)
+    return ("WHERE " + " AND ".join(condiciones)) if condiciones else "", valores
+
+@app.route('/api/pagos/exportar', methods=['GET'])
+def exportar_pagos():
+    try:
+        where, valores = filtros_exportacion('p.fecha_pago', 'p.empleados_id')
+    except ValueError as e:
+        return jsonify({"error": "Parámetros inválidos", "detalle": str(e)}), 400
+    return respuesta_exportacion('pagos', f"""
+        SELECT p.id, p.fecha_pago, p.libras_totales AS libras, p.precio_libra_promedio AS precio_libra, p.total,
+               p.empleados_id AS empleado_id, e.nombre AS empleado_nombre, e.cedula AS empleado_dpi
+        FROM pagos p
+        LEFT JOIN empleados e ON p.empleados_id = e.id
+        {where}
+        ORDER BY p.fecha_pago DESC, p.id DESC
+    """, valores)
+
+@app.route('/api/jornadas/exportar', methods=['GET'])
+def exportar_jornadas():
+    try:
+        where, valores = filtros_exportacion('j.fecha', 'j.empleados_id', 'j.fincas_id')
+    except ValueError as e:
+        return jsonify({"error": "Parámetros inválidos", "detalle": str(e)}), 400
+    return respuesta_exportacion('jornadas', f"""
+        SELECT j.id, j.fecha, j.libras_recolectadas, j.precio_libra,
+               j.libras_recolectadas * j.precio_libra AS total,
+               j.empleados_id AS empleado_id, e.nombre AS empleado_nombre, e.cedula AS empleado_dpi,
+               j.fincas_id AS finca_id, f.nombre AS finca_nombre
+        FROM jornadas j
+        LEFT JOIN empleados e ON j.empleados_id = e.id
+        LEFT JOIN fincas f ON j.fincas_id = f.id
+        {where}
+        ORDER BY j.fecha, j.id
+    """, valores)
+
+@app.route('/api/asignaciones/exportar', methods=['GET'])
+def exportar_asignaciones():
+    try:
+        where, valores = filtros_exportacion('a.fecha_asignacion', 'a.empleado_id', 'a.finca_id')
+    except ValueError as e:
+        return jsonify({"error": "Parámetros inválidos", "detalle": str(e)}), 400
+    return respuesta_exportacion('asignaciones', f"""
+        SELECT a.id, a.fecha_asignacion, a.descripcion,
+               a.empleado_id, e.nombre AS empleado_nombre, e.cedula AS empleado_dpi,
+               a.finca_id, f.nombre AS finca_nombre, f.ubicacion AS finca_ubicacion
+        FROM asignaciones a
+        LEFT JOIN empleados e ON a.empleado_id = e.id
+        LEFT JOIN fincas f ON a.finca_id = f.id
+        {where}
+        ORDER BY a.id
+    """, valores)
+
 # Jornadas
+# Reportes en segundo plano (ver reportes.py): se encolan, se consulta el estado y se
+# descarga el JSON cuando está listo
+cola_reportes = reportes.ColaReportes()
+
+@app.route('/api/reportes', methods=['POST'])
+def crear_reporte():
+    data = request.get_json(silent=True) or {}
+    try:
+        trabajo = cola_reportes.enviar(data.get('tipo'), data.get('parametros'))
+    except reportes.TipoInvalido:
+        return jsonify({"error": "Tipo de reporte no válido", "tipos": list(reportes.TIPOS)}), 400
+    except consultas.ParametroInvalido as e:
+        return jsonify(e.cuerpo), 400
+    response = jsonify(reportes.formatear_trabajo(trabajo))
+    response.headers['Location'] = f"/api/reportes/{trabajo['id']}"
+    return response, 200 if trabajo['estado'] == 'listo' else 202
+
+@app.route('/api/reportes/<trabajo_id>', methods=['GET'])
+def estado_reporte(trabajo_id):
+    trabajo = cola_reportes.obtener(trabajo_id)
+    if not trabajo:
+        return jsonify({"error": "Reporte no encontrado"}), 404
+    return jsonify(reportes.formatear_trabajo(trabajo))
+
+@app.route('/api/reportes/<trabajo_id>/resultado', methods=['GET'])
+def resultado_reporte(trabajo_id):
+    trabajo = cola_reportes.obtener(trabajo_id)
+    if not trabajo:
+        return jsonify({"error": "Reporte no encontrado"}), 404
+    if trabajo['estado'] != 'listo':
+        return jsonify(reportes.formatear_trabajo(trabajo)), 409
+    try:
+        return send_file(cola_reportes.ruta(trabajo_id), mimetype='application/json', max_age=0,
+                         download_name=f"{trabajo['tipo']}.json")
+    except FileNotFoundError:
+        return jsonify({"error": "El resultado ya expiró"}), 410
+
 @app.route('/api/jornadas', methods=['GET'])
+@con_etag('jornadas', 'empleados', 'fincas')
 def get_jornadas():
     try:
+        try:
+            formato = consultas.formato_lista(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
         connection = get_db_connection()
         if connection and connection.is_connected():
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT 
-                    j.id, j.fecha, j.libras_recolectadas, j.precio_libra,
-                    e.id as empleados_id, 
-                    COALESCE(e.nombre, 'Sin empleado') as empleados_nombre,
-                    COALESCE(e.cedula, '') as empleados_cedula,
-                    COALESCE(e.telefono, '') as empleados_telefono,
-                    f.id as fincas_id, 
-                    COALESCE(f.nombre, 'Sin finca') as fincas_nombre
-                FROM jornadas j
-                LEFT JOIN empleados e ON j.empleados_id = e.id
-                LEFT JOIN fincas f ON j.fincas_id = f.id
-            """)
-
+            cursor.execute(consultas.SQL_JORNADAS)
             jornadas = cursor.fetchall()
             cursor.close()
             connection.close()
 
-            formatted_jornadas = []
-            for jornada in jornadas:
-                formatted_jornadas.append({
-                    "id": jornada["id"],
-                    "fecha": jornada["fecha"],
-                    "libras_recolectadas": float(jornada["libras_recolectadas"]) if jornada["libras_recolectadas"] else 0.0,
-                    "precio_libra": float(jornada["precio_libra"]) if jornada["precio_libra"] else 0.0,
-                    "empleado": {
-                        "id": jornada["empleados_id"],
-                        "nombre": jornada["empleados_nombre"],
-                        "dpi": jornada["empleados_cedula"],
-                        "telefono": jornada["empleados_telefono"]
-                    },
-                    "finca": {
-                        "id": jornada["fincas_id"],
-                        "nombre": jornada["fincas_nombre"]
-                    }
-                })
-
+            if formato == 'columnar':
+                return jsonify(consultas.formatear_columnar(jornadas, consultas.COLUMNAR_JORNADAS)), 200
+            formatted_jornadas = [consultas.formatear_jornada(j) for j in jornadas]
             return jsonify(formatted_jornadas), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/jornadas/reporte', methods=['GET'])
+@con_etag('jornadas', 'empleados', 'fincas')
+def get_jornadas_reporte():
+    try:
+        try:
+            query, valores, agrupar = consultas.consulta_reporte_jornadas(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, valores)
+            filas = cursor.fetchall()
+            cursor.close()
+            connection.close()
+
+            reporte = [consultas.formatear_reporte(fila, agrupar) for fila in filas]
+            return jsonify(reporte), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Error al generar el reporte de jornadas"}), 500
+
 @app.route('/api/jornadas', methods=['POST'])
+@con_idempotencia
 def create_jornada():
     try:
         data = request.get_json()
@@ -652,14 +1402,143 @@ def create_jornada():
                 data['libras_recolectadas'],
                 data['precio_libra']
             ))
+            new_id = cursor.lastrowid
+            resumen.registrar_jornada(cursor, data['empleados_id'], data['fincas_id'], data['fecha'],
+                                      data['libras_recolectadas'], data['precio_libra'])
+            incrementar_version(connection, 'jornadas')
+            registrar_cambio(connection, 'jornadas', 'I', new_id)
             connection.commit()
             cursor.close()
             connection.close()
-            return jsonify({"message": "Jornada creada exitosamente"}), 201
+            return jsonify({"id": new_id, "message": "Jornada creada exitosamente"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Carga masiva de jornadas
+JORNADAS_BULK_MAXIMO = int(os.environ.get('JORNADAS_BULK_MAX_ROWS', 10000))
+JORNADAS_BULK_LOTE = int(os.environ.get('JORNADAS_BULK_CHUNK_SIZE', 500))
+CAMPOS_JORNADA = ['empleados_id', 'fincas_id', 'fecha', 'libras_recolectadas', 'precio_libra']
+
+def validar_jornada(fila):
+    # Devuelve (jornada normalizada, lista de errores)
+    if not isinstance(fila, dict):
+        return None, ["La fila debe ser un objeto"]
+    errores = [f"Falta el campo {c}" for c in CAMPOS_JORNADA if fila.get(c) in (None, '')]
+    if errores:
+        return None, errores
+    jornada = {}
+    try:
+        jornada['empleados_id'] = int(fila['empleados_id'])
+        jornada['fincas_id'] = int(fila['fincas_id'])
+    except (TypeError, ValueError):
+        errores.append("empleados_id y fincas_id deben ser enteros")
+    try:
+        jornada['fecha'] = datetime.strptime(str(fila['fecha'])[:10], '%Y-%m-%d').date()
+    except ValueError:
+        errores.append("fecha debe tener formato YYYY-MM-DD")
+    for campo in ['libras_recolectadas', 'precio_libra']:
+        try:
+            jornada[campo] = float(fila[campo])
+            if jornada[campo] < 0:
+                errores.append(f"{campo} no puede ser negativo")
+        except (TypeError, ValueError):
+            errores.append(f"{campo} debe ser numérico")
+    return (None if errores else jornada), errores
+
+def ids_existentes(cursor, tabla, ids):
+    if not ids:
+        return set()
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"SELECT id FROM {tabla} WHERE id IN ({marcadores})", tuple(ids))
+    return {fila[0] for fila in cursor.fetchall()}
+
+@app.route('/api/jornadas/bulk', methods=['POST'])
+@con_idempotencia
+def create_jornadas_bulk():
+    try:
+        data = request.get_json()
+        filas = data.get('jornadas') if isinstance(data, dict) else data
+        if not isinstance(filas, list) or not filas:
+            return jsonify({"error": "Se esperaba una lista de jornadas"}), 400
+        if len(filas) > JORNADAS_BULK_MAXIMO:
+            return jsonify({"error": f"Máximo {JORNADAS_BULK_MAXIMO} jornadas por carga"}), 413
+
+        lote = request.args.get('lote', JORNADAS_BULK_LOTE, type=int)
+        lote = max(1, min(lote, JORNADAS_BULK_MAXIMO))
+        # Con todo_o_nada=1 no se inserta nada si alguna fila tiene errores
+        todo_o_nada = request.args.get('todo_o_nada', '').lower() in ('1', 'true', 'si')
+
+        validas = []
+        errores = []
+        for indice, fila in enumerate(filas):
+            jornada, errores_fila = validar_jornada(fila)
+            if errores_fila:
+                errores.append({"fila": indice, "errores": errores_fila})
+            else:
+                validas.append((indice, jornada))
+
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            cursor = connection.cursor()
+
+            # Validar referencias con dos consultas en vez de una por fila
+            empleados = ids_existentes(cursor, 'empleados', {j['empleados_id'] for _, j in validas})
+            fincas = ids_existentes(cursor, 'fincas', {j['fincas_id'] for _, j in validas})
+            jornadas = []
+            for indice, jornada in validas:
+                errores_fila = []
+                if jornada['empleados_id'] not in empleados:
+                    errores_fila.append("El empleado no existe")
+                if jornada['fincas_id'] not in fincas:
+                    errores_fila.append("La finca no existe")
+                if errores_fila:
+                    errores.append({"fila": indice, "errores": errores_fila})
+                else:
+                    jornadas.append(jornada)
+            errores.sort(key=lambda e: e["fila"])
+
+            if todo_o_nada and errores:
+                cursor.close()
+                connection.close()
+                return jsonify({"insertadas": 0, "errores": errores}), 400
+
+            query = """
+            INSERT INTO jornadas (empleados_id, fincas_id, fecha, libras_recolectadas, precio_libra)
+            VALUES (%s, %s, %s, %s, %s)
+            """
+            try:
+                nuevos_ids = []
+                for inicio in range(0, len(jornadas), lote):
+                    cursor.executemany(query, [
+                        tuple(j[c] for c in CAMPOS_JORNADA) for j in jornadas[inicio:inicio + lote]
+                    ])
+                    # Un INSERT de varias filas recibe ids consecutivos; lastrowid es el primero
+                    nuevos_ids.extend(range(cursor.lastrowid, cursor.lastrowid + cursor.rowcount))
+                resumen.registrar_jornadas(cursor, jornadas)
+                if jornadas:
+                    incrementar_version(connection, 'jornadas')
+                    registrar_cambio(connection, 'jornadas', 'I', *nuevos_ids)
+                connection.commit()
+            except Error:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+                connection.close()
+
+            status = 201 if jornadas else 400
+            return jsonify({
+                "insertadas": len(jornadas),
+                "rechazadas": len(errores),
+                "errores": errores,
+                "message": "Jornadas creadas exitosamente" if jornadas else "No se insertó ninguna jornada"
+            }), status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Error al crear las jornadas"}), 500
+
 @app.route('/api/jornadas/<int:id>', methods=['PUT'])
+@con_idempotencia
 def update_jornada(id):
     try:
         data = request.get_json()
@@ -668,12 +1547,17 @@ def update_jornada(id):
 
         connection = get_db_connection()
         if connection and connection.is_connected():
-            cursor = connection.cursor()
-            cursor.execute("SELECT id FROM jornadas WHERE id = %s", (id,))
-            if not cursor.fetchone():
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM jornadas WHERE id = %s FOR UPDATE", (id,))
+            anterior = cursor.fetchone()
+            if not anterior:
                 cursor.close()
                 connection.close()
                 return jsonify({"error": "Jornada no encontrada"}), 404
+            if anterior.get('pago_id'):
+                cursor.close()
+                connection.close()
+                return jsonify(consultas.jornada_liquidada(anterior)), 409
 
             query = """
             UPDATE jornadas 
@@ -688,6 +1572,12 @@ def update_jornada(id):
                 data['precio_libra'],
                 id
             ))
+            resumen.registrar_jornada(cursor, anterior['empleados_id'], anterior['fincas_id'], anterior['fecha'],
+                                      anterior['libras_recolectadas'], anterior['precio_libra'], signo=-1)
+            resumen.registrar_jornada(cursor, data['empleados_id'], data['fincas_id'], data['fecha'],
+                                      data['libras_recolectadas'], data['precio_libra'])
+            incrementar_version(connection, 'jornadas')
+            registrar_cambio(connection, 'jornadas', 'U', id)
             connection.commit()
             cursor.close()
             connection.close()
@@ -696,18 +1586,28 @@ def update_jornada(id):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/jornadas/<int:id>', methods=['DELETE'])
+@con_idempotencia
 def delete_jornada(id):
     try:
         connection = get_db_connection()
         if connection and connection.is_connected():
-            cursor = connection.cursor()
-            cursor.execute("SELECT id FROM jornadas WHERE id = %s", (id,))
-            if not cursor.fetchone():
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM jornadas WHERE id = %s FOR UPDATE", (id,))
+            anterior = cursor.fetchone()
+            if not anterior:
                 cursor.close()
                 connection.close()
                 return jsonify({"error": "Jornada no encontrada"}), 404
+            if anterior.get('pago_id'):
+                cursor.close()
+                connection.close()
+                return jsonify(consultas.jornada_liquidada(anterior)), 409
 
             cursor.execute("DELETE FROM jornadas WHERE id = %s", (id,))
+            resumen.registrar_jornada(cursor, anterior['empleados_id'], anterior['fincas_id'], anterior['fecha'],
+                                      anterior['libras_recolectadas'], anterior['precio_libra'], signo=-1)
+            incrementar_version(connection, 'jornadas')
+            registrar_cambio(connection, 'jornadas', 'D', id)
             connection.commit()
             cursor.close()
             connection.close()
@@ -715,6 +1615,115 @@ def delete_jornada(id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Registro de cambios: los clientes piden solo lo que cambió desde su último seq
+CAMBIOS_LIMITE = int(os.environ.get('CHANGES_PAGE_SIZE', 1000))
+CAMBIOS_LIMITE_MAXIMO = 5000
+CAMBIOS_PURGA = 300
+_ultima_purga_cambios = 0.0
+
+def purgar_cambios(connection):
+    global _ultima_purga_cambios
+    if time.monotonic() - _ultima_purga_cambios < CAMBIOS_PURGA:
+        return
+    _ultima_purga_cambios = time.monotonic()
+    cursor = connection.cursor()
+    try:
+        cambios.purgar(cursor)
+        connection.commit()
+    finally:
+        cursor.close()
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    try:
+        desde = request.args.get('since', type=int)
+        limite = max(1, min(request.args.get('limite', CAMBIOS_LIMITE, type=int), CAMBIOS_LIMITE_MAXIMO))
+        tablas = [t for t in request.args.get('tablas', '').split(',') if t] or list(cambios.TABLAS)
+        invalidas = [t for t in tablas if t not in cambios.TABLAS]
+        if invalidas:
+            return jsonify({"error": "Tablas inválidas", "tablas": invalidas, "permitidas": list(cambios.TABLAS)}), 400
+
+        asegurar_tabla_versiones()
+        asegurar_tabla('cambios', cambios.DDL)
+        connection = get_db_connection()
+        if connection and connection.is_connected():
+            purgar_cambios(connection)
+            cursor = connection.cursor()
+            # Sin since: solo el seq actual, para empezar a seguir cambios después de cargar las listas
+            if desde is None:
+                hasta = cambios.ultimo(cursor)
+                cursor.close()
+                connection.close()
+                return jsonify({"desde": None, "hasta": hasta, "mas": False, "cambios": []})
+            purgado = cambios.purgado_hasta(cursor)
+            if desde < purgado:
+                cursor.close()
+                connection.close()
+                return jsonify({"error": "Los cambios pedidos ya se purgaron; vuelva a cargar las listas",
+                                "purgado_hasta": purgado}), 410
+
+            leidos, hasta, mas = cambios.leer(cursor, desde, limite)
+            cursor.close()
+            netos = [c for c in cambios.compactar(leidos) if c[1] in tablas]
+            cursor = connection.cursor(dictionary=True)
+            filas = {tabla: cambios.cargar(cursor, tabla, [i for _, t, i, op in netos if t == tabla and op != 'D'])
+                     for tabla in tablas}
+            cursor.close()
+            connection.close()
+
+            resultado = []
+            for seq, tabla, fila_id, operacion in netos:
+                fila = filas[tabla].get(fila_id)
+                if fila is None:
+                    # Borrada después de este cambio: viaja como tombstone
+                    operacion = 'D'
+                resultado.append({"seq": seq, "tabla": tabla, "id": fila_id,
+                                  "operacion": cambios.OPERACIONES[operacion], "fila": fila})
+            return jsonify({"desde": desde, "hasta": hasta, "mas": mas, "cambios": resultado})
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Error al obtener los cambios"}), 500
+
+# Canal de eventos en vivo (SSE) de jornadas, pagos y totales del día por finca
+broker_eventos = eventos.Broker()
+vigia_eventos = eventos.VigiaCambios(broker_eventos, db_pool.conexion)
+
+@app.after_request
+def avisar_eventos(response):
+    # El handler ya hizo commit: el vigía de este proceso publica sin esperar su próxima ronda
+    if g.get('hubo_cambios'):
+        vigia_eventos.despertar()
+    return response
+
+@app.route('/api/eventos', methods=['GET'])
+def eventos_en_vivo():
+    tablas = [t for t in request.args.get('tablas', '').split(',') if t] or list(eventos.TABLAS)
+    invalidas = [t for t in tablas if t not in eventos.TABLAS]
+    if invalidas:
+        return jsonify({"error": "Tablas inválidas", "tablas": invalidas, "permitidas": list(eventos.TABLAS)}), 400
+    ultimo = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    try:
+        desde = int(ultimo) if ultimo else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID inválido"}), 400
+
+    try:
+        asegurar_tabla_versiones()
+        asegurar_tabla('cambios', cambios.DDL)
+        vigia_eventos.iniciar()
+        suscripcion = broker_eventos.suscribir(tuple(tablas), desde)
+    except eventos.ClientesAgotados:
+        return jsonify({"error": "Demasiados clientes conectados"}), 503, {'Retry-After': '30'}
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+    # Sin stream_with_context: el generador no usa el request ni conexiones del pool
+    return Response(eventos.transmitir(broker_eventos, suscripcion), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/eventos/estadisticas', methods=['GET'])
+def eventos_estadisticas():
+    return jsonify(broker_eventos.estadisticas())
+
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=5000)
     
\ No newline at end of file
@@ -0,0 +1,379 @@
+"""Backend SQLite para estaciones de campo sin conexión estable (DB_BACKEND=sqlite).
+
+Las rutas de API.py no cambian: ConexionSQLite imita la parte de mysql.connector que usan
+(cursor con dictionary=True, lastrowid, rowcount, fetchmany, commit/rollback) y traduce
+el SQL de MySQL que aparece en los handlers: %s, FOR UPDATE, ON DUPLICATE KEY UPDATE,
+NOW()/INTERVAL, DATE_SUB, DATE_FORMAT, WEEKDAY y DAYOFMONTH. La traducción se cachea y sqlite3
+reutiliza la sentencia preparada de cada SQL por conexión.
+
+La base usa WAL (lecturas concurrentes con un escritor). Los triggers de jornadas y pagos
+anotan cada cambio en cambios_pendientes; sincronizar.py los sube a la MySQL central.
+No soportado en SQLite: liquidación de planilla (UPDATE ... JOIN) y migrar.py.
+"""
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import Error
+
+from db_pool import ConexionPooled, PoolConexiones
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    email VARCHAR(150) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS empleados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(150) NOT NULL,
+    cedula VARCHAR(20) NOT NULL,
+    telefono VARCHAR(20) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fincas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(150) NOT NULL,
+    ubicacion VARCHAR(255) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS asignaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    empleado_id INT NOT NULL,
+    finca_id INT NOT NULL,
+    fecha_asignacion DATE NOT NULL,
+    descripcion TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_asignaciones_empleado ON asignaciones (empleado_id);
+CREATE INDEX IF NOT EXISTS idx_asignaciones_finca ON asignaciones (finca_id);
+CREATE TABLE IF NOT EXISTS pagos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    empleados_id INT NOT NULL,
+    libras_totales DECIMAL(12,2) NOT NULL,
+    precio_libra_promedio DECIMAL(10,4) NOT NULL,
+    total DECIMAL(14,2) NOT NULL,
+    fecha_pago DATE NOT NULL,
+    liquidacion_id INT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pagos_fecha_id ON pagos (fecha_pago, id);
+CREATE INDEX IF NOT EXISTS idx_pagos_empleado_fecha ON pagos (empleados_id, fecha_pago);
+CREATE TABLE IF NOT EXISTS jornadas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    empleados_id INT NOT NULL,
+    fincas_id INT NOT NULL,
+    fecha DATE NOT NULL,
+    libras_recolectadas DECIMAL(10,2) NOT NULL,
+    precio_libra DECIMAL(10,4) NOT NULL,
+    pago_id INT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jornadas_empleado_fecha ON jornadas (empleados_id, fecha);
+CREATE INDEX IF NOT EXISTS idx_jornadas_finca_fecha ON jornadas (fincas_id, fecha);
+CREATE INDEX IF NOT EXISTS idx_jornadas_fecha ON jornadas (fecha);
+CREATE INDEX IF NOT EXISTS idx_jornadas_pendientes ON jornadas (pago_id, fecha);
+CREATE TABLE IF NOT EXISTS resumen_jornadas (
+    fecha DATE NOT NULL,
+    empleados_id INT NOT NULL,
+    fincas_id INT NOT NULL,
+    jornadas INT NOT NULL DEFAULT 0,
+    libras_recolectadas DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, empleados_id, fincas_id)
+);
+CREATE TABLE IF NOT EXISTS resumen_pagos (
+    fecha DATE NOT NULL,
+    empleados_id INT NOT NULL,
+    pagos INT NOT NULL DEFAULT 0,
+    libras_totales DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, empleados_id)
+);
+CREATE TABLE IF NOT EXISTS versiones_tablas (
+    tabla VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS idempotencia (
+    clave VARCHAR(255) NOT NULL,
+    ruta VARCHAR(255) NOT NULL,
+    huella CHAR(40) NOT NULL,
+    estado SMALLINT NULL,
+    cuerpo BLOB NULL,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira DATETIME NOT NULL,
+    PRIMARY KEY (clave, ruta)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotencia_expira ON idempotencia (expira);
+CREATE TABLE IF NOT EXISTS liquidaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    inicio DATE NOT NULL,
+    fin DATE NOT NULL,
+    fecha_pago DATE NOT NULL,
+    empleados_id INT NULL,
+    fincas_id INT NULL,
+    pagos INT NOT NULL DEFAULT 0,
+    jornadas INT NOT NULL DEFAULT 0,
+    libras_totales DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,2) NOT NULL DEFAULT 0,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS cambios (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla VARCHAR(32) NOT NULL,
+    fila_id INT NOT NULL,
+    operacion CHAR(1) NOT NULL,
+    creado DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cambios_creado ON cambios (creado);
+
+-- Seguimiento de cambios para la sincronización (sincronizar.py)
+CREATE TABLE IF NOT EXISTS cambios_pendientes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    operacion TEXT NOT NULL,
+    creado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+TABLAS_SINCRONIZADAS = ('jornadas', 'pagos')
+
+TRIGGERS = "".join(f"""
+CREATE TRIGGER IF NOT EXISTS cambios_{tabla}_{nombre} AFTER {evento} ON {tabla}
+BEGIN
+    INSERT INTO cambios_pendientes (tabla, local_id, operacion) VALUES ('{tabla}', {fila}.id, '{operacion}');
+END;
+""" for tabla in TABLAS_SINCRONIZADAS for nombre, evento, fila, operacion in (
+    ('insert', 'INSERT', 'NEW', 'I'), ('update', 'UPDATE', 'NEW', 'U'), ('delete', 'DELETE', 'OLD', 'D')))
+
+# Errores de SQLite con su equivalente de MySQL (los handlers revisan e.errno)
+ERRNO_DUPLICADO = 1062
+ERRNO_SIN_TABLA = 1146
+
+_FECHA = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# Columnas DATE del esquema y alias de fechas calculadas; solo esas vuelven como date
+COLUMNAS_FECHA = frozenset(('fecha', 'fecha_pago', 'fecha_asignacion', 'inicio', 'fin', 'inicio_periodo'))
+
+
+def _a_fecha(valor):
+    return date.fromisoformat(str(valor)[:10])
+
+
+def _date_format(valor, formato):
+    if valor is None:
+        return None
+    return _a_fecha(valor).strftime(formato)
+
+
+def _weekday(valor):
+    return None if valor is None else _a_fecha(valor).weekday()
+
+
+def _dayofmonth(valor):
+    return None if valor is None else _a_fecha(valor).day
+
+
+def _ahora():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _sumar_segundos(segundos):
+    return (datetime.now() + timedelta(seconds=float(segundos))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda v: v.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(Decimal, float)
+
+
+@lru_cache(maxsize=512)
+def traducir(sql, con_parametros=True):
+    """Traduce el dialecto de MySQL usado en la API al de SQLite."""
+    if con_parametros:
+        sql = sql.replace('%s', '?').replace('%%', '%')
+    sql = re.sub(r'\s+FOR\s+UPDATE\b', '', sql, flags=re.I)
+    sql = re.sub(r'NOW\(\)\s*([+-])\s*INTERVAL\s+(\?|\d+)\s+SECOND', r'SUMAR_SEGUNDOS(\1\2)', sql, flags=re.I)
+    sql = re.sub(r'DATE_SUB\((.+?),\s*INTERVAL\s+(.+?)\s+DAY\)', r"date(\1, '-' || (\2) || ' days')", sql, flags=re.I)
+    # Las columnas DECIMAL guardan los montos enteros como INTEGER y SQLite dividiría sin
+    # decimales; multiplicar el dividendo por 1.0 deja la división en punto flotante.
+    sql = re.sub(r'(?<=\s)/(?=\s)', '* 1.0 /', sql)
+    partes = re.split(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', sql, maxsplit=1, flags=re.I)
+    if len(partes) == 2:
+        sql = partes[0] + 'ON CONFLICT DO UPDATE SET' + re.sub(r'VALUES\((\w+)\)', r'excluded.\1', partes[1])
+    if re.match(r'\s*DELETE\b', sql, flags=re.I):
+        sql = re.sub(r'\s+LIMIT\s+\d+\s*$', '', sql, flags=re.I)
+    return sql
+
+
+def _error(e):
+    mensaje = str(e)
+    errno = None
+    if isinstance(e, sqlite3.IntegrityError) and 'UNIQUE' in mensaje:
+        errno = ERRNO_DUPLICADO
+    elif 'no such table' in mensaje:
+        errno = ERRNO_SIN_TABLA
+    return Error(msg=mensaje, errno=errno)
+
+
+class CursorSQLite:
+    def __init__(self, conexion, dictionary=False):
+        self._conexion = conexion
+        self._cursor = conexion._sqlite.cursor()
+        self._dictionary = dictionary
+        self._lastrowid = None
+
+    @property
+    def lastrowid(self):
+        return self._lastrowid if self._lastrowid is not None else self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def column_names(self):
+        return tuple(c[0] for c in self._cursor.description or ())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, sql, valores=None):
+        # CREATE TABLE con sintaxis de MySQL (KEY ... dentro de la tabla): si ya existe no hace falta
+        creada = re.match(r'\s*CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS\s+(\w+)', sql, flags=re.I)
+        if creada and self._conexion.existe_tabla(creada.group(1)):
+            self._cursor.execute("SELECT 1 WHERE 0")
+            return
+        traducido = traducir(sql, valores is not None)
+        self._lastrowid = None
+        try:
+            # FOR UPDATE: se toma el bloqueo de escritura desde la lectura, como en MySQL
+            if not self._conexion.in_transaction and re.search(r'\bFOR\s+UPDATE\b', sql, flags=re.I):
+                self._conexion._sqlite.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(traducido, tuple(valores or ()))
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def executemany(self, sql, filas):
+        try:
+            self._cursor.executemany(traducir(sql, True), [tuple(f) for f in filas])
+            # Como MySQL en un INSERT de varias filas: lastrowid es el id de la primera
+            self._lastrowid = None
+            if re.match(r'\s*INSERT\b', sql, flags=re.I) and self._cursor.rowcount > 0:
+                ultimo = self._conexion._sqlite.execute("SELECT last_insert_rowid()").fetchone()[0]
+                self._lastrowid = ultimo - self._cursor.rowcount + 1
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def _fila(self, fila):
+        if fila is None:
+            return None
+        columnas = self.column_names
+        fila = tuple(_a_fecha(v) if columna in COLUMNAS_FECHA and isinstance(v, str) and _FECHA.match(v) else v
+                     for columna, v in zip(columnas, fila))
+        if self._dictionary:
+            return dict(zip(columnas, fila))
+        return fila
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchmany(self, cantidad=1):
+        return [self._fila(f) for f in self._cursor.fetchmany(cantidad)]
+
+    def fetchall(self):
+        return [self._fila(f) for f in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._fila(f) for f in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión SQLite con la interfaz de mysql.connector que usan los handlers."""
+
+    def __init__(self, ruta):
+        self._sqlite = sqlite3.connect(ruta, timeout=30, isolation_level='IMMEDIATE',
+                                       check_same_thread=False, cached_statements=256)
+        self._sqlite.execute("PRAGMA journal_mode=WAL")
+        self._sqlite.execute("PRAGMA synchronous=NORMAL")
+        self._sqlite.execute("PRAGMA busy_timeout=30000")
+        self._sqlite.create_function("NOW", 0, _ahora)
+        self._sqlite.create_function("CURDATE", 0, lambda: date.today().isoformat())
+        self._sqlite.create_function("SUMAR_SEGUNDOS", 1, _sumar_segundos)
+        self._sqlite.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+        self._sqlite.create_function("WEEKDAY", 1, _weekday, deterministic=True)
+        self._sqlite.create_function("DAYOFMONTH", 1, _dayofmonth, deterministic=True)
+        # SQLite ya serializa las escrituras; los bloqueos con nombre siempre se conceden
+        self._sqlite.create_function("GET_LOCK", 2, lambda nombre, espera: 1)
+        self._sqlite.create_function("RELEASE_LOCK", 1, lambda nombre: 1)
+        self._tablas = set()
+
+    def existe_tabla(self, nombre):
+        if nombre not in self._tablas:
+            fila = self._sqlite.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                        (nombre,)).fetchone()
+            if fila:
+                self._tablas.add(nombre)
+        return nombre in self._tablas
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return CursorSQLite(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._sqlite.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def ping(self, reconnect=False):
+        return None
+
+    def commit(self):
+        try:
+            self._sqlite.commit()
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def close(self):
+        self._sqlite.close()
+
+
+_esquema_lock = threading.Lock()
+
+
+def crear_esquema(ruta):
+    with _esquema_lock:
+        conexion = sqlite3.connect(ruta)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA + TRIGGERS)
+        finally:
+            conexion.close()
+
+
+def conectar(ruta):
+    """Conexión suelta (sin pool), p. ej. para scripts o procesos hijos."""
+    crear_esquema(ruta)
+    return ConexionSQLite(ruta)
+
+
+class PoolSQLite(PoolConexiones):
+    """Mismo pool que para MySQL, pero cada conexión es una ConexionSQLite sobre el archivo local."""
+
+    def __init__(self, ruta, tamano=10, espera=30):
+        super().__init__({}, tamano=tamano, espera=espera, reciclar=0, ping_tras=float('inf'))
+        self.ruta = ruta
+        crear_esquema(ruta)
+
+    def _nueva(self):
+        conexion = ConexionPooled(self, ConexionSQLite(self.ruta))
+        self._sumar("creadas")
+        return conexion
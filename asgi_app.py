@@ -0,0 +1,716 @@
+"""Servidor ASGI asíncrono con las mismas rutas y respuestas JSON que API.py.
+
+Usa Quart (misma API que Flask) y un pool de aiomysql: mientras una consulta espera a la
+base remota, el mismo proceso atiende otros requests. Las consultas y el formato de las
+respuestas vienen de consultas.py, así el frontend no nota diferencia.
+
+Cubre auth, empleados, fincas, asignaciones, pagos y jornadas (incluidos los reportes);
+las rutas de exportación, carga masiva y métricas siguen solo en API.py.
+Requiere el esquema migrado (python migrar.py).
+
+Como API.py: verifica el JWT en cada request (AUTH_REQUIRED lo exige), respeta
+Idempotency-Key en las escrituras y el login pasa por el pool acotado y el limitador de
+contrasenas.py. No tiene /api/eventos: sus escrituras quedan en el registro de cambios y
+los workers de API.py las publican por SSE en su siguiente ronda (SSE_POLL_SECONDS).
+
+    pip install quart aiomysql uvicorn
+    uvicorn asgi_app:app --host 127.0.0.1 --port 5000
+"""
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+
+import aiomysql
+import jwt
+from quart import Quart, g, jsonify, request
+
+import cambios
+import config
+import consultas
+import contrasenas
+import resumen
+import serializacion
+from auth import TokenInvalido, VerificadorTokens
+from config import db_config
+
+app = Quart(__name__)
+app.json = serializacion.ProveedorJSON(app)
+app.config['SECRET_KEY'] = config.SECRET_KEY
+
+
+@app.after_request
+async def add_cors_headers(response):
+    origin = request.headers.get('Origin')
+    response.headers['Access-Control-Allow-Origin'] = origin or 'http://localhost:3000'
+    response.headers['Access-Control-Allow-Credentials'] = 'true'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Origin, Content-Type, Accept, Authorization, X-Request-With, If-None-Match, Idempotency-Key'
+    response.headers['Access-Control-Expose-Headers'] = '*, X-Next-Cursor, ETag'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Max-Age'] = '1728000'
+        response.headers['Content-Type'] = 'text/plain'
+    return response
+
+
+@app.before_serving
+async def crear_pool():
+    app.db_pool = await aiomysql.create_pool(
+        host=db_config['host'],
+        port=int(db_config['port']),
+        user=db_config['user'],
+        password=db_config['password'],
+        db=db_config['database'],
+        maxsize=config.DB_POOL_SIZE,
+        pool_recycle=int(config.DB_POOL_RECYCLE),
+        autocommit=False,
+    )
+
+
+@app.after_serving
+async def cerrar_pool():
+    app.db_pool.close()
+    await app.db_pool.wait_closed()
+
+
+async def consultar(sql, valores=(), uno=False):
+    async with app.db_pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, valores)
+            resultado = await cursor.fetchone() if uno else await cursor.fetchall()
+        # Cerrar la transacción implícita de la lectura antes de devolver la conexión
+        await connection.rollback()
+        return resultado
+
+
+@asynccontextmanager
+async def transaccion():
+    # Cursor dentro de una transacción: commit al salir, rollback si hay excepción
+    async with app.db_pool.acquire() as connection:
+        await connection.begin()
+        try:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                yield cursor
+            await connection.commit()
+        except BaseException:
+            await connection.rollback()
+            raise
+
+
+async def ejecutar(cursor, sentencias):
+    for sql, valores in sentencias:
+        await cursor.execute(sql, valores)
+
+
+async def incrementar_version(cursor, tabla):
+    await cursor.execute(consultas.SQL_INCREMENTAR_VERSION, (tabla,))
+
+
+async def registrar_cambio(cursor, tabla, operacion, fila_id):
+    # Registro de cambios de GET /api/changes (la tabla la crea la migración 0007)
+    await cursor.execute(cambios.SQL_REGISTRAR, (tabla, fila_id, operacion))
+
+
+# Autenticación: igual que en API.py, se verifica el token si viene y, con AUTH_REQUIRED, se exige
+verificador_tokens = VerificadorTokens(
+    app.config['SECRET_KEY'],
+    max_entradas=config.AUTH_CACHE_SIZE,
+    ttl_maximo=config.AUTH_CACHE_TTL
+)
+RUTAS_PUBLICAS = ('/api/auth/', '/health/')
+
+
+@app.before_request
+async def verificar_autenticacion():
+    if request.method == 'OPTIONS' or request.path.startswith(RUTAS_PUBLICAS):
+        return None
+    tipo, _, token = request.headers.get('Authorization', '').partition(' ')
+    if tipo.lower() != 'bearer' or not token:
+        if config.AUTH_REQUIRED:
+            return jsonify({"message": "Token requerido"}), 401
+        return None
+    try:
+        payload = verificador_tokens.verificar(token.strip())
+    except TokenInvalido:
+        return jsonify({"message": "Token inválido o expirado"}), 401
+    g.usuario_id = payload.get('user_id')
+    return None
+
+
+# Idempotency-Key en escrituras, con la misma tabla (migración 0004) y reglas que API.py
+IDEMPOTENCIA_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+IDEMPOTENCIA_PURGA = 300
+_ultima_purga_idempotencia = 0.0
+
+
+async def reservar_idempotencia(clave, ruta, huella):
+    """Reserva la clave y devuelve None, o devuelve la fila existente (vigente) de un request anterior."""
+    global _ultima_purga_idempotencia
+    async with app.db_pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            try:
+                if time.monotonic() - _ultima_purga_idempotencia >= IDEMPOTENCIA_PURGA:
+                    _ultima_purga_idempotencia = time.monotonic()
+                    await cursor.execute("DELETE FROM idempotencia WHERE expira < NOW() LIMIT 1000")
+                    await connection.commit()
+                for _ in range(3):
+                    try:
+                        await cursor.execute("""
+                            INSERT INTO idempotencia (clave, ruta, huella, expira)
+                            VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+                        """, (clave, ruta, huella, IDEMPOTENCIA_TTL))
+                        await connection.commit()
+                        return None
+                    except aiomysql.IntegrityError as e:
+                        await connection.rollback()
+                        if e.args[0] != 1062:
+                            raise
+                    await cursor.execute("""
+                        SELECT huella, estado, cuerpo, expira < NOW() AS expirada
+                        FROM idempotencia WHERE clave = %s AND ruta = %s
+                    """, (clave, ruta))
+                    fila = await cursor.fetchone()
+                    if fila and not fila['expirada']:
+                        return fila
+                    # Clave vencida (o borrada entre medio): se libera y se vuelve a intentar
+                    await cursor.execute("DELETE FROM idempotencia WHERE clave = %s AND ruta = %s AND expira < NOW()",
+                                         (clave, ruta))
+                    await connection.commit()
+                raise aiomysql.Error("No se pudo reservar la Idempotency-Key")
+            finally:
+                await connection.rollback()
+
+
+async def cerrar_idempotencia(clave, ruta, response=None):
+    # Con response se guarda el resultado; sin ella se libera la clave para que el cliente reintente
+    try:
+        async with transaccion() as cursor:
+            if response is None:
+                await cursor.execute("DELETE FROM idempotencia WHERE clave = %s AND ruta = %s", (clave, ruta))
+            else:
+                await cursor.execute("UPDATE idempotencia SET estado = %s, cuerpo = %s WHERE clave = %s AND ruta = %s",
+                                     (response.status_code, await response.get_data(), clave, ruta))
+    except aiomysql.Error as e:
+        print(f"No se pudo actualizar la Idempotency-Key {clave}: {e}")
+
+
+def con_idempotencia(vista):
+    """Aplica el encabezado Idempotency-Key (opcional) a una ruta de escritura."""
+    @wraps(vista)
+    async def envoltura(*args, **kwargs):
+        clave = request.headers.get('Idempotency-Key')
+        if not clave:
+            return await vista(*args, **kwargs)
+        if len(clave) > 255:
+            return jsonify({"error": "Idempotency-Key demasiado larga"}), 400
+
+        ruta = f"{request.method} {request.path}"
+        huella = hashlib.sha1(await request.get_data()).hexdigest()
+        try:
+            previa = await reservar_idempotencia(clave, ruta, huella)
+        except aiomysql.Error as e:
+            return jsonify({"error": str(e)}), 500
+
+        if previa is not None:
+            if previa['huella'] != huella:
+                return jsonify({"error": "La Idempotency-Key ya se usó con otro contenido"}), 422
+            if previa['estado'] is None:
+                response = jsonify({"error": "Hay un request con la misma Idempotency-Key en proceso"})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            response = app.response_class(previa['cuerpo'], status=previa['estado'], mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = await app.make_response(await vista(*args, **kwargs))
+        except Exception:
+            await cerrar_idempotencia(clave, ruta)
+            raise
+        # Los errores del servidor no se guardan: el reintento debe poder ejecutarse
+        await cerrar_idempotencia(clave, ruta, response if response.status_code < 500 else None)
+        return response
+    return envoltura
+
+
+# Intentos de login por usuario e IP (LOGIN_MAX_ATTEMPTS cada LOGIN_WINDOW segundos)
+limitador_login = contrasenas.LimitadorIntentos(
+    maximo=int(os.environ.get('LOGIN_MAX_ATTEMPTS', 5)),
+    ventana=float(os.environ.get('LOGIN_WINDOW', 60))
+)
+
+
+def servidor_ocupado():
+    response = jsonify({"message": "Servidor ocupado, intente de nuevo"})
+    response.headers['Retry-After'] = '2'
+    return response, 503
+
+
+@app.route('/health/live', methods=['GET'])
+async def health_live():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+
+@app.route('/health/ready', methods=['GET'])
+async def health_ready():
+    try:
+        await consultar("SELECT 1")
+        return jsonify({"status": "ok", "pid": os.getpid()})
+    except aiomysql.Error as e:
+        return jsonify({"status": "error", "detalle": str(e)}), 503
+
+
+# Rutas de autenticación
+@app.route('/api/auth/register', methods=['POST'])
+async def register():
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['username', 'password', 'email']):
+            return jsonify({"message": "Datos incompletos"}), 400
+
+        hashed_password = await contrasenas.generar_async(data['password'])
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT id FROM usuarios WHERE username = %s", (data['username'],))
+            if await cursor.fetchone():
+                return jsonify({"message": "El usuario ya existe"}), 400
+            await cursor.execute("INSERT INTO usuarios (username, password, email) VALUES (%s, %s, %s)",
+                                 (data['username'], hashed_password, data['email']))
+        return jsonify({"message": "Usuario registrado exitosamente"}), 201
+    except contrasenas.LoginSaturado:
+        return servidor_ocupado()
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/auth/login', methods=['POST'])
+async def login():
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['username', 'password']):
+            return jsonify({"message": "Datos incompletos"}), 400
+
+        clave_intentos = (data['username'], request.remote_addr)
+        espera = limitador_login.permitir(clave_intentos)
+        if espera:
+            response = jsonify({"message": "Demasiados intentos, intente más tarde"})
+            response.headers['Retry-After'] = str(int(espera) + 1)
+            return response, 429
+
+        user = await consultar("SELECT * FROM usuarios WHERE username = %s", (data['username'],), uno=True)
+        if user and await contrasenas.verificar_async(user['password'], data['password']):
+            limitador_login.reiniciar(clave_intentos)
+            if contrasenas.necesita_rehash(user['password']):
+                await actualizar_hash(user, data['password'])
+            token = jwt.encode({
+                'user_id': user['id'],
+                'exp': datetime.utcnow() + timedelta(days=1)
+            }, app.config['SECRET_KEY'])
+            return jsonify({
+                "token": token,
+                "user": {
+                    "id": user['id'],
+                    "username": user['username']
+                }
+            })
+        return jsonify({"message": "Credenciales inválidas"}), 401
+    except contrasenas.LoginSaturado:
+        return servidor_ocupado()
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+async def actualizar_hash(user, password):
+    # Guarda el hash con el método configurado; si falla, el login sigue siendo válido
+    try:
+        nuevo = await contrasenas.generar_async(password)
+        async with transaccion() as cursor:
+            # La condición sobre el hash viejo evita pisar un cambio de contraseña concurrente
+            await cursor.execute("UPDATE usuarios SET password = %s WHERE id = %s AND password = %s",
+                                 (nuevo, user['id'], user['password']))
+    except (aiomysql.Error, contrasenas.LoginSaturado) as e:
+        print(f"No se pudo actualizar el hash del usuario {user['id']}: {e}")
+
+
+# Rutas de empleados y fincas (mismo patrón CRUD)
+def rutas_catalogo(tabla, campos, singular, femenino=False):
+    creado = "creada" if femenino else "creado"
+    actualizado = "actualizada" if femenino else "actualizado"
+    eliminado = "eliminada" if femenino else "eliminado"
+    columnas = ", ".join(campos)
+    marcadores = ", ".join(["%s"] * len(campos))
+    asignaciones = ", ".join(f"{c} = %s" for c in campos)
+
+    async def listar():
+        try:
+            return jsonify(await consultar(f"SELECT * FROM {tabla}"))
+        except aiomysql.Error as e:
+            return jsonify({"error": str(e)}), 500
+
+    async def crear():
+        try:
+            data = await request.get_json()
+            if not data or not all(k in data for k in campos):
+                return jsonify({"message": "Datos incompletos"}), 400
+            async with transaccion() as cursor:
+                await cursor.execute(f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})",
+                                     tuple(data[c] for c in campos))
+                new_id = cursor.lastrowid
+                await incrementar_version(cursor, tabla)
+                await registrar_cambio(cursor, tabla, 'I', new_id)
+            return jsonify({"id": new_id, "message": f"{singular} {creado} exitosamente"}), 201
+        except aiomysql.Error as e:
+            return jsonify({"error": str(e)}), 500
+
+    async def actualizar(id):
+        try:
+            data = await request.get_json()
+            if not data or not all(k in data for k in campos):
+                return jsonify({"message": "Datos incompletos"}), 400
+            async with transaccion() as cursor:
+                await cursor.execute(f"UPDATE {tabla} SET {asignaciones} WHERE id = %s",
+                                     tuple(data[c] for c in campos) + (id,))
+                if cursor.rowcount:
+                    await registrar_cambio(cursor, tabla, 'U', id)
+                await incrementar_version(cursor, tabla)
+            return jsonify({"message": f"{singular} {actualizado} exitosamente"}), 200
+        except aiomysql.Error as e:
+            return jsonify({"error": str(e)}), 500
+
+    async def eliminar(id):
+        try:
+            async with transaccion() as cursor:
+                await cursor.execute(f"DELETE FROM {tabla} WHERE id = %s", (id,))
+                if cursor.rowcount:
+                    await registrar_cambio(cursor, tabla, 'D', id)
+                await incrementar_version(cursor, tabla)
+            return jsonify({"message": f"{singular} {eliminado} exitosamente"}), 200
+        except aiomysql.Error as e:
+            return jsonify({"error": str(e)}), 500
+
+    base = f'/api/{tabla}'
+    app.add_url_rule(base, f'get_{tabla}', listar, methods=['GET'])
+    app.add_url_rule(base, f'create_{tabla}', crear, methods=['POST'])
+    app.add_url_rule(f'{base}/<int:id>', f'update_{tabla}', actualizar, methods=['PUT'])
+    app.add_url_rule(f'{base}/<int:id>', f'delete_{tabla}', eliminar, methods=['DELETE'])
+
+
+rutas_catalogo('empleados', ['nombre', 'cedula', 'telefono'], 'Empleado')
+rutas_catalogo('fincas', ['nombre', 'ubicacion'], 'Finca', femenino=True)
+
+
+# Asignaciones
+@app.route('/api/asignaciones', methods=['GET'])
+async def get_asignaciones():
+    try:
+        formato = consultas.formato_lista(request.args)
+        asignaciones = await consultar(consultas.SQL_ASIGNACIONES)
+        if formato == 'columnar':
+            return jsonify(consultas.formatear_columnar(asignaciones, consultas.COLUMNAR_ASIGNACIONES))
+        return jsonify([consultas.formatear_asignacion(a) for a in asignaciones])
+    except consultas.ParametroInvalido as e:
+        return jsonify(e.cuerpo), 400
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/asignaciones', methods=['POST'])
+@con_idempotencia
+async def create_asignacion():
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['empleado_id', 'finca_id']):
+            return jsonify({"message": "Datos incompletos"}), 400
+        async with transaccion() as cursor:
+            await cursor.execute("""
+                INSERT INTO asignaciones
+                (empleado_id, finca_id, fecha_asignacion, descripcion)
+                VALUES (%s, %s, %s, %s)
+            """, (
+                data['empleado_id'],
+                data['finca_id'],
+                data.get('fecha_asignacion', datetime.now().strftime('%Y-%m-%d')),
+                data.get('descripcion', '')
+            ))
+            new_id = cursor.lastrowid
+            await incrementar_version(cursor, 'asignaciones')
+            await registrar_cambio(cursor, 'asignaciones', 'I', new_id)
+        return jsonify({
+            "id": new_id,
+            "message": "Asignación creada exitosamente",
+            "descripcion": data.get('descripcion', '')
+        }), 201
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/asignaciones/<int:id>', methods=['PUT'])
+@con_idempotencia
+async def update_asignacion(id):
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['empleado_id', 'finca_id', 'fecha_asignacion']):
+            return jsonify({"message": "Datos incompletos"}), 400
+
+        empleado_id = int(data['empleado_id'])
+        finca_id = int(data['finca_id'])
+        fecha_asignacion = data['fecha_asignacion']
+        descripcion = data.get('descripcion', '')
+
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT id FROM asignaciones WHERE id = %s", (id,))
+            if not await cursor.fetchone():
+                return jsonify({"message": "Asignación no encontrada"}), 404
+            await cursor.execute("""
+                UPDATE asignaciones
+                SET empleado_id = %s,
+                    finca_id = %s,
+                    fecha_asignacion = %s,
+                    descripcion = %s
+                WHERE id = %s
+            """, (empleado_id, finca_id, fecha_asignacion, descripcion, id))
+            actualizadas = cursor.rowcount
+            if actualizadas:
+                await incrementar_version(cursor, 'asignaciones')
+                await registrar_cambio(cursor, 'asignaciones', 'U', id)
+
+        if actualizadas > 0:
+            return jsonify({
+                "message": "Asignación actualizada exitosamente",
+                "id": id,
+                "empleado_id": empleado_id,
+                "finca_id": finca_id,
+                "fecha_asignacion": fecha_asignacion,
+                "descripcion": descripcion
+            }), 200
+        return jsonify({"message": "Asignación no encontrada"}), 404
+    except ValueError:
+        return jsonify({"error": "Error en el formato de los datos"}), 400
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        print("Error general:", str(e))
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+# Pagos
+@app.route('/api/pagos', methods=['GET'])
+async def get_pagos():
+    try:
+        try:
+            query, valores, limite = consultas.consulta_pagos(request.args)
+            formato = consultas.formato_lista(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+
+        pagos, siguiente_cursor = consultas.paginar_pagos(await consultar(query, valores), limite)
+        if formato == 'columnar':
+            response = jsonify(consultas.formatear_columnar(pagos, consultas.COLUMNAR_PAGOS))
+        else:
+            response = jsonify([consultas.formatear_pago(p) for p in pagos])
+        if siguiente_cursor:
+            response.headers['X-Next-Cursor'] = siguiente_cursor
+        return response, 200
+    except Exception as e:
+        print(f"Error en get_pagos: {str(e)}")
+        return jsonify({"error": "Error al obtener los pagos", "detalle": str(e)}), 500
+
+
+@app.route('/api/pagos/por-periodo', methods=['GET'])
+async def get_pagos_por_periodo():
+    try:
+        try:
+            query, valores, periodo, por_empleado = consultas.consulta_pagos_por_periodo(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+        filas = await consultar(query, valores)
+        return jsonify([consultas.formatear_periodo(f, periodo, por_empleado) for f in filas]), 200
+    except Exception as e:
+        print(f"Error en get_pagos_por_periodo: {str(e)}")
+        return jsonify({"error": "Error al obtener los pagos por período", "detalle": str(e)}), 500
+
+
+@app.route('/api/pagos', methods=['POST'])
+@con_idempotencia
+async def create_pago():
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['empleado_id', 'libras', 'precio_libra']):
+            return jsonify({"error": "Datos incompletos",
+                            "campos_requeridos": ["empleado_id", "libras", "precio_libra"]}), 400
+        try:
+            libras = float(data['libras'])
+            precio_libra = float(data['precio_libra'])
+            empleado_id = int(data['empleado_id'])
+        except ValueError as e:
+            return jsonify({"error": "Datos inválidos", "detalle": str(e)}), 400
+
+        total = libras * precio_libra
+        fecha_pago = datetime.now().strftime("%Y-%m-%d")
+
+        async with transaccion() as cursor:
+            await cursor.execute("""
+                INSERT INTO pagos
+                    (empleados_id, libras_totales, precio_libra_promedio, total, fecha_pago)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (empleado_id, libras, precio_libra, total, fecha_pago))
+            new_id = cursor.lastrowid
+            await ejecutar(cursor, resumen.sentencias_pago(empleado_id, fecha_pago, libras, total))
+            await incrementar_version(cursor, 'pagos')
+            await registrar_cambio(cursor, 'pagos', 'I', new_id)
+        return jsonify(consultas.formatear_pago_creado(new_id, empleado_id, fecha_pago,
+                                                       libras, precio_libra, total)), 201
+    except Exception as e:
+        print(f"Error en create_pago: {str(e)}")
+        return jsonify({"error": "Error al crear el pago", "detalle": str(e)}), 500
+
+
+@app.route('/api/pagos/<int:id>', methods=['PUT'])
+@con_idempotencia
+async def update_pago(id):
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in ['empleado_id', 'libras', 'precio_libra']):
+            return jsonify({"message": "Datos incompletos"}), 400
+
+        total = float(data['libras']) * float(data['precio_libra'])
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT * FROM pagos WHERE id = %s FOR UPDATE", (id,))
+            anterior = await cursor.fetchone()
+            if not anterior:
+                return jsonify({"message": "Pago no encontrado"}), 404
+            await cursor.execute(
+                "UPDATE pagos SET empleados_id = %s, libras_totales = %s, precio_libra_promedio = %s, total = %s WHERE id = %s",
+                (data['empleado_id'], data['libras'], data['precio_libra'], total, id))
+            await ejecutar(cursor, resumen.sentencias_pago(anterior['empleados_id'], anterior['fecha_pago'],
+                                                           anterior['libras_totales'], anterior['total'], signo=-1))
+            await ejecutar(cursor, resumen.sentencias_pago(data['empleado_id'], anterior['fecha_pago'],
+                                                           data['libras'], total))
+            await incrementar_version(cursor, 'pagos')
+            await registrar_cambio(cursor, 'pagos', 'U', id)
+        return jsonify({"message": "Pago actualizado exitosamente"}), 200
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/pagos/<int:id>', methods=['DELETE'])
+@con_idempotencia
+async def delete_pago(id):
+    try:
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT * FROM pagos WHERE id = %s FOR UPDATE", (id,))
+            anterior = await cursor.fetchone()
+            if not anterior:
+                return jsonify({"message": "Pago no encontrado"}), 404
+            await cursor.execute("DELETE FROM pagos WHERE id = %s", (id,))
+            # Las jornadas que cubría este pago vuelven a quedar pendientes de liquidar
+            if anterior.get('liquidacion_id') is not None:
+                await cursor.execute("UPDATE jornadas SET pago_id = NULL WHERE pago_id = %s", (id,))
+            await ejecutar(cursor, resumen.sentencias_pago(anterior['empleados_id'], anterior['fecha_pago'],
+                                                           anterior['libras_totales'], anterior['total'], signo=-1))
+            await incrementar_version(cursor, 'pagos')
+            await registrar_cambio(cursor, 'pagos', 'D', id)
+        return jsonify({"message": "Pago eliminado exitosamente"}), 200
+    except aiomysql.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Jornadas
+CAMPOS_JORNADA = ['empleados_id', 'fincas_id', 'fecha', 'libras_recolectadas', 'precio_libra']
+
+
+@app.route('/api/jornadas', methods=['GET'])
+async def get_jornadas():
+    try:
+        formato = consultas.formato_lista(request.args)
+        jornadas = await consultar(consultas.SQL_JORNADAS)
+        if formato == 'columnar':
+            return jsonify(consultas.formatear_columnar(jornadas, consultas.COLUMNAR_JORNADAS)), 200
+        return jsonify([consultas.formatear_jornada(j) for j in jornadas]), 200
+    except consultas.ParametroInvalido as e:
+        return jsonify(e.cuerpo), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jornadas/reporte', methods=['GET'])
+async def get_jornadas_reporte():
+    try:
+        try:
+            query, valores, agrupar = consultas.consulta_reporte_jornadas(request.args)
+        except consultas.ParametroInvalido as e:
+            return jsonify(e.cuerpo), 400
+        filas = await consultar(query, valores)
+        return jsonify([consultas.formatear_reporte(f, agrupar) for f in filas]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jornadas', methods=['POST'])
+@con_idempotencia
+async def create_jornada():
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in CAMPOS_JORNADA):
+            return jsonify({"error": "Datos incompletos"}), 400
+        async with transaccion() as cursor:
+            await cursor.execute("""
+            INSERT INTO jornadas (empleados_id, fincas_id, fecha, libras_recolectadas, precio_libra)
+            VALUES (%s, %s, %s, %s, %s)
+            """, tuple(data[c] for c in CAMPOS_JORNADA))
+            new_id = cursor.lastrowid
+            await ejecutar(cursor, resumen.sentencias_jornada(*(data[c] for c in CAMPOS_JORNADA)))
+            await incrementar_version(cursor, 'jornadas')
+            await registrar_cambio(cursor, 'jornadas', 'I', new_id)
+        return jsonify({"id": new_id, "message": "Jornada creada exitosamente"}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jornadas/<int:id>', methods=['PUT'])
+@con_idempotencia
+async def update_jornada(id):
+    try:
+        data = await request.get_json()
+        if not data or not all(k in data for k in CAMPOS_JORNADA):
+            return jsonify({"error": "Datos incompletos"}), 400
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT * FROM jornadas WHERE id = %s FOR UPDATE", (id,))
+            anterior = await cursor.fetchone()
+            if not anterior:
+                return jsonify({"error": "Jornada no encontrada"}), 404
+            if anterior.get('pago_id'):
+                return jsonify(consultas.jornada_liquidada(anterior)), 409
+            await cursor.execute("""
+            UPDATE jornadas
+            SET empleados_id = %s, fincas_id = %s, fecha = %s, libras_recolectadas = %s, precio_libra = %s
+            WHERE id = %s
+            """, tuple(data[c] for c in CAMPOS_JORNADA) + (id,))
+            await ejecutar(cursor, resumen.sentencias_jornada(*(anterior[c] for c in CAMPOS_JORNADA), signo=-1))
+            await ejecutar(cursor, resumen.sentencias_jornada(*(data[c] for c in CAMPOS_JORNADA)))
+            await incrementar_version(cursor, 'jornadas')
+            await registrar_cambio(cursor, 'jornadas', 'U', id)
+        return jsonify({"message": "Jornada actualizada"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jornadas/<int:id>', methods=['DELETE'])
+@con_idempotencia
+async def delete_jornada(id):
+    try:
+        async with transaccion() as cursor:
+            await cursor.execute("SELECT * FROM jornadas WHERE id = %s FOR UPDATE", (id,))
+            anterior = await cursor.fetchone()
+            if not anterior:
+                return jsonify({"error": "Jornada no encontrada"}), 404
+            if anterior.get('pago_id'):
+                return jsonify(consultas.jornada_liquidada(anterior)), 409
+            await cursor.execute("DELETE FROM jornadas WHERE id = %s", (id,))
+            await ejecutar(cursor, resumen.sentencias_jornada(*(anterior[c] for c in CAMPOS_JORNADA), signo=-1))
+            await incrementar_version(cursor, 'jornadas')
+            await registrar_cambio(cursor, 'jornadas', 'D', id)
+        return jsonify({"message": "Jornada eliminada"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,45 @@
+"""Verificación de los JWT emitidos por /api/auth/login.
+
+Los tokens ya validados se guardan en un cache LRU indexado por la firma, con vida
+hasta su propio 'exp', así la mayoría de los requests no repite el decode ni la
+verificación HMAC.
+"""
+import hmac
+import time
+
+import jwt
+
+from cache import CacheTTL
+
+
+class TokenInvalido(Exception):
+    pass
+
+
+class VerificadorTokens:
+    def __init__(self, secreto, max_entradas=1024, ttl_maximo=300, algoritmo='HS256'):
+        self.secreto = secreto
+        self.algoritmo = algoritmo
+        self.ttl_maximo = ttl_maximo
+        self._cache = CacheTTL(max_entradas=max_entradas, ttl=ttl_maximo)
+
+    def verificar(self, token):
+        """Devuelve el payload del token o lanza TokenInvalido."""
+        firma = token.rpartition('.')[2]
+        entrada = self._cache.get(firma)
+        # La firma identifica al token, pero se compara completo por si alguien reusa la firma
+        if entrada is not None and hmac.compare_digest(entrada[0], token):
+            return entrada[1]
+
+        try:
+            payload = jwt.decode(token, self.secreto, algorithms=[self.algoritmo])
+        except jwt.InvalidTokenError as e:
+            raise TokenInvalido(str(e))
+
+        restante = payload.get('exp', time.time() + self.ttl_maximo) - time.time()
+        if restante > 0:
+            self._cache.set(firma, (token, payload), ttl=min(restante, self.ttl_maximo))
+        return payload
+
+    def estadisticas(self):
+        return self._cache.estadisticas()
@@ -0,0 +1,215 @@
+"""Prueba de carga de la API: latencia p50/p95/p99, throughput y RSS pico por ruta.
+
+Uso:
+    python bench/run.py --iniciar-servidor --salida bench/resultados/base.json
+    python bench/run.py --url http://127.0.0.1:5000 --pid 1234 --comparar bench/resultados/base.json
+
+Con --iniciar-servidor se levanta API.py en un subproceso (usa las mismas variables DB_*),
+así se conoce su PID para medir la memoria. Solo usa la biblioteca estándar.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUTAS = [
+    "/api/empleados",
+    "/api/fincas",
+    "/api/asignaciones",
+    "/api/pagos?limite=100",
+    "/api/pagos/por-periodo?periodo=mes",
+    "/api/pagos/por-periodo?periodo=semana&por_empleado=1",
+    "/api/jornadas/reporte?agrupar=finca",
+    "/api/jornadas/reporte?agrupar=empleado",
+]
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as archivo:
+            for linea in archivo:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def pedir(url, timeout):
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+            cuerpo = respuesta.read()
+            return time.perf_counter() - inicio, respuesta.status, len(cuerpo)
+    except urllib.error.HTTPError as e:
+        return time.perf_counter() - inicio, e.code, 0
+    except (urllib.error.URLError, OSError):
+        return time.perf_counter() - inicio, 0, 0
+
+
+def medir_ruta(base, ruta, concurrencia, duracion, calentamiento, timeout, pid):
+    url = base + ruta
+    for _ in range(calentamiento):
+        pedir(url, timeout)
+
+    latencias = []
+    errores = 0
+    bytes_totales = 0
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+    rss_pico = [rss_mb(pid) if pid else None]
+    midiendo = threading.Event()
+
+    def cliente():
+        nonlocal errores, bytes_totales
+        while time.perf_counter() < fin:
+            segundos, status, tamano = pedir(url, timeout)
+            with lock:
+                if 200 <= status < 400:
+                    latencias.append(segundos)
+                    bytes_totales += tamano
+                else:
+                    errores += 1
+
+    def muestrear_memoria():
+        while not midiendo.wait(0.05):
+            actual = rss_mb(pid)
+            if actual is not None and (rss_pico[0] is None or actual > rss_pico[0]):
+                rss_pico[0] = actual
+
+    if pid:
+        muestreador = threading.Thread(target=muestrear_memoria, daemon=True)
+        muestreador.start()
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    midiendo.set()
+
+    ms = [s * 1000 for s in latencias]
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "p50_ms": percentil(ms, 50),
+        "p95_ms": percentil(ms, 95),
+        "p99_ms": percentil(ms, 99),
+        "max_ms": max(ms) if ms else None,
+        "rps": len(latencias) / transcurrido if transcurrido else 0,
+        "bytes_promedio": bytes_totales / len(latencias) if latencias else 0,
+        "rss_pico_mb": rss_pico[0],
+    }
+
+
+def iniciar_servidor(host, puerto):
+    codigo = f"import API; API.app.run(host={host!r}, port={puerto}, threaded=True, debug=False)"
+    proceso = subprocess.Popen([sys.executable, "-c", codigo], cwd=RAIZ)
+    base = f"http://{host}:{puerto}"
+    for _ in range(100):
+        if proceso.poll() is not None:
+            raise RuntimeError("El servidor terminó al iniciar")
+        try:
+            urllib.request.urlopen(base + "/metrics", timeout=1).read()
+            return proceso, base
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=RAIZ, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, base):
+    print(f"\n{'ruta':55} {'métrica':8} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for ruta, datos in actual["rutas"].items():
+        anterior = base.get("rutas", {}).get(ruta)
+        if not anterior:
+            continue
+        for metrica in ("p50_ms", "p95_ms", "p99_ms", "rps", "rss_pico_mb"):
+            a, b = anterior.get(metrica), datos.get(metrica)
+            if a is None or b is None:
+                continue
+            cambio = f"{(b - a) / a * 100:+.1f}%" if a else "-"
+            print(f"{ruta:55} {metrica:8} {a:10.2f} {b:10.2f} {cambio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default="http://127.0.0.1:5000")
+    parser.add_argument('--iniciar-servidor', action='store_true')
+    parser.add_argument('--puerto', type=int, default=5055, help="Puerto del servidor con --iniciar-servidor")
+    parser.add_argument('--pid', type=int, help="PID del servidor para medir RSS (si no se inicia aquí)")
+    parser.add_argument('--rutas', nargs='*', default=RUTAS)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--duracion', type=float, default=15, help="Segundos de carga por ruta")
+    parser.add_argument('--calentamiento', type=int, default=5, help="Peticiones previas no medidas")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--salida', help="Archivo JSON de resultados")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    proceso = None
+    base, pid = args.url, args.pid
+    if args.iniciar_servidor:
+        proceso, base = iniciar_servidor("127.0.0.1", args.puerto)
+        pid = proceso.pid
+
+    try:
+        resultados = {}
+        for ruta in args.rutas:
+            datos = medir_ruta(base, ruta, args.concurrencia, args.duracion, args.calentamiento, args.timeout, pid)
+            resultados[ruta] = datos
+            print(f"{ruta:55} p50={datos['p50_ms'] or 0:8.1f}ms p95={datos['p95_ms'] or 0:8.1f}ms "
+                  f"p99={datos['p99_ms'] or 0:8.1f}ms rps={datos['rps']:8.1f} errores={datos['errores']}")
+    finally:
+        if proceso:
+            proceso.terminate()
+            proceso.wait()
+
+    salida = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "parametros": {
+            "concurrencia": args.concurrencia,
+            "duracion": args.duracion,
+            "calentamiento": args.calentamiento,
+        },
+        "rutas": resultados,
+    }
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(salida, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(salida, json.load(archivo))
+
+
+if __name__ == '__main__':
+    main()
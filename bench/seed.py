@@ -0,0 +1,147 @@
+"""Llena una base MySQL local con volúmenes realistas para el benchmark.
+
+Uso (con las variables DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT apuntando a la base local):
+    python bench/seed.py                 # 5k empleados, 200 fincas, 2M jornadas
+    python bench/seed.py --escala 0.05   # 5% del volumen, para pruebas rápidas
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import mysql.connector  # noqa: E402
+
+import migrar  # noqa: E402
+import resumen  # noqa: E402
+
+NOMBRES = ["José", "María", "Juan", "Ana", "Luis", "Carmen", "Carlos", "Rosa", "Pedro", "Marta",
+           "Miguel", "Elena", "Jorge", "Lucía", "Mario", "Sofía", "Óscar", "Julia", "Raúl", "Teresa"]
+APELLIDOS = ["López", "García", "Pérez", "Hernández", "Morales", "Castillo", "Ramírez", "Cruz",
+             "Méndez", "Díaz", "Reyes", "Gómez", "Ortiz", "Ajú", "Xicará", "Tzul", "Coc", "Chub"]
+LUGARES = ["Antigua Guatemala", "Cobán", "Huehuetenango", "Atitlán", "San Marcos", "Fraijanes",
+           "Nuevo Oriente", "Acatenango", "Jalapa", "Santa Rosa"]
+
+VOLUMENES = {
+    "empleados": 5000,
+    "fincas": 200,
+    "asignaciones": 20000,
+    "jornadas": 2000000,
+    "pagos": 200000,
+}
+
+
+def conectar():
+    return mysql.connector.connect(
+        host=os.environ.get('DB_HOST', '127.0.0.1'),
+        database=os.environ.get('DB_NAME', 'cafe_bench'),
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        port=os.environ.get('DB_PORT', '3306'),
+    )
+
+
+def fecha_cosecha(rng, temporadas):
+    # La cosecha va de octubre a marzo; se reparten las fechas en las últimas temporadas
+    inicio = date(date.today().year - rng.randint(1, temporadas), 10, 1)
+    return inicio + timedelta(days=rng.randint(0, 181))
+
+
+def insertar(connection, query, filas, lote, etiqueta):
+    cursor = connection.cursor()
+    inicio = time.perf_counter()
+    total = 0
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= lote:
+            cursor.executemany(query, bloque)
+            connection.commit()
+            total += len(bloque)
+            bloque = []
+    if bloque:
+        cursor.executemany(query, bloque)
+        connection.commit()
+        total += len(bloque)
+    cursor.close()
+    print(f"{etiqueta}: {total} filas en {time.perf_counter() - inicio:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=float, default=1.0, help="Fracción de los volúmenes por defecto")
+    parser.add_argument('--lote', type=int, default=5000, help="Filas por INSERT")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--temporadas', type=int, default=5)
+    parser.add_argument('--vaciar', action='store_true', help="Vaciar las tablas antes de insertar")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    volumen = {tabla: max(1, int(cantidad * args.escala)) for tabla, cantidad in VOLUMENES.items()}
+    connection = conectar()
+    migrar.aplicar(connection)
+
+    if args.vaciar:
+        cursor = connection.cursor()
+        for tabla in ['jornadas', 'pagos', 'asignaciones', 'fincas', 'empleados']:
+            cursor.execute(f"TRUNCATE TABLE {tabla}")
+        connection.commit()
+        cursor.close()
+
+    insertar(connection, "INSERT INTO empleados (nombre, cedula, telefono) VALUES (%s, %s, %s)", (
+        (f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}",
+         str(rng.randint(10 ** 12, 10 ** 13 - 1)),
+         str(rng.randint(30000000, 59999999)))
+        for _ in range(volumen["empleados"])
+    ), args.lote, "empleados")
+
+    insertar(connection, "INSERT INTO fincas (nombre, ubicacion) VALUES (%s, %s)", (
+        (f"Finca {rng.choice(APELLIDOS)} {i + 1}", rng.choice(LUGARES))
+        for i in range(volumen["fincas"])
+    ), args.lote, "fincas")
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT MIN(id), MAX(id) FROM empleados")
+    min_empleado, max_empleado = cursor.fetchone()
+    cursor.execute("SELECT MIN(id), MAX(id) FROM fincas")
+    min_finca, max_finca = cursor.fetchone()
+    cursor.close()
+
+    insertar(connection, """
+        INSERT INTO asignaciones (empleado_id, finca_id, fecha_asignacion, descripcion) VALUES (%s, %s, %s, %s)
+    """, (
+        (rng.randint(min_empleado, max_empleado), rng.randint(min_finca, max_finca),
+         fecha_cosecha(rng, args.temporadas), "Corte de café")
+        for _ in range(volumen["asignaciones"])
+    ), args.lote, "asignaciones")
+
+    insertar(connection, """
+        INSERT INTO jornadas (empleados_id, fincas_id, fecha, libras_recolectadas, precio_libra) VALUES (%s, %s, %s, %s, %s)
+    """, (
+        (rng.randint(min_empleado, max_empleado), rng.randint(min_finca, max_finca),
+         fecha_cosecha(rng, args.temporadas), round(rng.uniform(20, 220), 2), round(rng.uniform(0.8, 1.6), 2))
+        for _ in range(volumen["jornadas"])
+    ), args.lote, "jornadas")
+
+    def pago():
+        libras = round(rng.uniform(100, 1500), 2)
+        precio = round(rng.uniform(0.8, 1.6), 4)
+        return (rng.randint(min_empleado, max_empleado), libras, precio, round(libras * precio, 2),
+                fecha_cosecha(rng, args.temporadas))
+
+    insertar(connection, """
+        INSERT INTO pagos (empleados_id, libras_totales, precio_libra_promedio, total, fecha_pago) VALUES (%s, %s, %s, %s, %s)
+    """, (pago() for _ in range(volumen["pagos"])), args.lote, "pagos")
+
+    inicio = time.perf_counter()
+    resumen.reconstruir(connection)
+    print(f"resúmenes reconstruidos en {time.perf_counter() - inicio:.1f} s")
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
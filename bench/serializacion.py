@@ -0,0 +1,84 @@
+"""Microbenchmark del formateo y la serialización de listas grandes (CPU por fila).
+
+Compara el camino anterior (float/strftime por campo + json de la biblioteca estándar)
+con el actual (valores de MySQL tal cual + serializacion.dumps). No usa la base de datos.
+
+    python bench/serializacion.py --filas 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import consultas  # noqa: E402
+import serializacion  # noqa: E402
+
+
+def filas_jornadas(cantidad, rng):
+    inicio = date(2024, 10, 1)
+    return [{
+        "id": i,
+        "fecha": inicio + timedelta(days=rng.randint(0, 180)),
+        "libras_recolectadas": Decimal(f"{rng.uniform(20, 220):.2f}"),
+        "precio_libra": Decimal(f"{rng.uniform(0.8, 1.6):.2f}"),
+        "empleados_id": rng.randint(1, 5000),
+        "empleados_nombre": "María López García",
+        "empleados_cedula": "1234567890123",
+        "empleados_telefono": "45678901",
+        "fincas_id": rng.randint(1, 200),
+        "fincas_nombre": "Finca Cruz 17",
+    } for i in range(cantidad)]
+
+
+def formatear_anterior(jornada):
+    return {
+        "id": jornada["id"],
+        "fecha": jornada["fecha"].strftime("%Y-%m-%d"),
+        "libras_recolectadas": float(jornada["libras_recolectadas"]) if jornada["libras_recolectadas"] else 0.0,
+        "precio_libra": float(jornada["precio_libra"]) if jornada["precio_libra"] else 0.0,
+        "empleado": {
+            "id": jornada["empleados_id"],
+            "nombre": jornada["empleados_nombre"],
+            "dpi": jornada["empleados_cedula"],
+            "telefono": jornada["empleados_telefono"]
+        },
+        "finca": {
+            "id": jornada["fincas_id"],
+            "nombre": jornada["fincas_nombre"]
+        }
+    }
+
+
+def medir(nombre, funcion, filas, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        tamano = len(funcion(filas))
+        transcurrido = time.process_time() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    print(f"{nombre:40} {mejor * 1e6 / len(filas):8.2f} µs CPU/fila  {tamano / 1024:10.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    filas = filas_jornadas(args.filas, random.Random(42))
+    print(f"backend: {serializacion.BACKEND}")
+    medir("anterior (float/strftime + json)", lambda f: json.dumps([formatear_anterior(j) for j in f]).encode(),
+          filas, args.repeticiones)
+    medir("actual (serializacion.dumps)", lambda f: serializacion.dumps([consultas.formatear_jornada(j) for j in f]),
+          filas, args.repeticiones)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Índice en memoria para la búsqueda de empleados (typeahead).
+
+Busca por prefijo de cualquier palabra del nombre, sin importar mayúsculas ni tildes
+("lop" encuentra "María López"), o por cédula exacta. Las palabras se guardan en una lista
+ordenada, así un prefijo es un rango que se encuentra con bisect.
+
+Los handlers de empleados actualizan el índice del proceso después del commit. Para ver
+las escrituras de otros procesos, cada `revisar` segundos como máximo se compara la
+versión de la tabla (versiones_tablas) y, si cambió, se recarga completo.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def normalizar_cedula(cedula):
+    return re.sub(r'[\s-]', '', str(cedula or ''))
+
+
+class IndiceEmpleados:
+    def __init__(self, cargar, version, revisar=2.0):
+        # cargar() -> lista de filas de empleados; version() -> versión actual de la tabla
+        self._cargar = cargar
+        self._version = version
+        self.revisar = revisar
+        self._lock = threading.Lock()
+        self._recarga = threading.Lock()
+        self._filas = {}
+        self._nombres = {}
+        self._palabras = []
+        self._cedulas = {}
+        self._version_cargada = None
+        self._proxima_revision = 0.0
+
+    @staticmethod
+    def _nombre(fila):
+        # (nombre normalizado, palabras sin repetir), calculado una vez por empleado
+        nombre = normalizar(fila['nombre'])
+        return nombre, tuple(sorted(set(nombre.split())))
+
+    def _construir(self, filas):
+        filas = {f['id']: dict(f) for f in filas}
+        nombres = {i: self._nombre(f) for i, f in filas.items()}
+        palabras = sorted((p, i) for i, (_, ps) in nombres.items() for p in ps)
+        cedulas = {}
+        for i, f in filas.items():
+            cedulas.setdefault(normalizar_cedula(f.get('cedula')), set()).add(i)
+        return filas, nombres, palabras, cedulas
+
+    def asegurar_vigente(self):
+        if time.monotonic() < self._proxima_revision:
+            return
+        # Un solo hilo revisa/recarga; los demás siguen con el índice actual
+        if not self._recarga.acquire(blocking=self._version_cargada is None):
+            return
+        try:
+            if time.monotonic() < self._proxima_revision:
+                return
+            version = self._version()
+            if version != self._version_cargada:
+                filas, nombres, palabras, cedulas = self._construir(self._cargar())
+                with self._lock:
+                    self._filas, self._nombres, self._palabras, self._cedulas = filas, nombres, palabras, cedulas
+                    self._version_cargada = version
+            self._proxima_revision = time.monotonic() + self.revisar
+        finally:
+            self._recarga.release()
+
+    def guardar(self, fila):
+        """Agrega o reemplaza un empleado (después de un INSERT o UPDATE confirmado)."""
+        with self._lock:
+            self._quitar(fila['id'])
+            fila = dict(fila)
+            self._filas[fila['id']] = fila
+            self._nombres[fila['id']] = self._nombre(fila)
+            for palabra in self._nombres[fila['id']][1]:
+                insort(self._palabras, (palabra, fila['id']))
+            self._cedulas.setdefault(normalizar_cedula(fila.get('cedula')), set()).add(fila['id'])
+
+    def eliminar(self, empleado_id):
+        with self._lock:
+            self._quitar(empleado_id)
+
+    def _quitar(self, empleado_id):
+        fila = self._filas.pop(empleado_id, None)
+        if fila is None:
+            return
+        for palabra in self._nombres.pop(empleado_id)[1]:
+            posicion = bisect_left(self._palabras, (palabra, empleado_id))
+            if posicion < len(self._palabras) and self._palabras[posicion] == (palabra, empleado_id):
+                del self._palabras[posicion]
+        ids = self._cedulas.get(normalizar_cedula(fila.get('cedula')))
+        if ids:
+            ids.discard(empleado_id)
+
+    def buscar(self, texto, limite=10):
+        self.asegurar_vigente()
+        consulta = normalizar(texto).split()
+        if not consulta:
+            return []
+        cedula = normalizar_cedula(texto)
+        with self._lock:
+            # "-" o " " quedan en "" y coincidirían con todos los empleados sin cédula
+            exactos = sorted(self._cedulas.get(cedula, ())) if cedula else []
+            # Candidatos: empleados con alguna palabra que empieza con la primera palabra buscada
+            primera = consulta[0]
+            candidatos = set()
+            posicion = bisect_left(self._palabras, (primera,))
+            while posicion < len(self._palabras) and self._palabras[posicion][0].startswith(primera):
+                candidatos.add(self._palabras[posicion][1])
+                posicion += 1
+            frase = ' '.join(consulta)
+            puntuados = []
+            for empleado_id in candidatos:
+                nombre, palabras = self._nombres[empleado_id]
+                if not all(any(p.startswith(q) for p in palabras) for q in consulta[1:]):
+                    continue
+                # Primero los que empiezan con lo buscado, después por nombre
+                puntuados.append((0 if nombre.startswith(frase) else 1, nombre, empleado_id))
+            mejores = heapq.nsmallest(limite, puntuados)
+            resultado = [dict(self._filas[i]) for i in exactos]
+            vistos = set(exactos)
+            resultado.extend(dict(self._filas[i]) for _, _, i in mejores if i not in vistos)
+        return resultado[:limite]
+
+    def estadisticas(self):
+        with self._lock:
+            return {"empleados": len(self._filas), "palabras": len(self._palabras),
+                    "version": self._version_cargada}
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """Cache en memoria con expiración (TTL) y desalojo LRU por tamaño."""
+
+    def __init__(self, max_entradas=128, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"aciertos": 0, "fallos": 0, "expirados": 0, "desalojados": 0, "invalidaciones": 0}
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self._stats["fallos"] += 1
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                self._stats["expirados"] += 1
+                self._stats["fallos"] += 1
+                return None
+            self._datos.move_to_end(clave)
+            self._stats["aciertos"] += 1
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        # ttl permite que una entrada expire antes que el resto (p. ej. un token por vencer)
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self._stats["desalojados"] += 1
+
+    def invalidar(self, *claves):
+        # Sin claves se vacía todo el cache
+        with self._lock:
+            if not claves:
+                self._datos.clear()
+            for clave in claves:
+                self._datos.pop(clave, None)
+            self._stats["invalidaciones"] += 1
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entradas"] = len(self._datos)
+        consultas = stats["aciertos"] + stats["fallos"]
+        stats["tasa_aciertos"] = stats["aciertos"] / consultas if consultas else 0.0
+        stats["max_entradas"] = self.max_entradas
+        stats["ttl"] = self.ttl
+        return stats
@@ -0,0 +1,148 @@
+"""Registro de cambios (change-data feed) para que los clientes sincronicen solo lo que cambió.
+
+Cada escritura agrega a la tabla cambios una fila (seq, tabla, fila_id, operacion) en la misma
+transacción, con operacion 'I' (alta), 'U' (modificación) o 'D' (baja). GET /api/changes?since=N
+devuelve el estado actual de las filas tocadas después de N; las bajas viajan como tombstones.
+
+seq es AUTO_INCREMENT: se asigna al insertar, no al confirmar, así una transacción lenta puede
+confirmar un seq menor después de que otro lector ya pasó de largo. Por eso la lectura se corta
+en el primer hueco hasta que este proceso lleva ESPERA_HUECO segundos viéndolo (los huecos de un
+rollback quedan para siempre y se saltan una vez vencidos). La edad se mide desde que se vio el
+hueco y no por el creado de la fila siguiente, que puede ser vieja aunque el hueco sea reciente.
+"""
+import os
+import threading
+import time
+
+import consultas
+
+TABLAS = ('empleados', 'fincas', 'asignaciones', 'pagos', 'jornadas')
+
+# tabla: (consulta, columna id, formateador) con la misma forma que devuelven los GET de listas
+FILAS = {
+    'empleados': ("SELECT * FROM empleados e", "e.id", dict),
+    'fincas': ("SELECT * FROM fincas f", "f.id", dict),
+    'asignaciones': (consultas.SQL_ASIGNACIONES, "a.id", consultas.formatear_asignacion),
+    'pagos': (consultas.SQL_PAGOS, "p.id", consultas.formatear_pago),
+    'jornadas': (consultas.SQL_JORNADAS, "j.id", consultas.formatear_jornada),
+}
+
+OPERACIONES = {'I': 'insertado', 'U': 'actualizado', 'D': 'eliminado'}
+
+ESPERA_HUECO = float(os.environ.get('CHANGES_GAP_SECONDS', 30))
+RETENCION = int(os.environ.get('CHANGES_RETENTION_DAYS', 7)) * 86400
+
+DDL = """
+    CREATE TABLE IF NOT EXISTS cambios (
+        seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+        tabla VARCHAR(32) NOT NULL,
+        fila_id INT NOT NULL,
+        operacion CHAR(1) NOT NULL,
+        creado DATETIME NOT NULL,
+        KEY idx_cambios_creado (creado)
+    )
+"""
+
+SQL_REGISTRAR = """
+    INSERT INTO cambios (tabla, fila_id, operacion, creado) VALUES (%s, %s, %s, NOW())
+"""
+
+# Primer seq faltante de cada hueco -> cuándo lo vio este proceso por primera vez
+_huecos = {}
+_huecos_lock = threading.Lock()
+
+# Marca hasta qué seq se purgó (en versiones_tablas, que ya existe en todas las bases)
+PURGADOS = 'cambios_purgados'
+
+
+def registrar(cursor, tabla, operacion, *ids):
+    # executemany arma un solo INSERT ... VALUES de varias filas: InnoDB sabe cuántos seq
+    # necesita y los asigna seguidos. Un INSERT ... SELECT puede reservar de más y dejar huecos
+    # permanentes, que harían esperar ESPERA_HUECO a cada lector.
+    if ids:
+        cursor.executemany(SQL_REGISTRAR, [(tabla, fila_id, operacion) for fila_id in ids])
+
+
+def registrar_liquidacion(cursor, liquidacion_id):
+    # Los pagos creados por una liquidación; los ids se leen aparte para insertarlos con VALUES.
+    # El pago_id de las jornadas no sale en la API, así que las jornadas enlazadas no se anotan.
+    cursor.execute("SELECT id FROM pagos WHERE liquidacion_id = %s ORDER BY id", (liquidacion_id,))
+    registrar(cursor, 'pagos', 'I', *[fila[0] for fila in cursor.fetchall()])
+
+
+def ultimo(cursor):
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM cambios")
+    return int(cursor.fetchone()[0])
+
+
+def purgado_hasta(cursor):
+    cursor.execute("SELECT version FROM versiones_tablas WHERE tabla = %s", (PURGADOS,))
+    fila = cursor.fetchone()
+    return int(fila[0]) if fila else 0
+
+
+def purgar(cursor):
+    """Borra los cambios más viejos que la retención y anota hasta dónde se borró."""
+    cursor.execute("SELECT MAX(seq) FROM cambios WHERE creado < NOW() - INTERVAL %s SECOND", (RETENCION,))
+    hasta = cursor.fetchone()[0]
+    if not hasta:
+        return 0
+    cursor.execute("""
+        INSERT INTO versiones_tablas (tabla, version) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE version = VALUES(version)
+    """, (PURGADOS, hasta))
+    cursor.execute("DELETE FROM cambios WHERE seq <= %s", (hasta,))
+    return cursor.rowcount
+
+
+def _hueco_vencido(seq, ahora):
+    with _huecos_lock:
+        visto = _huecos.setdefault(seq, ahora)
+        if len(_huecos) > 1000:
+            # Los huecos ya saltados o llenados no vuelven a consultarse
+            for clave in [c for c, v in _huecos.items() if v < ahora - 4 * ESPERA_HUECO]:
+                del _huecos[clave]
+    return ahora - visto >= ESPERA_HUECO
+
+
+def leer(cursor, desde, limite):
+    """Devuelve (cambios en orden, último seq seguro, hay_mas).
+
+    hay_mas es False mientras se espera un hueco: volver a pedir enseguida no adelanta nada.
+    """
+    cursor.execute("""
+        SELECT seq, tabla, fila_id, operacion
+        FROM cambios WHERE seq > %s ORDER BY seq LIMIT %s
+    """, (desde, limite + 1))
+    filas = cursor.fetchall()
+    ahora = time.monotonic()
+    hasta = desde
+    leidos = []
+    for seq, tabla, fila_id, operacion in filas[:limite]:
+        # Un hueco reciente puede ser una transacción que aún no confirma: se espera
+        if seq != hasta + 1 and not _hueco_vencido(hasta + 1, ahora):
+            return leidos, hasta, False
+        leidos.append((seq, tabla, fila_id, operacion))
+        hasta = seq
+    return leidos, hasta, len(filas) > limite
+
+
+def compactar(leidos):
+    """Un cambio por fila: el último seq y la operación neta (alta + modificaciones = alta)."""
+    netos = {}
+    for seq, tabla, fila_id, operacion in leidos:
+        anterior = netos.get((tabla, fila_id))
+        if anterior and anterior[1] == 'I' and operacion == 'U':
+            operacion = 'I'
+        netos[(tabla, fila_id)] = (seq, operacion)
+    return sorted((seq, tabla, fila_id, operacion) for (tabla, fila_id), (seq, operacion) in netos.items())
+
+
+def cargar(cursor, tabla, ids):
+    """Estado actual de las filas (cursor con dictionary=True), por id; las borradas no aparecen."""
+    if not ids:
+        return {}
+    sql, columna, formatear = FILAS[tabla]
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"{sql} WHERE {columna} IN ({marcadores})", tuple(ids))
+    return {fila['id']: formatear(fila) for fila in cursor.fetchall()}
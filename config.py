@@ -0,0 +1,39 @@
+import os
+import socket
+from datetime import datetime
+
+# Clave para firmar los JWT; debe ser la misma en todos los procesos (ver gunicorn.conf.py)
+SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(24)
+
+# Con AUTH_REQUIRED=1 las rutas de la API exigen 'Authorization: Bearer <token>'
+AUTH_REQUIRED = os.environ.get('AUTH_REQUIRED', '0') == '1'
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 1024))
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', 300))
+
+# Configuración de la base de datos (las variables DB_* permiten apuntar a otra base, p. ej. la local del benchmark)
+db_config = {
+    'host': os.environ.get('DB_HOST', 'bglucmgbm4ndh8uojido-mysql.services.clever-cloud.com'),
+    'database': os.environ.get('DB_NAME', 'bglucmgbm4ndh8uojido'),
+    'user': os.environ.get('DB_USER', 'u0mi0h3vk85jpjrk'),
+    'password': os.environ.get('DB_PASSWORD', '2OMj4BJWJKwHLrC6HfEa'),
+    'port': os.environ.get('DB_PORT', '3306')
+}
+
+# Tamaño y comportamiento del pool de conexiones
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = float(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 10))
+
+# Backend de almacenamiento: 'mysql' (base central) o 'sqlite' (estación de campo sin conexión estable)
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'estacion.sqlite3'))
+# Identifica a la estación en la base central (columna origen de jornadas y pagos sincronizados)
+ESTACION_ID = os.environ.get('ESTACION_ID') or socket.gethostname()
+
+# Primer día que se puede liquidar con POST /api/pagos/liquidar. Las jornadas anteriores se
+# pagaron a mano con POST /api/pagos y no están enlazadas a su pago (pago_id NULL): sin este
+# corte una liquidación de un período viejo las pagaría de nuevo. Sin valor no se liquida.
+LIQUIDACION_DESDE = os.environ.get('LIQUIDACION_DESDE')
+if LIQUIDACION_DESDE:
+    LIQUIDACION_DESDE = datetime.strptime(LIQUIDACION_DESDE, '%Y-%m-%d').date()
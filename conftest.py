@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base SQLite de estación en un archivo temporal, con el esquema completo."""
+    # almacen_sqlite usa las clases de error de mysql.connector
+    pytest.importorskip('mysql.connector')
+    import almacen_sqlite
+    conexion = almacen_sqlite.conectar(str(tmp_path / 'planilla.db'))
+    yield conexion
+    conexion.close()
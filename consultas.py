@@ -0,0 +1,466 @@
+"""Consultas SQL y formato de respuestas compartidos por API.py (Flask) y asgi_app.py (async).
+
+Las funciones consulta_* reciben los parámetros del request (un MultiDict) y devuelven
+el SQL con sus valores; las funciones formatear_* convierten una fila (dict) al JSON
+que espera el frontend. Así ambos servidores responden exactamente igual.
+Los Decimal y date se dejan tal cual: los convierte el serializador (serializacion.py).
+"""
+from datetime import datetime, timedelta
+
+PAGOS_LIMITE_MAXIMO = 500
+
+
+class ParametroInvalido(ValueError):
+    """Parámetro de consulta inválido; cuerpo es el JSON que se devuelve con 400."""
+
+    def __init__(self, cuerpo):
+        super().__init__(cuerpo.get("detalle") or cuerpo.get("error"))
+        self.cuerpo = cuerpo
+
+
+def parse_fecha(args, *nombres):
+    # Lee un parámetro de fecha YYYY-MM-DD (acepta también ISO completo); ValueError si es inválido
+    valor = next((args.get(n) for n in nombres if args.get(n)), None)
+    if not valor:
+        return None
+    return datetime.strptime(valor[:10], '%Y-%m-%d').date()
+
+
+def parse_cursor_pagos(valor):
+    # El cursor es "<fecha_pago>,<id>" del último pago de la página anterior
+    fecha, pago_id = valor.split(',', 1)
+    return datetime.strptime(fecha, '%Y-%m-%d').date(), int(pago_id)
+
+
+def _invalido(e):
+    return ParametroInvalido({"error": "Parámetros inválidos", "detalle": str(e)})
+
+
+def _where(condiciones):
+    return ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+
+# Versiones por tabla (ETags)
+SQL_INCREMENTAR_VERSION = """
+    INSERT INTO versiones_tablas (tabla, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+# Asignaciones
+SQL_ASIGNACIONES = """
+    SELECT
+        a.*,
+        e.nombre as empleado_nombre,
+        e.cedula as empleado_dpi,
+        e.telefono as empleado_telefono,
+        f.nombre as finca_nombre,
+        f.ubicacion as finca_ubicacion
+    FROM asignaciones a
+    LEFT JOIN empleados e ON a.empleado_id = e.id
+    LEFT JOIN fincas f ON a.finca_id = f.id
+"""
+
+
+def formatear_asignacion(asignacion):
+    return {
+        "id": asignacion["id"],
+        "fecha_asignacion": asignacion["fecha_asignacion"],
+        "descripcion": asignacion.get("descripcion", ""),
+        "empleado": {
+            "id": asignacion["empleado_id"],
+            "nombre": asignacion["empleado_nombre"],
+            "dpi": asignacion["empleado_dpi"],
+            "telefono": asignacion["empleado_telefono"]
+        },
+        "finca": {
+            "id": asignacion["finca_id"],
+            "nombre": asignacion["finca_nombre"],
+            "ubicacion": asignacion["finca_ubicacion"]
+        }
+    }
+
+
+# Pagos
+SQL_PAGOS = """
+    SELECT
+        p.id,
+        p.fecha_pago,
+        p.libras_totales AS libras,
+        p.precio_libra_promedio AS precio_libra,
+        p.total,
+        e.id AS empleado_id,
+        e.nombre AS empleado_nombre,
+        e.cedula AS empleado_dpi,
+        e.telefono AS empleado_telefono
+    FROM pagos p
+    LEFT JOIN empleados e ON p.empleados_id = e.id
+"""
+
+
+def consulta_pagos(args):
+    """Devuelve (sql, valores, limite); limite es None si no se pidió paginación."""
+    try:
+        inicio = parse_fecha(args, 'inicio')
+        fin = parse_fecha(args, 'fin')
+        empleado_id = args.get('empleado_id', type=int)
+        cursor_pagina = args.get('cursor')
+        limite = args.get('limite', type=int)
+        if cursor_pagina:
+            cursor_pagina = parse_cursor_pagos(cursor_pagina)
+    except ValueError as e:
+        raise _invalido(e)
+
+    # La paginación es opcional: sin limite ni cursor se devuelve el listado completo
+    paginar = limite is not None or cursor_pagina is not None
+    if paginar:
+        limite = max(1, min(limite or PAGOS_LIMITE_MAXIMO, PAGOS_LIMITE_MAXIMO))
+    else:
+        limite = None
+
+    condiciones = []
+    valores = []
+    if inicio:
+        condiciones.append("p.fecha_pago >= %s")
+        valores.append(inicio)
+    if fin:
+        condiciones.append("p.fecha_pago <= %s")
+        valores.append(fin)
+    if empleado_id is not None:
+        condiciones.append("p.empleados_id = %s")
+        valores.append(empleado_id)
+    if cursor_pagina:
+        condiciones.append("(p.fecha_pago < %s OR (p.fecha_pago = %s AND p.id < %s))")
+        valores.extend([cursor_pagina[0], cursor_pagina[0], cursor_pagina[1]])
+
+    limit = ""
+    if paginar:
+        # Se pide una fila extra para saber si hay otra página
+        limit = "LIMIT %s"
+        valores.append(limite + 1)
+
+    sql = f"""
+        {SQL_PAGOS}
+        {_where(condiciones)}
+        ORDER BY p.fecha_pago DESC, p.id DESC
+        {limit}
+    """
+    return sql, tuple(valores), limite
+
+
+def paginar_pagos(pagos, limite):
+    """Recorta la fila extra y devuelve (pagos, siguiente_cursor)."""
+    if limite is None or len(pagos) <= limite:
+        return pagos, None
+    pagos = pagos[:limite]
+    ultimo = pagos[-1]
+    return pagos, f"{ultimo['fecha_pago'].strftime('%Y-%m-%d')},{ultimo['id']}"
+
+
+def formatear_pago(pago):
+    return {
+        "id": pago["id"],
+        "fecha_pago": pago["fecha_pago"],
+        "libras": pago["libras"] or 0.0,
+        "precio_libra": pago["precio_libra"] or 0.0,
+        "total": pago["total"] or 0.0,
+        "empleado": {
+            "id": pago["empleado_id"],
+            "nombre": pago["empleado_nombre"] or "Sin empleado",
+            "dpi": pago["empleado_dpi"] or "",
+            "telefono": pago["empleado_telefono"] or ""
+        }
+    }
+
+
+def formatear_pago_creado(pago_id, empleado_id, fecha_pago, libras, precio_libra, total):
+    # Respuesta de POST /api/pagos armada con los valores insertados, sin volver a consultar la fila.
+    # Redondeados como los guarda MySQL (DECIMAL(12,2), (10,4) y (14,2))
+    return {
+        "id": pago_id,
+        "fecha_pago": fecha_pago,
+        "libras": round(libras, 2),
+        "precio_libra": round(precio_libra, 4),
+        "total": round(total, 2),
+        "empleado": {"id": empleado_id},
+        "message": "Pago creado exitosamente"
+    }
+
+
+# Expresión SQL del inicio de cada período; se agrega sobre resumen_pagos (una fila por día y empleado)
+PERIODOS_PAGO = {
+    'dia': "p.fecha",
+    'semana': "DATE_SUB(p.fecha, INTERVAL WEEKDAY(p.fecha) DAY)",
+    'mes': "DATE_SUB(p.fecha, INTERVAL DAYOFMONTH(p.fecha) - 1 DAY)"
+}
+
+
+def rango_periodo(periodo, fecha):
+    # Devuelve (inicio, fin) del día, semana ISO o mes que contiene la fecha
+    if periodo == 'dia':
+        return fecha, fecha
+    if periodo == 'semana':
+        inicio = fecha - timedelta(days=fecha.weekday())
+        return inicio, inicio + timedelta(days=6)
+    inicio = fecha.replace(day=1)
+    siguiente = (inicio + timedelta(days=32)).replace(day=1)
+    return inicio, siguiente - timedelta(days=1)
+
+
+def etiqueta_periodo(periodo, inicio):
+    if periodo == 'semana':
+        anio, semana, _ = inicio.isocalendar()
+        return f"{anio}-W{semana:02d}"
+    if periodo == 'mes':
+        return inicio.strftime("%Y-%m")
+    return inicio.strftime("%Y-%m-%d")
+
+
+def consulta_pagos_por_periodo(args):
+    """Devuelve (sql, valores, periodo, por_empleado)."""
+    periodo = args.get('periodo', 'dia')
+    if periodo not in PERIODOS_PAGO:
+        raise ParametroInvalido({"error": "Período no válido", "periodos": list(PERIODOS_PAGO)})
+    try:
+        fecha = parse_fecha(args, 'fecha')
+        inicio = parse_fecha(args, 'inicio')
+        fin = parse_fecha(args, 'fin')
+        empleado_id = args.get('empleado_id', type=int)
+    except ValueError as e:
+        raise _invalido(e)
+    por_empleado = args.get('por_empleado', '').lower() in ('1', 'true', 'si')
+
+    # Con una fecha de referencia se limita al período que la contiene
+    if fecha and not (inicio or fin):
+        inicio, fin = rango_periodo(periodo, fecha)
+
+    condiciones = []
+    valores = []
+    if inicio:
+        condiciones.append("p.fecha >= %s")
+        valores.append(inicio)
+    if fin:
+        condiciones.append("p.fecha <= %s")
+        valores.append(fin)
+    if empleado_id is not None:
+        condiciones.append("p.empleados_id = %s")
+        valores.append(empleado_id)
+
+    inicio_periodo = PERIODOS_PAGO[periodo]
+    columnas_empleado = ", p.empleados_id AS empleado_id, MAX(e.nombre) AS empleado_nombre" if por_empleado else ""
+    join_empleado = "LEFT JOIN empleados e ON p.empleados_id = e.id" if por_empleado else ""
+    group_empleado = ", p.empleados_id" if por_empleado else ""
+
+    sql = f"""
+        SELECT
+            DATE({inicio_periodo}) AS inicio_periodo,
+            SUM(p.pagos) AS pagos,
+            SUM(p.libras_totales) AS libras_totales,
+            SUM(p.total) AS total,
+            SUM(p.total) / NULLIF(SUM(p.libras_totales), 0) AS precio_libra_promedio
+            {columnas_empleado}
+        FROM resumen_pagos p
+        {join_empleado}
+        {_where(condiciones)}
+        GROUP BY DATE({inicio_periodo}){group_empleado}
+        ORDER BY inicio_periodo DESC{group_empleado}
+    """
+    return sql, tuple(valores), periodo, por_empleado
+
+
+def formatear_periodo(fila, periodo, por_empleado):
+    item = {
+        "periodo": etiqueta_periodo(periodo, fila["inicio_periodo"]),
+        "inicio_periodo": fila["inicio_periodo"].strftime("%Y-%m-%d"),
+        "pagos": int(fila["pagos"] or 0),
+        "libras_totales": float(fila["libras_totales"] or 0),
+        "total": float(fila["total"] or 0),
+        "precio_libra_promedio": float(fila["precio_libra_promedio"] or 0)
+    }
+    if por_empleado:
+        item["empleado"] = {
+            "id": fila["empleado_id"],
+            "nombre": fila["empleado_nombre"] or "Sin empleado"
+        }
+    return item
+
+
+# Jornadas
+SQL_JORNADAS = """
+    SELECT
+        j.id, j.fecha, j.libras_recolectadas, j.precio_libra,
+        e.id as empleados_id,
+        COALESCE(e.nombre, 'Sin empleado') as empleados_nombre,
+        COALESCE(e.cedula, '') as empleados_cedula,
+        COALESCE(e.telefono, '') as empleados_telefono,
+        f.id as fincas_id,
+        COALESCE(f.nombre, 'Sin finca') as fincas_nombre
+    FROM jornadas j
+    LEFT JOIN empleados e ON j.empleados_id = e.id
+    LEFT JOIN fincas f ON j.fincas_id = f.id
+"""
+
+
+def formatear_jornada(jornada):
+    return {
+        "id": jornada["id"],
+        "fecha": jornada["fecha"],
+        "libras_recolectadas": jornada["libras_recolectadas"] or 0.0,
+        "precio_libra": jornada["precio_libra"] or 0.0,
+        "empleado": {
+            "id": jornada["empleados_id"],
+            "nombre": jornada["empleados_nombre"],
+            "dpi": jornada["empleados_cedula"],
+            "telefono": jornada["empleados_telefono"]
+        },
+        "finca": {
+            "id": jornada["fincas_id"],
+            "nombre": jornada["fincas_nombre"]
+        }
+    }
+
+
+def jornada_liquidada(jornada):
+    # Una jornada liquidada forma parte de su pago: cambiarla dejaría el pago con otro total
+    return {"error": "La jornada ya está liquidada; elimine su pago para poder modificarla",
+            "pago_id": jornada["pago_id"]}
+
+
+# Dimensiones por las que se puede agrupar el reporte de jornadas
+DIMENSIONES_REPORTE = {
+    'fecha': ("j.fecha", "j.fecha"),
+    'empleado': ("j.empleados_id AS empleados_id, MAX(COALESCE(e.nombre, 'Sin empleado')) AS empleados_nombre", "j.empleados_id"),
+    'finca': ("j.fincas_id AS fincas_id, MAX(COALESCE(f.nombre, 'Sin finca')) AS fincas_nombre", "j.fincas_id")
+}
+
+
+def consulta_reporte_jornadas(args):
+    """Devuelve (sql, valores, agrupar) del reporte agregado sobre resumen_jornadas."""
+    try:
+        inicio = parse_fecha(args, 'fechaInicio', 'inicio')
+        fin = parse_fecha(args, 'fechaFin', 'fin')
+        empleado_id = args.get('empleadoId', type=int) or args.get('empleado_id', type=int)
+        finca_id = args.get('fincaId', type=int) or args.get('finca_id', type=int)
+    except ValueError as e:
+        raise _invalido(e)
+
+    # Por defecto una fila por fecha, empleado y finca (formato que usa JornadasReporte)
+    agrupar = [d.strip() for d in args.get('agrupar', 'fecha,empleado,finca').split(',') if d.strip()]
+    if not agrupar or any(d not in DIMENSIONES_REPORTE for d in agrupar):
+        raise ParametroInvalido({"error": "Agrupación no válida", "dimensiones": list(DIMENSIONES_REPORTE)})
+
+    condiciones = []
+    valores = []
+    if inicio:
+        condiciones.append("j.fecha >= %s")
+        valores.append(inicio)
+    if fin:
+        condiciones.append("j.fecha <= %s")
+        valores.append(fin)
+    if empleado_id:
+        condiciones.append("j.empleados_id = %s")
+        valores.append(empleado_id)
+    if finca_id:
+        condiciones.append("j.fincas_id = %s")
+        valores.append(finca_id)
+
+    columnas = ", ".join(DIMENSIONES_REPORTE[d][0] for d in agrupar)
+    group_by = ", ".join(DIMENSIONES_REPORTE[d][1] for d in agrupar)
+    joins = ""
+    if 'empleado' in agrupar:
+        joins += " LEFT JOIN empleados e ON j.empleados_id = e.id"
+    if 'finca' in agrupar:
+        joins += " LEFT JOIN fincas f ON j.fincas_id = f.id"
+
+    sql = f"""
+        SELECT
+            {columnas},
+            SUM(j.jornadas) AS jornadas,
+            COUNT(DISTINCT j.fecha) AS dias,
+            SUM(j.libras_recolectadas) AS libras_recolectadas,
+            SUM(j.total) AS total
+        FROM resumen_jornadas j
+        {joins}
+        {_where(condiciones)}
+        GROUP BY {group_by}
+        ORDER BY {group_by}
+    """
+    return sql, tuple(valores), agrupar
+
+
+def formatear_reporte(fila, agrupar):
+    libras = float(fila["libras_recolectadas"] or 0)
+    total = float(fila["total"] or 0)
+    item = {
+        "jornadas": int(fila["jornadas"] or 0),
+        "dias": fila["dias"],
+        "libras_recolectadas": libras,
+        "total": total,
+        "precio_libra": total / libras if libras else 0.0
+    }
+    if 'fecha' in agrupar:
+        item["fecha"] = fila["fecha"].strftime("%Y-%m-%d") if fila["fecha"] else None
+    if 'empleado' in agrupar:
+        item["empleado"] = {"id": fila["empleados_id"], "nombre": fila["empleados_nombre"]}
+    if 'finca' in agrupar:
+        item["finca"] = {"id": fila["fincas_id"], "nombre": fila["fincas_nombre"]}
+    return item
+
+
+# Formato columnar (?format=columnar) de las listas: un arreglo por columna y tablas de
+# empleados y fincas sin repetir, referenciadas por id. El formato por defecto no cambia.
+FORMATOS_LISTA = ('json', 'columnar')
+
+# (columna de salida, clave en la fila, valor si es NULL)
+COLUMNAR_PAGOS = {
+    "columnas": [("id", "id", None), ("fecha_pago", "fecha_pago", None), ("libras", "libras", 0.0),
+                 ("precio_libra", "precio_libra", 0.0), ("total", "total", 0.0), ("empleado_id", "empleado_id", None)],
+    "empleados": ("empleado_id", {"nombre": "empleado_nombre", "dpi": "empleado_dpi", "telefono": "empleado_telefono"}),
+}
+
+COLUMNAR_JORNADAS = {
+    "columnas": [("id", "id", None), ("fecha", "fecha", None), ("libras_recolectadas", "libras_recolectadas", 0.0),
+                 ("precio_libra", "precio_libra", 0.0), ("empleado_id", "empleados_id", None),
+                 ("finca_id", "fincas_id", None)],
+    "empleados": ("empleados_id", {"nombre": "empleados_nombre", "dpi": "empleados_cedula", "telefono": "empleados_telefono"}),
+    "fincas": ("fincas_id", {"nombre": "fincas_nombre"}),
+}
+
+COLUMNAR_ASIGNACIONES = {
+    "columnas": [("id", "id", None), ("fecha_asignacion", "fecha_asignacion", None), ("descripcion", "descripcion", ""),
+                 ("empleado_id", "empleado_id", None), ("finca_id", "finca_id", None)],
+    "empleados": ("empleado_id", {"nombre": "empleado_nombre", "dpi": "empleado_dpi", "telefono": "empleado_telefono"}),
+    "fincas": ("finca_id", {"nombre": "finca_nombre", "ubicacion": "finca_ubicacion"}),
+}
+
+
+def formato_lista(args):
+    formato = args.get('format') or args.get('formato') or 'json'
+    if formato not in FORMATOS_LISTA:
+        raise ParametroInvalido({"error": "Formato no válido", "formatos": list(FORMATOS_LISTA)})
+    return formato
+
+
+def formatear_columnar(filas, especificacion):
+    datos = {}
+    for nombre, clave, defecto in especificacion["columnas"]:
+        if defecto is None:
+            datos[nombre] = [fila[clave] for fila in filas]
+        else:
+            datos[nombre] = [defecto if fila[clave] is None else fila[clave] for fila in filas]
+
+    respuesta = {
+        "filas": len(filas),
+        "columnas": [nombre for nombre, _, _ in especificacion["columnas"]],
+        "datos": datos,
+    }
+    for tabla in ("empleados", "fincas"):
+        if tabla not in especificacion:
+            continue
+        clave_id, campos = especificacion[tabla]
+        registros = {}
+        for fila in filas:
+            id_registro = fila[clave_id]
+            if id_registro is not None and id_registro not in registros:
+                registros[id_registro] = {nombre: fila[clave] for nombre, clave in campos.items()}
+        respuesta[tabla] = registros
+    return respuesta
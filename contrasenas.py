@@ -0,0 +1,123 @@
+"""Hash de contraseñas con costo configurable y un camino de login acotado.
+
+- PASSWORD_HASH_METHOD define el método de Werkzeug (p. ej. 'pbkdf2:sha256:600000' o
+  'scrypt:32768:8:1'); los hashes guardados con otro método se actualizan al iniciar sesión.
+- Las verificaciones corren en un pool fijo de hilos (hashlib libera el GIL) y con un
+  límite de logins simultáneos, así una ola de logins no acapara la CPU de la API.
+  asgi_app.py usa las variantes *_async: mismo pool, y el cupo se espera sin bloquear el loop.
+- LimitadorIntentos limita los intentos por usuario e IP en una ventana de tiempo; con
+  la clave solo por usuario cualquiera podría bloquear una cuenta ajena.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+METODO = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+HILOS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+MAX_SIMULTANEOS = int(os.environ.get('LOGIN_MAX_CONCURRENT', 8))
+ESPERA_MAXIMA = float(os.environ.get('LOGIN_QUEUE_TIMEOUT', 5))
+
+_ejecutor = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix='hash')
+_cupos = threading.BoundedSemaphore(MAX_SIMULTANEOS)
+_cupos_async = None
+
+
+# Werkzeug completa los parámetros por defecto al guardar ('pbkdf2:sha256' queda como
+# 'pbkdf2:sha256:<iteraciones>'); el método normalizado se toma de un hash de prueba.
+METODO_GUARDADO = generate_password_hash('', method=METODO).split('$', 1)[0]
+
+
+class LoginSaturado(Exception):
+    """No hubo cupo para verificar la contraseña dentro de LOGIN_QUEUE_TIMEOUT."""
+
+
+def generar_hash(password):
+    return generate_password_hash(password, method=METODO)
+
+
+def necesita_rehash(hash_guardado):
+    # El formato de Werkzeug es 'metodo$sal$hash'
+    return hash_guardado.split('$', 1)[0] != METODO_GUARDADO
+
+
+def _en_pool(funcion, *args):
+    if not _cupos.acquire(timeout=ESPERA_MAXIMA):
+        raise LoginSaturado()
+    try:
+        return _ejecutor.submit(funcion, *args).result()
+    finally:
+        _cupos.release()
+
+
+def verificar(hash_guardado, password):
+    return _en_pool(check_password_hash, hash_guardado, password)
+
+
+def generar(password):
+    return _en_pool(generar_hash, password)
+
+
+async def _en_pool_async(funcion, *args):
+    global _cupos_async
+    if _cupos_async is None:
+        _cupos_async = asyncio.Semaphore(MAX_SIMULTANEOS)
+    try:
+        await asyncio.wait_for(_cupos_async.acquire(), ESPERA_MAXIMA)
+    except asyncio.TimeoutError:
+        raise LoginSaturado()
+    try:
+        return await asyncio.wrap_future(_ejecutor.submit(funcion, *args))
+    finally:
+        _cupos_async.release()
+
+
+async def verificar_async(hash_guardado, password):
+    return await _en_pool_async(check_password_hash, hash_guardado, password)
+
+
+async def generar_async(password):
+    return await _en_pool_async(generar_hash, password)
+
+
+class LimitadorIntentos:
+    """Ventana deslizante de intentos por clave (usuario e IP), en memoria del proceso."""
+
+    def __init__(self, maximo=5, ventana=60, max_claves=10000):
+        self.maximo = maximo
+        self.ventana = ventana
+        self.max_claves = max_claves
+        self._intentos = {}
+        self._lock = threading.Lock()
+
+    def permitir(self, clave):
+        """Registra un intento; devuelve 0 si se permite o los segundos a esperar."""
+        ahora = time.monotonic()
+        with self._lock:
+            intentos = self._intentos.get(clave)
+            if intentos is None:
+                if len(self._intentos) >= self.max_claves:
+                    self._purgar(ahora)
+                intentos = self._intentos[clave] = deque()
+            while intentos and intentos[0] <= ahora - self.ventana:
+                intentos.popleft()
+            if len(intentos) >= self.maximo:
+                return intentos[0] + self.ventana - ahora
+            intentos.append(ahora)
+            return 0
+
+    def reiniciar(self, clave):
+        with self._lock:
+            self._intentos.pop(clave, None)
+
+    def _purgar(self, ahora):
+        vencidas = [c for c, i in self._intentos.items() if not i or i[-1] <= ahora - self.ventana]
+        for clave in vencidas:
+            del self._intentos[clave]
+        # Si aún está lleno se descartan las más antiguas
+        while len(self._intentos) >= self.max_claves:
+            del self._intentos[next(iter(self._intentos))]
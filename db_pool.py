@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolAgotadoError(Error):
+    """No se obtuvo una conexión libre dentro del tiempo de espera."""
+
+
+class ConexionPooled:
+    """Envoltorio de una conexión real; close() la devuelve al pool.
+
+    Cada devolución crea un envoltorio nuevo, así un close() repetido sobre un
+    préstamo anterior no libera la conexión que ya tiene otro request.
+    """
+
+    def __init__(self, pool, conexion, creada=None):
+        self._pool = pool
+        self._conexion = conexion
+        self.creada = creada or time.monotonic()
+        self.ultimo_uso = time.monotonic()
+        self.prestada = False
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conexion.cursor(*args, **kwargs)
+        if self._pool.envolver_cursor:
+            return self._pool.envolver_cursor(cursor)
+        return cursor
+
+    def close(self):
+        if self.prestada:
+            self._pool.liberar(self)
+
+    def descartar(self):
+        # Cierra la conexión real en vez de devolverla (p. ej. con resultados sin leer)
+        if self.prestada:
+            self._pool.liberar(self, descartar=True)
+
+    def cerrar_real(self):
+        try:
+            self._conexion.close()
+        except Error:
+            pass
+
+
+class PoolConexiones:
+    """Pool de conexiones MySQL con verificación al prestar y reciclaje.
+
+    - tamano: máximo de conexiones abiertas a la vez.
+    - espera: segundos que se espera por una conexión libre.
+    - reciclar: segundos de vida máxima de una conexión.
+    - ping_tras: segundos de inactividad tras los que se hace ping antes de prestarla.
+
+    envolver_cursor, si se asigna, recibe cada cursor creado y puede devolver un
+    envoltorio (se usa para medir las consultas).
+    """
+
+    def __init__(self, config, tamano=10, espera=30, reciclar=1800, ping_tras=10):
+        self.config = dict(config)
+        self.tamano = tamano
+        self.espera = espera
+        self.reciclar = reciclar
+        self.ping_tras = ping_tras
+        self.envolver_cursor = None
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(tamano)
+        self._lock = threading.Lock()
+        self._stats = {
+            "prestamos": 0,
+            "devoluciones": 0,
+            "en_uso": 0,
+            "creadas": 0,
+            "recicladas": 0,
+            "fallos_ping": 0,
+            "timeouts": 0,
+            "espera_total_ms": 0.0,
+            "espera_max_ms": 0.0,
+        }
+
+    def _sumar(self, clave, valor=1):
+        with self._lock:
+            self._stats[clave] += valor
+
+    def _nueva(self):
+        conexion = ConexionPooled(self, mysql.connector.connect(**self.config))
+        self._sumar("creadas")
+        return conexion
+
+    def _sana(self, conexion):
+        ahora = time.monotonic()
+        if self.reciclar and ahora - conexion.creada > self.reciclar:
+            self._sumar("recicladas")
+            return False
+        if ahora - conexion.ultimo_uso > self.ping_tras:
+            try:
+                conexion.ping(reconnect=False)
+            except Error:
+                self._sumar("fallos_ping")
+                return False
+        return True
+
+    def obtener(self):
+        inicio = time.monotonic()
+        if not self._cupos.acquire(timeout=self.espera):
+            self._sumar("timeouts")
+            raise PoolAgotadoError(msg="No hay conexiones disponibles en el pool")
+        try:
+            conexion = None
+            while conexion is None:
+                try:
+                    candidata = self._libres.get_nowait()
+                except queue.Empty:
+                    conexion = self._nueva()
+                    break
+                if self._sana(candidata):
+                    conexion = candidata
+                else:
+                    candidata.cerrar_real()
+        except Exception:
+            self._cupos.release()
+            raise
+
+        espera_ms = (time.monotonic() - inicio) * 1000
+        with self._lock:
+            self._stats["prestamos"] += 1
+            self._stats["en_uso"] += 1
+            self._stats["espera_total_ms"] += espera_ms
+            self._stats["espera_max_ms"] = max(self._stats["espera_max_ms"], espera_ms)
+        conexion.prestada = True
+        return conexion
+
+    def liberar(self, conexion, descartar=False):
+        conexion.prestada = False
+        if descartar:
+            conexion.cerrar_real()
+        else:
+            try:
+                # Descartar cualquier transacción que el handler dejó abierta
+                if conexion.in_transaction:
+                    conexion.rollback()
+                self._libres.put(ConexionPooled(self, conexion._conexion, conexion.creada))
+            except Error:
+                conexion.cerrar_real()
+        with self._lock:
+            self._stats["devoluciones"] += 1
+            self._stats["en_uso"] -= 1
+        self._cupos.release()
+
+    @contextmanager
+    def conexion(self):
+        conexion = self.obtener()
+        try:
+            yield conexion
+        finally:
+            conexion.close()
+
+    def cerrar_todas(self):
+        while True:
+            try:
+                self._libres.get_nowait().cerrar_real()
+            except queue.Empty:
+                break
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tamano"] = self.tamano
+        stats["libres"] = self._libres.qsize()
+        prestamos = stats["prestamos"] or 1
+        stats["espera_promedio_ms"] = stats["espera_total_ms"] / prestamos
+        return stats
@@ -0,0 +1,260 @@
+"""Canal de eventos en vivo (Server-Sent Events) para jornadas, pagos y totales por finca.
+
+Un solo hilo por proceso (VigiaCambios) lee el registro de cambios (cambios.py) y reparte
+cada cambio a todos los clientes conectados a través de un Broker en memoria: una consulta
+por ronda sin importar cuántos navegadores estén abiertos. Los handlers de escritura lo
+despiertan después del commit, así los cambios del mismo proceso salen enseguida; los de
+otros workers (o de sincronizar.py) llegan en la siguiente ronda (SSE_POLL_SECONDS).
+
+Cada cliente tiene un buffer acotado (SSE_BUFFER eventos). El productor nunca espera a un
+cliente lento: si su buffer se llena se descarta y se le envía 'reiniciar' para que recargue
+las listas. El broker guarda los últimos eventos, así un cliente que se reconecta con
+Last-Event-ID recibe lo que se perdió si todavía está en ese historial. 'reiniciar' lleva
+como id el último seq leído: el navegador se reconecta desde ahí después de recargar, en vez
+de volver con el Last-Event-ID viejo y recibir 'reiniciar' otra vez.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import date
+
+import cambios
+import serializacion
+
+INTERVALO = float(os.environ.get('SSE_POLL_SECONDS', 1.0))
+BUFFER = int(os.environ.get('SSE_BUFFER', 256))
+HISTORIAL = int(os.environ.get('SSE_HISTORY', 1000))
+MAX_CLIENTES = int(os.environ.get('SSE_MAX_CLIENTS', 100))
+LATIDO = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+
+TABLAS = ('jornadas', 'pagos')
+
+SQL_TOTALES_FINCAS = """
+    SELECT r.fincas_id, COALESCE(f.nombre, 'Sin finca') AS finca_nombre,
+           SUM(r.jornadas) AS jornadas, SUM(r.libras_recolectadas) AS libras, SUM(r.total) AS total
+    FROM resumen_jornadas r
+    LEFT JOIN fincas f ON f.id = r.fincas_id
+    WHERE r.fecha = %s
+    GROUP BY r.fincas_id, f.nombre
+    ORDER BY r.fincas_id
+"""
+
+
+class ClientesAgotados(Exception):
+    pass
+
+
+class Suscripcion:
+    def __init__(self, tablas, maximo):
+        self.tablas = tablas
+        self.maximo = maximo
+        self._eventos = deque()
+        self._condicion = threading.Condition()
+        self.desbordada = False
+        self.cerrada = False
+
+    def poner(self, evento):
+        with self._condicion:
+            if self.desbordada or self.cerrada:
+                return
+            if len(self._eventos) >= self.maximo:
+                # Cliente lento: se libera el buffer y se le pide recargar
+                self._eventos.clear()
+                self.desbordada = True
+            else:
+                self._eventos.append(evento)
+            self._condicion.notify()
+
+    def tomar(self, espera):
+        """Espera hasta `espera` segundos y devuelve los eventos pendientes (lista vacía si no hubo)."""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._eventos or self.desbordada or self.cerrada, espera)
+            eventos = list(self._eventos)
+            self._eventos.clear()
+            return eventos
+
+    def cerrar(self):
+        with self._condicion:
+            self.cerrada = True
+            self._condicion.notify()
+
+
+class Broker:
+    def __init__(self, buffer=BUFFER, historial=HISTORIAL, max_clientes=MAX_CLIENTES):
+        self.buffer = buffer
+        self.max_clientes = max_clientes
+        self._lock = threading.Lock()
+        self._suscripciones = set()
+        self._historial = deque(maxlen=historial)
+        # El historial tiene todos los cambios con seq mayor a este (None: todavía no empieza)
+        self.completo_desde = None
+        # Último seq leído del registro de cambios (id de 'reiniciar')
+        self.ultimo = None
+        self.totales = None
+        self._stats = {"publicados": 0, "desbordados": 0, "rechazados": 0}
+
+    def suscribir(self, tablas=TABLAS, desde=None):
+        suscripcion = Suscripcion(tablas, self.buffer)
+        with self._lock:
+            if len(self._suscripciones) >= self.max_clientes:
+                self._stats["rechazados"] += 1
+                raise ClientesAgotados()
+            if desde is not None:
+                # Reconexión: se repite lo que el cliente no vio, si sigue en el historial
+                if self.completo_desde is None or desde < self.completo_desde:
+                    suscripcion.desbordada = True
+                for evento in self._historial:
+                    if evento['seq'] > desde and evento['tabla'] in tablas:
+                        suscripcion.poner(('cambio', evento))
+            if self.totales is not None:
+                suscripcion.poner(('totales', self.totales))
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        suscripcion.cerrar()
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+            if suscripcion.desbordada:
+                self._stats["desbordados"] += 1
+
+    def clientes(self):
+        with self._lock:
+            return len(self._suscripciones)
+
+    def publicar_cambio(self, evento):
+        with self._lock:
+            if len(self._historial) == self._historial.maxlen:
+                self.completo_desde = self._historial[0]['seq']
+            self._historial.append(evento)
+            self.ultimo = max(self.ultimo or 0, evento['seq'])
+            self._stats["publicados"] += 1
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            if evento['tabla'] in suscripcion.tablas:
+                suscripcion.poner(('cambio', evento))
+
+    def publicar_totales(self, totales):
+        with self._lock:
+            self.totales = totales
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            suscripcion.poner(('totales', totales))
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["clientes"] = len(self._suscripciones)
+            stats["historial"] = len(self._historial)
+        return stats
+
+
+class VigiaCambios:
+    """Lee el registro de cambios y publica en el broker; arranca con el primer cliente."""
+
+    def __init__(self, broker, conexion, intervalo=INTERVALO):
+        # conexion() -> context manager con una conexión del pool
+        self.broker = broker
+        self._conexion = conexion
+        self.intervalo = intervalo
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._iniciado = False
+        self.hasta = None
+        self._fecha_totales = None
+
+    def iniciar(self):
+        # Con el primer cliente, así cada worker de gunicorn arranca su hilo después del fork
+        with self._lock:
+            if self._iniciado:
+                return
+            with self._conexion() as connection:
+                cursor = connection.cursor()
+                self.hasta = cambios.ultimo(cursor)
+                cursor.close()
+                self.broker.completo_desde = self.hasta
+                self.broker.ultimo = self.hasta
+                self._publicar_totales(connection)
+            threading.Thread(target=self._vigilar, name='eventos', daemon=True).start()
+            self._iniciado = True
+
+    def despertar(self):
+        self._despertar.set()
+
+    def _vigilar(self):
+        while True:
+            self._despertar.wait(timeout=self.intervalo)
+            self._despertar.clear()
+            try:
+                self.revisar()
+            except Exception as e:
+                print(f"Error al leer cambios para eventos: {e}")
+                time.sleep(self.intervalo)
+
+    def revisar(self):
+        with self._conexion() as connection:
+            cursor = connection.cursor()
+            leidos, self.hasta, mas = cambios.leer(cursor, self.hasta, 1000)
+            cursor.close()
+            if mas:
+                self._despertar.set()
+            netos = [c for c in cambios.compactar(leidos) if c[1] in TABLAS]
+            if netos:
+                cursor = connection.cursor(dictionary=True)
+                filas = {tabla: cambios.cargar(cursor, tabla, [i for _, t, i, op in netos if t == tabla and op != 'D'])
+                         for tabla in TABLAS}
+                cursor.close()
+                for seq, tabla, fila_id, operacion in netos:
+                    fila = filas[tabla].get(fila_id)
+                    self.broker.publicar_cambio({
+                        "seq": seq, "tabla": tabla, "id": fila_id,
+                        "operacion": cambios.OPERACIONES['D' if fila is None else operacion], "fila": fila})
+            # Avanza aunque ningún cambio fuera de TABLAS, para que 'reiniciar' no apunte atrás
+            self.broker.ultimo = self.hasta
+            if any(t == 'jornadas' for _, t, _, _ in netos) or self._fecha_totales != date.today():
+                self._publicar_totales(connection)
+
+    def _publicar_totales(self, connection):
+        hoy = date.today()
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(SQL_TOTALES_FINCAS, (hoy,))
+        fincas = [{
+            "finca_id": f["fincas_id"],
+            "finca_nombre": f["finca_nombre"],
+            "jornadas": int(f["jornadas"] or 0),
+            "libras": f["libras"] or 0,
+            "total": f["total"] or 0,
+        } for f in cursor.fetchall()]
+        cursor.close()
+        self._fecha_totales = hoy
+        self.broker.publicar_totales({"seq": self.hasta, "fecha": hoy, "fincas": fincas})
+
+
+def formatear_sse(tipo, datos):
+    """Un evento en formato text/event-stream; los cambios y 'reiniciar' llevan su seq como id."""
+    lineas = []
+    if tipo in ('cambio', 'reiniciar') and datos.get('seq') is not None:
+        lineas.append(f"id: {datos['seq']}")
+    lineas.append(f"event: {tipo}")
+    lineas.append("data: " + serializacion.dumps(datos).decode('utf-8'))
+    return "\n".join(lineas) + "\n\n"
+
+
+def transmitir(broker, suscripcion, latido=LATIDO):
+    """Generador del cuerpo de la respuesta; termina si el cliente se desborda o se desconecta."""
+    try:
+        yield f"retry: {int(INTERVALO * 1000) * 3}\n\n"
+        while True:
+            eventos = suscripcion.tomar(latido)
+            if suscripcion.desbordada:
+                yield formatear_sse('reiniciar', {"seq": broker.ultimo,
+                                                  "motivo": "El cliente no alcanzó a leer los eventos"})
+                return
+            if not eventos:
+                # Comentario de latido: mantiene vivos los proxies y detecta clientes desconectados
+                yield ": latido\n\n"
+                continue
+            yield "".join(formatear_sse(tipo, datos) for tipo, datos in eventos)
+    finally:
+        broker.cancelar(suscripcion)
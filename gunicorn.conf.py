@@ -0,0 +1,64 @@
+"""Configuración de producción: gunicorn -c gunicorn.conf.py API:app
+
+- Workers preforkeados (WEB_WORKERS, por defecto 2 por núcleo + 1), cada uno con su propio
+  pool de conexiones porque la app se importa después del fork.
+- kill -HUP <pid del master> recarga el código levantando workers nuevos antes de
+  detener los viejos, que terminan los requests en curso (graceful_timeout).
+- MAX_REQUESTS recicla cada worker tras ese número de requests (con jitter).
+- Cada cliente de /api/eventos ocupa un hilo: con los valores por defecto cada worker acepta
+  SSE_MAX_CLIENTS = WEB_THREADS // 2 = 2 clientes, o sea 2 x WEB_WORKERS en total. Para más
+  pantallas en vivo hay que subir WEB_THREADS (y con él SSE_MAX_CLIENTS) o fijar SSE_MAX_CLIENTS.
+- El access log no muestra el ?token= con que EventSource manda el JWT.
+"""
+import multiprocessing
+import os
+import re
+import secrets
+
+from gunicorn.glogging import Logger
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+max_requests = int(os.environ.get('MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+preload_app = False
+accesslog = '-'
+
+
+class LoggerSinTokens(Logger):
+    # /api/eventos recibe el JWT en la URL (?token=): se enmascara en la línea del request y el query
+    def atoms(self, resp, req, environ, request_time):
+        atomos = super().atoms(resp, req, environ, request_time)
+        for clave in ('r', 'q'):
+            if 'token=' in atomos.get(clave, ''):
+                atomos[clave] = re.sub(r'\btoken=[^&\s]*', 'token=***', atomos[clave])
+        return atomos
+
+
+logger_class = LoggerSinTokens
+
+# Cada hilo puede tener una conexión; el pool por worker no debe ser menor que los hilos
+os.environ.setdefault('DB_POOL_SIZE', str(threads + 2))
+# Cada cliente de /api/eventos ocupa un hilo mientras está conectado: se deja la mitad para el resto
+os.environ.setdefault('SSE_MAX_CLIENTS', str(max(1, threads // 2)))
+
+# Todos los workers deben firmar los tokens con la misma clave. Si no se configuró,
+# el master genera una antes del fork (los tokens se invalidan al reiniciar el master).
+if not os.environ.get('SECRET_KEY'):
+    os.environ['SECRET_KEY'] = secrets.token_hex(32)
+    print("SECRET_KEY no configurada: se generó una temporal compartida por los workers")
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} iniciado")
+
+
+def worker_exit(server, worker):
+    # Cerrar las conexiones del pool del worker al salir (reciclaje o reload)
+    import API
+    API.db_pool.cerrar_todas()
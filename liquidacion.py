@@ -0,0 +1,99 @@
+"""Liquidación de planilla: genera los pagos de un período a partir de las jornadas.
+
+Por cada empleado con jornadas sin pagar en el período se inserta un pago con las libras
+totales, el precio por libra promedio ponderado y el total. Todo sale de un solo
+INSERT ... SELECT ... GROUP BY. Después se enlazan las jornadas a su pago (jornadas.pago_id)
+y se actualiza resumen_pagos, todo en la misma transacción.
+Requiere la migración 0005_liquidaciones.
+"""
+import resumen
+
+# Solo una liquidación a la vez, así dos llamadas no pagan las mismas jornadas
+BLOQUEO = 'liquidacion_planilla'
+
+
+class LiquidacionOcupada(Exception):
+    pass
+
+
+def _filtros(inicio, fin, empleado_id, finca_id):
+    condiciones = ["j.pago_id IS NULL", "j.fecha BETWEEN %s AND %s"]
+    valores = [inicio, fin]
+    if empleado_id is not None:
+        condiciones.append("j.empleados_id = %s")
+        valores.append(empleado_id)
+    if finca_id is not None:
+        condiciones.append("j.fincas_id = %s")
+        valores.append(finca_id)
+    return " AND ".join(condiciones), valores
+
+
+def liquidar(connection, inicio, fin, fecha_pago, empleado_id=None, finca_id=None, espera=10,
+             antes_de_confirmar=None):
+    """Liquida el período y devuelve (liquidacion_id, pagos creados, jornadas enlazadas).
+
+    Hace commit si hay algo que pagar; si no, no deja rastro y devuelve (None, 0, 0).
+    antes_de_confirmar(liquidacion_id) se llama justo antes del commit (p. ej. para
+    incrementar versiones y anotar los cambios).
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (BLOQUEO, espera))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise LiquidacionOcupada()
+    try:
+        condicion, valores = _filtros(inicio, fin, empleado_id, finca_id)
+        cursor.execute("""
+            INSERT INTO liquidaciones (inicio, fin, fecha_pago, empleados_id, fincas_id)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (inicio, fin, fecha_pago, empleado_id, finca_id))
+        liquidacion_id = cursor.lastrowid
+
+        cursor.execute(f"""
+            INSERT INTO pagos (empleados_id, libras_totales, precio_libra_promedio, total, fecha_pago, liquidacion_id)
+            SELECT
+                j.empleados_id,
+                ROUND(SUM(j.libras_recolectadas), 2),
+                ROUND(SUM(j.libras_recolectadas * j.precio_libra) / SUM(j.libras_recolectadas), 4),
+                ROUND(SUM(j.libras_recolectadas * j.precio_libra), 2),
+                %s,
+                %s
+            FROM jornadas j
+            WHERE {condicion}
+            GROUP BY j.empleados_id
+            HAVING SUM(j.libras_recolectadas) > 0
+        """, [fecha_pago, liquidacion_id] + valores)
+        pagos = cursor.rowcount
+        if pagos <= 0:
+            connection.rollback()
+            return None, 0, 0
+
+        cursor.execute(f"""
+            UPDATE jornadas j
+            JOIN pagos p ON p.liquidacion_id = %s AND p.empleados_id = j.empleados_id
+            SET j.pago_id = p.id
+            WHERE {condicion}
+        """, [liquidacion_id] + valores)
+        jornadas = cursor.rowcount
+
+        resumen.registrar_liquidacion(cursor, liquidacion_id)
+        cursor.execute("""
+            UPDATE liquidaciones l
+            JOIN (
+                SELECT COUNT(*) AS pagos, SUM(libras_totales) AS libras, SUM(total) AS total
+                FROM pagos WHERE liquidacion_id = %s
+            ) p
+            SET l.pagos = p.pagos, l.jornadas = %s, l.libras_totales = p.libras, l.total = p.total
+            WHERE l.id = %s
+        """, (liquidacion_id, jornadas, liquidacion_id))
+        if antes_de_confirmar:
+            antes_de_confirmar(liquidacion_id)
+        connection.commit()
+        return liquidacion_id, pagos, jornadas
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (BLOQUEO,))
+        cursor.fetchone()
+        cursor.close()
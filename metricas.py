@@ -0,0 +1,127 @@
+"""Métricas en memoria del proceso, expuestas en formato de texto de Prometheus."""
+import threading
+import time
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_FILAS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = list(zip(nombres, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{n}="{_escapar(v)}"' for n, v in pares) + "}"
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = {k: ([*v[0]], v[1], v[2]) for k, v in self._series.items()}
+        for valores, (conteos, suma, total) in sorted(series.items()):
+            for limite, conteo in zip(self.buckets, conteos):
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, ('le', limite))} {conteo}")
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, ('le', '+Inf'))} {total}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, valor=1, *etiquetas):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            valores = dict(self._valores)
+        for etiquetas, valor in sorted(valores.items()):
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {valor}")
+        return lineas
+
+
+def exponer_gauges(nombre, ayuda, valores):
+    # valores: dict {etiqueta "clave": número}; se exponen como un gauge con etiqueta "stat"
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+    for clave, valor in sorted(valores.items()):
+        if isinstance(valor, (int, float)):
+            lineas.append(f'{nombre}{{stat="{clave}"}} {valor}')
+    return lineas
+
+
+class CursorMedido:
+    """Envuelve un cursor de MySQL y mide cada execute y las filas leídas."""
+
+    def __init__(self, cursor, al_ejecutar, al_leer):
+        self._cursor = cursor
+        self._al_ejecutar = al_ejecutar
+        self._al_leer = al_leer
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _medir(self, metodo, sql, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, *args, **kwargs)
+        finally:
+            self._al_ejecutar(sql, time.perf_counter() - inicio)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._medir(self._cursor.execute, sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._medir(self._cursor.executemany, sql, *args, **kwargs)
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            self._al_leer(1)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._al_leer(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._al_leer(len(filas))
+        return filas
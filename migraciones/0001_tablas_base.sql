@@ -0,0 +1,46 @@
+-- Tablas base usadas por API.py
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(100) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    email VARCHAR(150) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS empleados (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nombre VARCHAR(150) NOT NULL,
+    cedula VARCHAR(20) NOT NULL,
+    telefono VARCHAR(20) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fincas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nombre VARCHAR(150) NOT NULL,
+    ubicacion VARCHAR(255) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS asignaciones (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    empleado_id INT NOT NULL,
+    finca_id INT NOT NULL,
+    fecha_asignacion DATE NOT NULL,
+    descripcion TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pagos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    empleados_id INT NOT NULL,
+    libras_totales DECIMAL(12,2) NOT NULL,
+    precio_libra_promedio DECIMAL(10,4) NOT NULL,
+    total DECIMAL(14,2) NOT NULL,
+    fecha_pago DATE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jornadas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    empleados_id INT NOT NULL,
+    fincas_id INT NOT NULL,
+    fecha DATE NOT NULL,
+    libras_recolectadas DECIMAL(10,2) NOT NULL,
+    precio_libra DECIMAL(10,4) NOT NULL
+);
@@ -0,0 +1,14 @@
+-- Índices para las columnas de join, filtro y orden de las consultas frecuentes
+
+-- Joins de asignaciones con empleados y fincas
+CREATE INDEX idx_asignaciones_empleado ON asignaciones (empleado_id);
+CREATE INDEX idx_asignaciones_finca ON asignaciones (finca_id);
+
+-- Pagos: listado ordenado y paginado por (fecha_pago, id), y filtros por empleado y fecha
+CREATE INDEX idx_pagos_fecha_id ON pagos (fecha_pago, id);
+CREATE INDEX idx_pagos_empleado_fecha ON pagos (empleados_id, fecha_pago);
+
+-- Jornadas: reportes por empleado, finca y rango de fechas
+CREATE INDEX idx_jornadas_empleado_fecha ON jornadas (empleados_id, fecha);
+CREATE INDEX idx_jornadas_finca_fecha ON jornadas (fincas_id, fecha);
+CREATE INDEX idx_jornadas_fecha ON jornadas (fecha);
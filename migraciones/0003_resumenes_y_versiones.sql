@@ -0,0 +1,42 @@
+-- Tablas resumen de planilla (ver resumen.py) y versiones por tabla para los ETags.
+-- Los resúmenes se llenan al final con lo que ya hay en jornadas y pagos.
+CREATE TABLE IF NOT EXISTS resumen_jornadas (
+    fecha DATE NOT NULL,
+    empleados_id INT NOT NULL,
+    fincas_id INT NOT NULL,
+    jornadas INT NOT NULL DEFAULT 0,
+    libras_recolectadas DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, empleados_id, fincas_id),
+    KEY idx_resumen_jornadas_empleado (empleados_id, fecha),
+    KEY idx_resumen_jornadas_finca (fincas_id, fecha)
+);
+
+CREATE TABLE IF NOT EXISTS resumen_pagos (
+    fecha DATE NOT NULL,
+    empleados_id INT NOT NULL,
+    pagos INT NOT NULL DEFAULT 0,
+    libras_totales DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, empleados_id),
+    KEY idx_resumen_pagos_empleado (empleados_id, fecha)
+);
+
+CREATE TABLE IF NOT EXISTS versiones_tablas (
+    tabla VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+-- Carga inicial, igual que resumen.reconstruir (mismas consultas que resumen.SQL_BASE_*)
+DELETE FROM resumen_jornadas;
+INSERT INTO resumen_jornadas (fecha, empleados_id, fincas_id, jornadas, libras_recolectadas, total)
+SELECT fecha, COALESCE(empleados_id, 0), COALESCE(fincas_id, 0),
+       COUNT(*), SUM(libras_recolectadas), SUM(libras_recolectadas * precio_libra)
+FROM jornadas
+GROUP BY fecha, COALESCE(empleados_id, 0), COALESCE(fincas_id, 0);
+
+DELETE FROM resumen_pagos;
+INSERT INTO resumen_pagos (fecha, empleados_id, pagos, libras_totales, total)
+SELECT DATE(fecha_pago), COALESCE(empleados_id, 0), COUNT(*), SUM(libras_totales), SUM(total)
+FROM pagos
+GROUP BY DATE(fecha_pago), COALESCE(empleados_id, 0);
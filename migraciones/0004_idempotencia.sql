@@ -0,0 +1,13 @@
+-- Claves Idempotency-Key de las escrituras de pagos, jornadas y asignaciones.
+-- estado NULL indica que el request original sigue en proceso.
+CREATE TABLE IF NOT EXISTS idempotencia (
+    clave VARCHAR(255) NOT NULL,
+    ruta VARCHAR(255) NOT NULL,
+    huella CHAR(40) NOT NULL,
+    estado SMALLINT NULL,
+    cuerpo MEDIUMBLOB NULL,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira DATETIME NOT NULL,
+    PRIMARY KEY (clave, ruta),
+    KEY idx_idempotencia_expira (expira)
+);
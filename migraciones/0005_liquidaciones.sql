@@ -0,0 +1,21 @@
+-- Liquidación de planilla: cada pago generado desde jornadas guarda su liquidación y cada
+-- jornada liquidada apunta a su pago (pago_id NULL = pendiente de pago).
+CREATE TABLE IF NOT EXISTS liquidaciones (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    inicio DATE NOT NULL,
+    fin DATE NOT NULL,
+    fecha_pago DATE NOT NULL,
+    empleados_id INT NULL,
+    fincas_id INT NULL,
+    pagos INT NOT NULL DEFAULT 0,
+    jornadas INT NOT NULL DEFAULT 0,
+    libras_totales DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(16,2) NOT NULL DEFAULT 0,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE pagos ADD COLUMN liquidacion_id INT NULL;
+CREATE INDEX idx_pagos_liquidacion ON pagos (liquidacion_id, empleados_id);
+
+ALTER TABLE jornadas ADD COLUMN pago_id INT NULL;
+CREATE INDEX idx_jornadas_pendientes ON jornadas (pago_id, fecha);
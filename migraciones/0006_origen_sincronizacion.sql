@@ -0,0 +1,7 @@
+-- Jornadas y pagos capturados en estaciones de campo (DB_BACKEND=sqlite): origen = '<estación>:<id local>'.
+-- sincronizar.py hace upsert por esta clave, así reenviar un lote no duplica filas.
+ALTER TABLE jornadas ADD COLUMN origen VARCHAR(100) NULL;
+CREATE UNIQUE INDEX idx_jornadas_origen ON jornadas (origen);
+
+ALTER TABLE pagos ADD COLUMN origen VARCHAR(100) NULL;
+CREATE UNIQUE INDEX idx_pagos_origen ON pagos (origen);
@@ -0,0 +1,9 @@
+-- Registro de cambios para GET /api/changes: una fila por alta ('I'), modificación ('U') o baja ('D').
+CREATE TABLE IF NOT EXISTS cambios (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tabla VARCHAR(32) NOT NULL,
+    fila_id INT NOT NULL,
+    operacion CHAR(1) NOT NULL,
+    creado DATETIME NOT NULL,
+    KEY idx_cambios_creado (creado)
+);
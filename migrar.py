@@ -0,0 +1,146 @@
+"""Migraciones versionadas del esquema.
+
+Cada archivo migraciones/NNNN_nombre.sql es una versión; las aplicadas se registran en
+la tabla schema_version. Se ejecutan en orden y una sola vez.
+
+Uso:
+    python migrar.py            # aplica las migraciones pendientes
+    python migrar.py estado     # muestra la versión actual y las pendientes
+    python migrar.py explain    # EXPLAIN de las consultas frecuentes (para comparar antes/después)
+
+Con DB_MIGRATE_ON_START=1 la API aplica las pendientes al arrancar.
+"""
+import os
+import re
+import sys
+
+from mysql.connector import Error
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones')
+
+# Errores que indican que el objeto ya existe (p. ej. un índice creado a mano antes de la migración)
+ERRORES_YA_EXISTE = {1050, 1060, 1061}
+
+# Consultas frecuentes de API.py para revisar el plan de ejecución
+CONSULTAS_EXPLAIN = [
+    ("pagos por rango de fechas", """
+        SELECT p.id, p.fecha_pago, e.nombre FROM pagos p
+        LEFT JOIN empleados e ON p.empleados_id = e.id
+        WHERE p.fecha_pago >= CURDATE() - INTERVAL 30 DAY
+        ORDER BY p.fecha_pago DESC, p.id DESC LIMIT 100
+    """),
+    ("pagos de un empleado", """
+        SELECT p.id FROM pagos p WHERE p.empleados_id = 1 AND p.fecha_pago >= CURDATE() - INTERVAL 365 DAY
+    """),
+    ("jornadas de un empleado", """
+        SELECT j.id FROM jornadas j WHERE j.empleados_id = 1 AND j.fecha >= CURDATE() - INTERVAL 30 DAY
+    """),
+    ("jornadas de una finca", """
+        SELECT j.id FROM jornadas j WHERE j.fincas_id = 1 AND j.fecha >= CURDATE() - INTERVAL 30 DAY
+    """),
+    ("jornadas pendientes de pago (liquidación)", """
+        SELECT j.empleados_id, SUM(j.libras_recolectadas) FROM jornadas j
+        WHERE j.pago_id IS NULL AND j.fecha BETWEEN CURDATE() - INTERVAL 7 DAY AND CURDATE()
+        GROUP BY j.empleados_id
+    """),
+    ("asignaciones con empleado y finca", """
+        SELECT a.id, e.nombre, f.nombre FROM asignaciones a
+        LEFT JOIN empleados e ON a.empleado_id = e.id
+        LEFT JOIN fincas f ON a.finca_id = f.id
+        WHERE a.empleado_id = 1
+    """),
+]
+
+
+def migraciones_disponibles():
+    migraciones = []
+    for archivo in sorted(os.listdir(DIRECTORIO)):
+        coincidencia = re.match(r'^(\d+)_(.+)\.sql$', archivo)
+        if coincidencia:
+            migraciones.append((int(coincidencia.group(1)), coincidencia.group(2), os.path.join(DIRECTORIO, archivo)))
+    return migraciones
+
+
+def sentencias(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        texto = archivo.read()
+    lineas = [l for l in texto.splitlines() if not l.strip().startswith('--')]
+    return [s.strip() for s in "\n".join(lineas).split(';') if s.strip()]
+
+
+def version_actual(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def aplicar(connection, salida=print):
+    """Aplica las migraciones pendientes y devuelve la versión final."""
+    cursor = connection.cursor()
+    # Bloqueo con nombre para que varios procesos que arrancan a la vez no migren en paralelo
+    cursor.execute("SELECT GET_LOCK('migraciones_cafe', 60)")
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError("No se obtuvo el bloqueo de migraciones")
+    try:
+        actual = version_actual(cursor)
+        for version, nombre, ruta in migraciones_disponibles():
+            if version <= actual:
+                continue
+            salida(f"Aplicando migración {version:04d}_{nombre}")
+            for sentencia in sentencias(ruta):
+                try:
+                    cursor.execute(sentencia)
+                except Error as e:
+                    if e.errno not in ERRORES_YA_EXISTE:
+                        raise
+                    salida(f"  ya existía, se omite: {e.msg}")
+            cursor.execute("INSERT INTO schema_version (version, nombre) VALUES (%s, %s)", (version, nombre))
+            connection.commit()
+            actual = version
+        return actual
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('migraciones_cafe')")
+        cursor.fetchone()
+        cursor.close()
+
+
+def estado(connection):
+    cursor = connection.cursor()
+    actual = version_actual(cursor)
+    cursor.close()
+    print(f"Versión actual: {actual}")
+    for version, nombre, _ in migraciones_disponibles():
+        print(f"  {version:04d}_{nombre}: {'aplicada' if version <= actual else 'pendiente'}")
+
+
+def explain(connection):
+    cursor = connection.cursor(dictionary=True)
+    for nombre, sql in CONSULTAS_EXPLAIN:
+        print(f"\n== {nombre}")
+        cursor.execute("EXPLAIN " + sql)
+        for fila in cursor.fetchall():
+            print(f"  {fila['table']:14} type={fila['type']!s:8} key={fila['key']!s:30} rows={fila['rows']} {fila['Extra'] or ''}")
+    cursor.close()
+
+
+if __name__ == '__main__':
+    from API import db_pool
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'aplicar'
+    with db_pool.conexion() as connection:
+        if accion == 'aplicar':
+            print(f"Esquema en la versión {aplicar(connection)}")
+        elif accion == 'estado':
+            estado(connection)
+        elif accion == 'explain':
+            explain(connection)
+        else:
+            print(__doc__)
+            sys.exit(2)
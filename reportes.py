@@ -0,0 +1,352 @@
+"""Generación de reportes pesados en segundo plano.
+
+Los trabajos se encolan en una base SQLite local (REPORTES_DIR/trabajos.sqlite3), así
+cualquier worker de la API puede consultar su estado y la cola sobrevive a reinicios.
+Cada worker que encola o consulta un trabajo arranca un hilo despachador que toma los
+pendientes de la cola compartida (no solo los suyos) y los ejecuta en un pool de procesos. REPORTES_PROCESOS es el límite entre todos los workers: un trabajo solo
+se toma si la cola tiene menos de ese número en estado 'ejecutando'. Cada resultado se guarda
+como JSON en disco, indexado por el tipo y los parámetros: un pedido igual dentro de
+REPORTES_TTL reutiliza el archivo.
+
+El despachador renueva cada pocos segundos el latido de los trabajos que corren en su
+proceso. Si un worker muere (reciclaje, reload, OOM) sus trabajos dejan de latir y cualquier
+otro despachador los devuelve a 'pendiente' (o los da por fallidos tras MAX_INTENTOS), así no
+ocupan el cupo hasta REPORTES_TIMEOUT.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import mysql.connector
+from werkzeug.datastructures import MultiDict
+
+import almacen_sqlite
+import config
+import consultas
+import serializacion
+from config import db_config
+
+DIRECTORIO = os.environ.get('REPORTES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reportes_cache'))
+PROCESOS = int(os.environ.get('REPORTES_PROCESOS', 2))
+TTL = int(os.environ.get('REPORTES_TTL', 3600))
+# Un trabajo "ejecutando" más allá de este tiempo se da por perdido (p. ej. se reinició el proceso)
+TIEMPO_MAXIMO = int(os.environ.get('REPORTES_TIMEOUT', 1800))
+# Segundos sin latido tras los que un trabajo "ejecutando" se considera huérfano
+LATIDO_VENCIDO = 30
+MAX_INTENTOS = 2
+
+
+# Generadores: corren en el proceso hijo con su propia conexión a la base
+def _reporte_empleados(cursor, args):
+    cursor.execute("SELECT * FROM empleados ORDER BY nombre")
+    return cursor.fetchall()
+
+
+def _reporte_fincas(cursor, args):
+    cursor.execute("SELECT * FROM fincas ORDER BY nombre")
+    return cursor.fetchall()
+
+
+def _reporte_pagos(cursor, args):
+    sql, valores, _ = consultas.consulta_pagos(args)
+    cursor.execute(sql, valores)
+    return [consultas.formatear_pago(p) for p in cursor.fetchall()]
+
+
+def _reporte_jornadas(cursor, args):
+    sql, valores, agrupar = consultas.consulta_reporte_jornadas(args)
+    cursor.execute(sql, valores)
+    return [consultas.formatear_reporte(f, agrupar) for f in cursor.fetchall()]
+
+
+# tipo: (generador, parámetros permitidos, validador que corre al encolar)
+TIPOS = {
+    'empleados': (_reporte_empleados, (), None),
+    'fincas': (_reporte_fincas, (), None),
+    'pagos': (_reporte_pagos, ('inicio', 'fin', 'empleado_id'), consultas.consulta_pagos),
+    'jornadas': (_reporte_jornadas, ('fechaInicio', 'fechaFin', 'empleadoId', 'fincaId', 'agrupar'),
+                 consultas.consulta_reporte_jornadas),
+}
+
+
+def generar(tipo, parametros, ruta):
+    """Punto de entrada del proceso hijo: escribe el resultado en ruta y devuelve las filas."""
+    generador = TIPOS[tipo][0]
+    if config.DB_BACKEND == 'sqlite':
+        connection = almacen_sqlite.conectar(config.SQLITE_PATH)
+    else:
+        connection = mysql.connector.connect(**db_config)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        filas = generador(cursor, MultiDict(parametros))
+        cursor.close()
+    finally:
+        connection.close()
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(serializacion.dumps(filas))
+    os.replace(temporal, ruta)
+    return len(filas)
+
+
+class TipoInvalido(ValueError):
+    pass
+
+
+class ColaReportes:
+    def __init__(self, directorio=DIRECTORIO, procesos=PROCESOS, ttl=TTL):
+        self.directorio = directorio
+        self.procesos = procesos
+        self.ttl = ttl
+        self.base = os.path.join(directorio, 'trabajos.sqlite3')
+        self._ejecutor = None
+        self._ocupados = 0
+        self._propios = set()
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._preparada = False
+        self._iniciada = False
+        self._ultima_limpieza = 0.0
+
+    def _conectar(self):
+        conexion = sqlite3.connect(self.base, timeout=30, isolation_level=None)
+        conexion.row_factory = sqlite3.Row
+        return conexion
+
+    def _preparar(self):
+        with self._lock:
+            if self._preparada:
+                return
+            os.makedirs(self.directorio, exist_ok=True)
+            conexion = self._conectar()
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS trabajos (
+                    id TEXT PRIMARY KEY,
+                    tipo TEXT NOT NULL,
+                    parametros TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    estado TEXT NOT NULL,
+                    filas INTEGER,
+                    error TEXT,
+                    creado REAL NOT NULL,
+                    iniciado REAL,
+                    terminado REAL,
+                    expira REAL,
+                    latido REAL,
+                    intentos INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # Colas creadas antes del latido
+            columnas = {fila['name'] for fila in conexion.execute("PRAGMA table_info(trabajos)")}
+            if 'latido' not in columnas:
+                conexion.execute("ALTER TABLE trabajos ADD COLUMN latido REAL")
+                conexion.execute("ALTER TABLE trabajos ADD COLUMN intentos INTEGER NOT NULL DEFAULT 0")
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado, creado)")
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_clave ON trabajos (clave, estado)")
+            conexion.close()
+            self._preparada = True
+
+    def _iniciar(self):
+        # Se inicia con el primer uso, así cada worker de gunicorn crea lo suyo después del fork.
+        # El pool no levanta procesos hasta el primer trabajo que le toca a este worker.
+        self._preparar()
+        with self._lock:
+            if self._iniciada:
+                return
+            # spawn: los hijos no heredan los hilos ni las conexiones del proceso de la API
+            self._ejecutor = ProcessPoolExecutor(max_workers=self.procesos,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            threading.Thread(target=self._despachar, name='reportes', daemon=True).start()
+            self._iniciada = True
+
+    def enviar(self, tipo, parametros):
+        """Encola un reporte (o reutiliza uno igual en curso o vigente) y devuelve el trabajo."""
+        if tipo not in TIPOS:
+            raise TipoInvalido(tipo)
+        _, permitidos, validar = TIPOS[tipo]
+        parametros = {k: str(v) for k, v in (parametros or {}).items() if k in permitidos and v not in (None, '')}
+        if validar:
+            validar(MultiDict(parametros))  # ParametroInvalido si algo no es válido
+        clave = hashlib.sha1(json.dumps([tipo, parametros], sort_keys=True).encode()).hexdigest()
+
+        self._iniciar()
+        conexion = self._conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            existente = conexion.execute("""
+                SELECT * FROM trabajos
+                WHERE clave = ? AND (estado IN ('pendiente', 'ejecutando') OR (estado = 'listo' AND expira > ?))
+                ORDER BY creado DESC LIMIT 1
+            """, (clave, time.time())).fetchone()
+            if existente and (existente['estado'] != 'listo' or os.path.exists(self.ruta(existente['id']))):
+                conexion.execute("COMMIT")
+                return dict(existente)
+            trabajo_id = uuid.uuid4().hex
+            conexion.execute("""
+                INSERT INTO trabajos (id, tipo, parametros, clave, estado, creado)
+                VALUES (?, ?, ?, ?, 'pendiente', ?)
+            """, (trabajo_id, tipo, json.dumps(parametros), clave, time.time()))
+            conexion.execute("COMMIT")
+            trabajo = dict(conexion.execute("SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)).fetchone())
+        finally:
+            conexion.close()
+        self._despertar.set()
+        return trabajo
+
+    def obtener(self, trabajo_id):
+        # Quien consulta también despacha: si murió el worker que encoló, sus pendientes no esperan
+        self._iniciar()
+        conexion = self._conectar()
+        try:
+            fila = conexion.execute("SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)).fetchone()
+        finally:
+            conexion.close()
+        return dict(fila) if fila else None
+
+    def ruta(self, trabajo_id):
+        return os.path.join(self.directorio, f"{trabajo_id}.json")
+
+    def _tomar_pendiente(self):
+        conexion = self._conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            self._recuperar_huerfanos(conexion)
+            # El cupo se cuenta en la cola compartida, no en este proceso
+            ejecutando = conexion.execute("SELECT COUNT(*) FROM trabajos WHERE estado = 'ejecutando'").fetchone()[0]
+            fila = None
+            if ejecutando < self.procesos:
+                fila = conexion.execute(
+                    "SELECT * FROM trabajos WHERE estado = 'pendiente' ORDER BY creado LIMIT 1").fetchone()
+            if fila:
+                ahora = time.time()
+                conexion.execute("""
+                    UPDATE trabajos SET estado = 'ejecutando', iniciado = ?, latido = ?, intentos = intentos + 1
+                    WHERE id = ?
+                """, (ahora, ahora, fila['id']))
+                with self._lock:
+                    self._propios.add(fila['id'])
+            conexion.execute("COMMIT")
+            return dict(fila) if fila else None
+        finally:
+            conexion.close()
+
+    def _recuperar_huerfanos(self, conexion):
+        # Trabajos de un proceso que ya no late: se reintentan o, si ya fallaron antes, quedan en error
+        ahora = time.time()
+        limite = ahora - LATIDO_VENCIDO
+        conexion.execute("""
+            UPDATE trabajos SET estado = 'error', error = 'Interrumpido', terminado = ?, expira = ?
+            WHERE estado = 'ejecutando' AND COALESCE(latido, iniciado) < ? AND intentos >= ?
+        """, (ahora, ahora + self.ttl, limite, MAX_INTENTOS))
+        conexion.execute("""
+            UPDATE trabajos SET estado = 'pendiente', iniciado = NULL, latido = NULL
+            WHERE estado = 'ejecutando' AND COALESCE(latido, iniciado) < ?
+        """, (limite,))
+
+    def _latir(self):
+        with self._lock:
+            propios = list(self._propios)
+        if not propios:
+            return
+        conexion = self._conectar()
+        try:
+            marcadores = ", ".join("?" * len(propios))
+            conexion.execute(f"UPDATE trabajos SET latido = ? WHERE estado = 'ejecutando' AND id IN ({marcadores})",
+                             [time.time()] + propios)
+        finally:
+            conexion.close()
+
+    def _terminar(self, trabajo_id, futuro):
+        try:
+            filas, error = futuro.result(), None
+        except Exception as e:
+            filas, error = None, str(e) or type(e).__name__
+        self._registrar_fin(trabajo_id, filas, error)
+
+    def _registrar_fin(self, trabajo_id, filas, error):
+        conexion = self._conectar()
+        try:
+            ahora = time.time()
+            conexion.execute("""
+                UPDATE trabajos SET estado = ?, filas = ?, error = ?, terminado = ?, expira = ? WHERE id = ?
+            """, ('error' if error else 'listo', filas, error, ahora, ahora + self.ttl, trabajo_id))
+        finally:
+            conexion.close()
+        with self._lock:
+            self._ocupados -= 1
+            self._propios.discard(trabajo_id)
+        self._despertar.set()
+
+    def _limpiar(self):
+        ahora = time.time()
+        if ahora - self._ultima_limpieza < 60:
+            return
+        self._ultima_limpieza = ahora
+        conexion = self._conectar()
+        try:
+            vencidos = conexion.execute(
+                "SELECT id FROM trabajos WHERE estado IN ('listo', 'error') AND expira < ?", (ahora,)).fetchall()
+            for fila in vencidos:
+                try:
+                    os.remove(self.ruta(fila['id']))
+                except FileNotFoundError:
+                    pass
+            conexion.execute("DELETE FROM trabajos WHERE estado IN ('listo', 'error') AND expira < ?", (ahora,))
+            conexion.execute("""
+                UPDATE trabajos SET estado = 'error', error = 'Interrumpido', terminado = ?, expira = ?
+                WHERE estado = 'ejecutando' AND iniciado < ?
+            """, (ahora, ahora + self.ttl, ahora - TIEMPO_MAXIMO))
+        finally:
+            conexion.close()
+
+    def _despachar(self):
+        while True:
+            self._despertar.wait(timeout=5)
+            self._despertar.clear()
+            try:
+                self._latir()
+                self._limpiar()
+                while True:
+                    with self._lock:
+                        if self._ocupados >= self.procesos:
+                            break
+                    trabajo = self._tomar_pendiente()
+                    if trabajo is None:
+                        break
+                    with self._lock:
+                        self._ocupados += 1
+                    try:
+                        futuro = self._ejecutor.submit(generar, trabajo['tipo'], json.loads(trabajo['parametros']),
+                                                       self.ruta(trabajo['id']))
+                    except Exception as e:
+                        self._registrar_fin(trabajo['id'], None, str(e) or type(e).__name__)
+                        continue
+                    futuro.add_done_callback(lambda f, trabajo_id=trabajo['id']: self._terminar(trabajo_id, f))
+            except Exception as e:
+                print(f"Error en el despachador de reportes: {e}")
+
+
+def formatear_trabajo(trabajo):
+    def fecha(segundos):
+        return datetime.fromtimestamp(segundos).isoformat(timespec='seconds') if segundos else None
+
+    return {
+        "id": trabajo["id"],
+        "tipo": trabajo["tipo"],
+        "parametros": json.loads(trabajo["parametros"]),
+        "estado": trabajo["estado"],
+        "filas": trabajo["filas"],
+        "error": trabajo["error"],
+        "creado": fecha(trabajo["creado"]),
+        "terminado": fecha(trabajo["terminado"]),
+        "expira": fecha(trabajo["expira"]),
+        "resultado": f"/api/reportes/{trabajo['id']}/resultado" if trabajo["estado"] == 'listo' else None,
+    }
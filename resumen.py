@@ -0,0 +1,275 @@
+"""Tablas resumen de planilla mantenidas de forma incremental.
+
+resumen_jornadas: por día, empleado y finca (jornadas, libras y monto devengado).
+resumen_pagos: por día y empleado (pagos, libras y monto pagado). Los pagos no llevan finca.
+
+Los handlers de jornadas y pagos llaman a registrar_jornada / registrar_pago con el
+mismo cursor de la escritura, antes del commit, así el resumen queda en la misma transacción.
+sentencias_jornada / sentencias_pago devuelven el SQL para quien use otro driver (asgi_app.py).
+
+Uso:
+    python resumen.py reconstruir   # regenera los resúmenes desde las tablas base
+    python resumen.py verificar     # compara los resúmenes con las tablas base
+"""
+import sys
+from decimal import Decimal
+
+TABLAS_RESUMEN = [
+    """
+    CREATE TABLE IF NOT EXISTS resumen_jornadas (
+        fecha DATE NOT NULL,
+        empleados_id INT NOT NULL,
+        fincas_id INT NOT NULL,
+        jornadas INT NOT NULL DEFAULT 0,
+        libras_recolectadas DECIMAL(14,2) NOT NULL DEFAULT 0,
+        total DECIMAL(16,4) NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, empleados_id, fincas_id),
+        KEY idx_resumen_jornadas_empleado (empleados_id, fecha),
+        KEY idx_resumen_jornadas_finca (fincas_id, fecha)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS resumen_pagos (
+        fecha DATE NOT NULL,
+        empleados_id INT NOT NULL,
+        pagos INT NOT NULL DEFAULT 0,
+        libras_totales DECIMAL(14,2) NOT NULL DEFAULT 0,
+        total DECIMAL(16,4) NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, empleados_id),
+        KEY idx_resumen_pagos_empleado (empleados_id, fecha)
+    )
+    """
+]
+
+
+def _decimal(valor):
+    return Decimal(str(valor or 0))
+
+
+def crear_tablas(cursor):
+    for sql in TABLAS_RESUMEN:
+        cursor.execute(sql)
+
+
+def sentencias_jornada(empleados_id, fincas_id, fecha, libras, precio_libra, signo=1):
+    # signo=1 suma la jornada al resumen, signo=-1 la resta (update/delete)
+    libras = _decimal(libras)
+    total = libras * _decimal(precio_libra)
+    clave = (fecha, empleados_id or 0, fincas_id or 0)
+    sentencias = [("""
+        INSERT INTO resumen_jornadas (fecha, empleados_id, fincas_id, jornadas, libras_recolectadas, total)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            jornadas = jornadas + VALUES(jornadas),
+            libras_recolectadas = libras_recolectadas + VALUES(libras_recolectadas),
+            total = total + VALUES(total)
+    """, clave + (signo, signo * libras, signo * total))]
+    if signo < 0:
+        sentencias.append(("""
+            DELETE FROM resumen_jornadas
+            WHERE fecha = %s AND empleados_id = %s AND fincas_id = %s AND jornadas <= 0
+        """, clave))
+    return sentencias
+
+
+def sentencias_pago(empleados_id, fecha, libras, total, signo=1):
+    libras = _decimal(libras)
+    total = _decimal(total)
+    clave = (fecha, empleados_id or 0)
+    sentencias = [("""
+        INSERT INTO resumen_pagos (fecha, empleados_id, pagos, libras_totales, total)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            pagos = pagos + VALUES(pagos),
+            libras_totales = libras_totales + VALUES(libras_totales),
+            total = total + VALUES(total)
+    """, clave + (signo, signo * libras, signo * total))]
+    if signo < 0:
+        sentencias.append(("""
+            DELETE FROM resumen_pagos
+            WHERE fecha = %s AND empleados_id = %s AND pagos <= 0
+        """, clave))
+    return sentencias
+
+
+def registrar_jornada(cursor, *args, **kwargs):
+    for sql, valores in sentencias_jornada(*args, **kwargs):
+        cursor.execute(sql, valores)
+
+
+def registrar_pago(cursor, *args, **kwargs):
+    for sql, valores in sentencias_pago(*args, **kwargs):
+        cursor.execute(sql, valores)
+
+
+def registrar_jornadas(cursor, jornadas, signo=1):
+    # Versión por lotes para cargas masivas: agrupa por clave y hace un solo executemany.
+    # Cada jornada puede traer su propio 'signo' (la sincronización resta la versión anterior).
+    acumulado = {}
+    for j in jornadas:
+        s = j.get('signo', signo)
+        clave = (j['fecha'], j['empleados_id'] or 0, j['fincas_id'] or 0)
+        libras = _decimal(j['libras_recolectadas'])
+        fila = acumulado.setdefault(clave, [0, Decimal(0), Decimal(0)])
+        fila[0] += s
+        fila[1] += s * libras
+        fila[2] += s * libras * _decimal(j['precio_libra'])
+    acumulado = {clave: valores for clave, valores in acumulado.items() if any(valores)}
+    if not acumulado:
+        return
+    cursor.executemany("""
+        INSERT INTO resumen_jornadas (fecha, empleados_id, fincas_id, jornadas, libras_recolectadas, total)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            jornadas = jornadas + VALUES(jornadas),
+            libras_recolectadas = libras_recolectadas + VALUES(libras_recolectadas),
+            total = total + VALUES(total)
+    """, [clave + tuple(valores) for clave, valores in acumulado.items()])
+    restados = [clave for clave, valores in acumulado.items() if valores[0] < 0]
+    if restados:
+        cursor.executemany("""
+            DELETE FROM resumen_jornadas
+            WHERE fecha = %s AND empleados_id = %s AND fincas_id = %s AND jornadas <= 0
+        """, restados)
+
+
+def registrar_pagos(cursor, pagos, signo=1):
+    # Igual que registrar_jornadas, para pagos
+    acumulado = {}
+    for p in pagos:
+        s = p.get('signo', signo)
+        clave = (p['fecha_pago'], p['empleados_id'] or 0)
+        fila = acumulado.setdefault(clave, [0, Decimal(0), Decimal(0)])
+        fila[0] += s
+        fila[1] += s * _decimal(p['libras_totales'])
+        fila[2] += s * _decimal(p['total'])
+    acumulado = {clave: valores for clave, valores in acumulado.items() if any(valores)}
+    if not acumulado:
+        return
+    cursor.executemany("""
+        INSERT INTO resumen_pagos (fecha, empleados_id, pagos, libras_totales, total)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            pagos = pagos + VALUES(pagos),
+            libras_totales = libras_totales + VALUES(libras_totales),
+            total = total + VALUES(total)
+    """, [clave + tuple(valores) for clave, valores in acumulado.items()])
+    restados = [clave for clave, valores in acumulado.items() if valores[0] < 0]
+    if restados:
+        cursor.executemany("""
+            DELETE FROM resumen_pagos
+            WHERE fecha = %s AND empleados_id = %s AND pagos <= 0
+        """, restados)
+
+
+def registrar_liquidacion(cursor, liquidacion_id):
+    # Suma al resumen todos los pagos de una liquidación con un solo INSERT ... SELECT
+    cursor.execute("""
+        INSERT INTO resumen_pagos (fecha, empleados_id, pagos, libras_totales, total)
+        SELECT fecha_pago, empleados_id, COUNT(*), SUM(libras_totales), SUM(total)
+        FROM pagos
+        WHERE liquidacion_id = %s
+        GROUP BY fecha_pago, empleados_id
+        ON DUPLICATE KEY UPDATE
+            pagos = pagos + VALUES(pagos),
+            libras_totales = libras_totales + VALUES(libras_totales),
+            total = total + VALUES(total)
+    """, (liquidacion_id,))
+
+
+# Agregados calculados desde las tablas base (misma forma que las tablas resumen)
+SQL_BASE_JORNADAS = """
+    SELECT fecha, COALESCE(empleados_id, 0) AS empleados_id, COALESCE(fincas_id, 0) AS fincas_id,
+           COUNT(*) AS jornadas,
+           SUM(libras_recolectadas) AS libras_recolectadas,
+           SUM(libras_recolectadas * precio_libra) AS total
+    FROM jornadas
+    GROUP BY fecha, COALESCE(empleados_id, 0), COALESCE(fincas_id, 0)
+"""
+
+SQL_BASE_PAGOS = """
+    SELECT DATE(fecha_pago) AS fecha, COALESCE(empleados_id, 0) AS empleados_id,
+           COUNT(*) AS pagos,
+           SUM(libras_totales) AS libras_totales,
+           SUM(total) AS total
+    FROM pagos
+    GROUP BY DATE(fecha_pago), COALESCE(empleados_id, 0)
+"""
+
+
+def reconstruir(connection):
+    cursor = connection.cursor()
+    try:
+        crear_tablas(cursor)
+        cursor.execute("DELETE FROM resumen_jornadas")
+        cursor.execute(f"""
+            INSERT INTO resumen_jornadas (fecha, empleados_id, fincas_id, jornadas, libras_recolectadas, total)
+            {SQL_BASE_JORNADAS}
+        """)
+        cursor.execute("DELETE FROM resumen_pagos")
+        cursor.execute(f"""
+            INSERT INTO resumen_pagos (fecha, empleados_id, pagos, libras_totales, total)
+            {SQL_BASE_PAGOS}
+        """)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _indexar(cursor, sql, columnas_clave):
+    cursor.execute(sql)
+    filas = {}
+    for fila in cursor.fetchall():
+        clave = tuple(str(fila[c]) for c in columnas_clave)
+        filas[clave] = {k: _decimal(v) for k, v in fila.items() if k not in columnas_clave}
+    return filas
+
+
+def _comparar(base, resumen):
+    diferencias = []
+    for clave in sorted(set(base) | set(resumen)):
+        esperado = base.get(clave)
+        actual = resumen.get(clave)
+        if esperado is None or actual is None or any(
+                abs(esperado[k] - actual[k]) > Decimal('0.01') for k in esperado):
+            diferencias.append({"clave": clave, "base": esperado, "resumen": actual})
+    return diferencias
+
+
+def verificar(connection):
+    # Devuelve la lista de diferencias entre los resúmenes y las tablas base
+    cursor = connection.cursor(dictionary=True)
+    try:
+        claves_jornadas = ('fecha', 'empleados_id', 'fincas_id')
+        claves_pagos = ('fecha', 'empleados_id')
+        diferencias = _comparar(
+            _indexar(cursor, SQL_BASE_JORNADAS, claves_jornadas),
+            _indexar(cursor, "SELECT * FROM resumen_jornadas", claves_jornadas))
+        diferencias += _comparar(
+            _indexar(cursor, SQL_BASE_PAGOS, claves_pagos),
+            _indexar(cursor, "SELECT * FROM resumen_pagos", claves_pagos))
+        return diferencias
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from API import db_pool
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else ''
+    with db_pool.conexion() as connection:
+        if accion == 'reconstruir':
+            reconstruir(connection)
+            print("Resúmenes reconstruidos")
+        elif accion == 'verificar':
+            diferencias = verificar(connection)
+            for d in diferencias:
+                print(d)
+            print(f"{len(diferencias)} diferencias")
+            sys.exit(1 if diferencias else 0)
+        else:
+            print(__doc__)
+            sys.exit(2)
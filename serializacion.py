@@ -0,0 +1,139 @@
+"""Serialización JSON y compresión de las respuestas.
+
+JSON_BACKEND elige el codificador: 'orjson' si está instalado (por defecto) o 'json' de
+la biblioteca estándar. En ambos casos Decimal se emite como número y date/datetime en
+ISO 8601, así los formateadores pueden pasar los valores de MySQL tal cual.
+
+La compresión (br si está instalado brotli, si no gzip) se negocia con Accept-Encoding
+para respuestas de más de COMPRESS_MIN_BYTES, incluidas las exportaciones en streaming.
+"""
+import gzip
+import json
+import os
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BACKEND = os.environ.get('JSON_BACKEND', 'orjson' if orjson else 'json')
+COMPRESION_MINIMA = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+NIVEL_GZIP = int(os.environ.get('COMPRESS_GZIP_LEVEL', 5))
+NIVEL_BROTLI = int(os.environ.get('COMPRESS_BROTLI_LEVEL', 4))
+TIPOS_COMPRIMIBLES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('utf-8', 'replace')
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+if BACKEND == 'orjson':
+    if orjson is None:
+        raise RuntimeError("JSON_BACKEND=orjson pero orjson no está instalado")
+
+    def dumps(obj):
+        """Devuelve el JSON como bytes UTF-8."""
+        # orjson codifica date/datetime de forma nativa; solo Decimal pasa por _por_defecto
+        return orjson.dumps(obj, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    _codificador = json.JSONEncoder(default=_por_defecto, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj):
+        """Devuelve el JSON como bytes UTF-8."""
+        return _codificador.encode(obj).encode('utf-8')
+
+    loads = json.loads
+
+
+class ProveedorJSON(JSONProvider):
+    """Proveedor para app.json: jsonify y request.get_json usan el backend elegido."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # Se arma el cuerpo en bytes directamente, sin pasar por str
+        return self._app.response_class(dumps(self._prepare_response_obj(args, kwargs)),
+                                        mimetype='application/json')
+
+
+def elegir_codificacion(accept_encoding):
+    """'br', 'gzip' o None según lo que acepta el cliente (AcceptEncoding de Werkzeug)."""
+    if brotli is not None and accept_encoding['br'] > 0:
+        return 'br'
+    if accept_encoding['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def _comprimir_flujo(partes, codificacion):
+    if codificacion == 'br':
+        compresor = brotli.Compressor(quality=NIVEL_BROTLI)
+        procesar, terminar = compresor.process, compresor.finish
+    else:
+        compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        procesar, terminar = compresor.compress, compresor.flush
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            bloque = procesar(parte)
+            if bloque:
+                yield bloque
+        yield terminar()
+    finally:
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+def comprimir_respuesta(request, response):
+    """Comprime la respuesta si el cliente lo acepta y vale la pena; se usa en after_request."""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in TIPOS_COMPRIMIBLES):
+        return response
+    codificacion = elegir_codificacion(request.accept_encodings)
+    response.vary.add('Accept-Encoding')
+    if codificacion is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _comprimir_flujo(response.response, codificacion)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        cuerpo = response.get_data()
+        if len(cuerpo) < COMPRESION_MINIMA:
+            return response
+        if codificacion == 'br':
+            response.set_data(brotli.compress(cuerpo, quality=NIVEL_BROTLI))
+        else:
+            response.set_data(gzip.compress(cuerpo, NIVEL_GZIP))
+
+    response.headers['Content-Encoding'] = codificacion
+    # La representación comprimida no es idéntica byte a byte: el ETag pasa a ser débil
+    etag, debil = response.get_etag()
+    if etag and not debil:
+        response.set_etag(etag, weak=True)
+    return response
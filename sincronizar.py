@@ -0,0 +1,212 @@
+"""Sincronización de una estación de campo (DB_BACKEND=sqlite) con la base MySQL central.
+
+subir: envía a la central las jornadas y pagos capturados en la estación. Los triggers de
+almacen_sqlite.py anotan cada cambio en cambios_pendientes; se procesan en lotes por orden
+de seq y solo viaja el estado actual de las filas tocadas (varias ediciones de una jornada
+se mandan una vez). En la central cada fila se identifica por origen = '<ESTACION_ID>:<id local>'
+y se hace upsert; el resumen se ajusta restando la versión anterior y sumando la nueva, en la
+misma transacción, y cada fila queda anotada en el registro de cambios de la central
+(GET /api/changes). Los cambios se borran de la estación solo después del commit central, y
+reenviar un lote ya aplicado no altera nada, así un corte a mitad de camino se reintenta sin más.
+Una jornada que en la central ya está liquidada (pago_id) no se modifica ni se borra: queda
+como conflicto en la salida de subir, igual que la API responde 409 al editarla.
+
+bajar: reemplaza en la estación las copias de usuarios, empleados y fincas (los catálogos
+se administran en la central, así los ids coinciden).
+
+Uso:
+    python sincronizar.py subir [--lote N]   # sube los cambios pendientes (lote por defecto: 500)
+    python sincronizar.py bajar              # descarga usuarios, empleados y fincas
+    python sincronizar.py estado             # cambios pendientes de subir
+"""
+import sys
+
+import mysql.connector
+
+import almacen_sqlite
+import cambios
+import config
+import consultas
+import resumen
+from config import db_config
+
+LOTE = 500
+
+# tabla: columnas que viajan a la central (pago_id y liquidacion_id los maneja la central)
+COLUMNAS = {
+    'jornadas': ('empleados_id', 'fincas_id', 'fecha', 'libras_recolectadas', 'precio_libra'),
+    'pagos': ('empleados_id', 'libras_totales', 'precio_libra_promedio', 'total', 'fecha_pago'),
+}
+
+CATALOGOS = {
+    'usuarios': ('id', 'username', 'password', 'email'),
+    'empleados': ('id', 'nombre', 'cedula', 'telefono'),
+    'fincas': ('id', 'nombre', 'ubicacion'),
+}
+
+
+def origen(local_id):
+    return f"{config.ESTACION_ID}:{local_id}"
+
+
+def _marcadores(cantidad):
+    return ", ".join(["%s"] * cantidad)
+
+
+def _filas_actuales(cursor, tabla, ids):
+    cursor.execute(f"SELECT * FROM {tabla} WHERE id IN ({_marcadores(len(ids))})", tuple(ids))
+    return {f['id']: f for f in cursor.fetchall()}
+
+
+def _aplicar(cursor, tabla, actuales, borrados):
+    """Upsert y borrado de un lote de una tabla en la central.
+
+    Devuelve (filas para el resumen, conflictos); los conflictos son las filas liquidadas
+    en la central, que no se tocan.
+    """
+    columnas = COLUMNAS[tabla]
+    origenes = [origen(i) for i in actuales] + [origen(i) for i in borrados]
+    cursor.execute(f"SELECT * FROM {tabla} WHERE origen IN ({_marcadores(len(origenes))}) FOR UPDATE",
+                   tuple(origenes))
+    anteriores = cursor.fetchall()
+    liquidadas = {f['origen']: f for f in anteriores if f.get('pago_id') is not None}
+    conflictos = [{"tabla": tabla, "local_id": int(f['origen'].rsplit(':', 1)[1]), "id": f['id'],
+                   "pago_id": f['pago_id']} for f in liquidadas.values()]
+    if liquidadas:
+        actuales = {i: f for i, f in actuales.items() if origen(i) not in liquidadas}
+        borrados = [i for i in borrados if origen(i) not in liquidadas]
+        anteriores = [f for f in anteriores if f['origen'] not in liquidadas]
+    # Lo que había en la central se resta del resumen; lo que queda se suma
+    ajustes = [dict(f, signo=-1) for f in anteriores]
+    ids_centrales = {f['origen']: f['id'] for f in anteriores}
+    if actuales:
+        cursor.executemany(f"""
+            INSERT INTO {tabla} (origen, {", ".join(columnas)})
+            VALUES ({_marcadores(len(columnas) + 1)})
+            ON DUPLICATE KEY UPDATE {", ".join(f"{c} = VALUES({c})" for c in columnas)}
+        """, [(origen(i),) + tuple(f[c] for c in columnas) for i, f in actuales.items()])
+        ajustes.extend(dict(f, signo=1) for f in actuales.values())
+        cursor.execute(f"SELECT id, origen FROM {tabla} WHERE origen IN ({_marcadores(len(actuales))})",
+                       tuple(origen(i) for i in actuales))
+        subidos = cursor.fetchall()
+        cambios.registrar(cursor, tabla, 'I', *[f['id'] for f in subidos if f['origen'] not in ids_centrales])
+        cambios.registrar(cursor, tabla, 'U', *[f['id'] for f in subidos if f['origen'] in ids_centrales])
+    if borrados:
+        cursor.execute(f"DELETE FROM {tabla} WHERE origen IN ({_marcadores(len(borrados))})",
+                       tuple(origen(i) for i in borrados))
+        cambios.registrar(cursor, tabla, 'D', *[ids_centrales[origen(i)] for i in borrados
+                                                 if origen(i) in ids_centrales])
+    return ajustes, conflictos
+
+
+def subir(local, central, lote=LOTE):
+    """Sube los cambios pendientes en lotes; devuelve (cambios procesados, conflictos)."""
+    procesados = 0
+    conflictos = []
+    cursor_local = local.cursor(dictionary=True)
+    try:
+        while True:
+            cursor_local.execute(
+                "SELECT seq, tabla, local_id FROM cambios_pendientes ORDER BY seq LIMIT %s", (lote,))
+            pendientes = cursor_local.fetchall()
+            if not pendientes:
+                break
+            ultimo = pendientes[-1]['seq']
+            cursor = central.cursor(dictionary=True)
+            try:
+                tablas = []
+                for tabla in COLUMNAS:
+                    ids = sorted({c['local_id'] for c in pendientes if c['tabla'] == tabla})
+                    if not ids:
+                        continue
+                    # La fila local que ya no existe se borró: viaja como borrado (tombstone)
+                    actuales = _filas_actuales(cursor_local, tabla, ids)
+                    borrados = [i for i in ids if i not in actuales]
+                    ajustes, rechazados = _aplicar(cursor, tabla, actuales, borrados)
+                    conflictos.extend(rechazados)
+                    if tabla == 'jornadas':
+                        resumen.registrar_jornadas(cursor, ajustes)
+                    else:
+                        resumen.registrar_pagos(cursor, ajustes)
+                    tablas.append(tabla)
+                for tabla in tablas:
+                    cursor.execute(consultas.SQL_INCREMENTAR_VERSION, (tabla,))
+                central.commit()
+            except Exception:
+                central.rollback()
+                raise
+            finally:
+                cursor.close()
+            cursor_local.execute("DELETE FROM cambios_pendientes WHERE seq <= %s", (ultimo,))
+            local.commit()
+            procesados += len(pendientes)
+            print(f"Lote hasta seq {ultimo}: {len(pendientes)} cambios")
+    finally:
+        cursor_local.close()
+    return procesados, conflictos
+
+
+def bajar(local, central):
+    cursor_central = central.cursor(dictionary=True)
+    cursor_local = local.cursor()
+    try:
+        for tabla, columnas in CATALOGOS.items():
+            cursor_central.execute(f"SELECT {', '.join(columnas)} FROM {tabla}")
+            filas = cursor_central.fetchall()
+            cursor_local.execute(f"DELETE FROM {tabla}")
+            cursor_local.executemany(
+                f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({_marcadores(len(columnas))})",
+                [tuple(f[c] for c in columnas) for f in filas])
+            # Invalida ETags, caches e índice de búsqueda de la API local
+            cursor_local.execute(consultas.SQL_INCREMENTAR_VERSION, (tabla,))
+            print(f"{tabla}: {len(filas)} filas")
+        local.commit()
+    except Exception:
+        local.rollback()
+        raise
+    finally:
+        cursor_central.close()
+        cursor_local.close()
+
+
+def estado(local):
+    cursor = local.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT tabla, COUNT(*) AS cambios, COUNT(DISTINCT local_id) AS filas, MIN(creado) AS desde
+            FROM cambios_pendientes GROUP BY tabla
+        """)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    accion = sys.argv[1] if len(sys.argv) > 1 else ''
+    if accion not in ('subir', 'bajar', 'estado'):
+        print(__doc__)
+        sys.exit(2)
+
+    local = almacen_sqlite.conectar(config.SQLITE_PATH)
+    try:
+        if accion == 'estado':
+            pendientes = estado(local)
+            for fila in pendientes:
+                print(f"{fila['tabla']}: {fila['cambios']} cambios en {fila['filas']} filas (desde {fila['desde']})")
+            print(f"Estación {config.ESTACION_ID}: {sum(f['cambios'] for f in pendientes)} cambios pendientes")
+            sys.exit(0)
+        lote = int(sys.argv[sys.argv.index('--lote') + 1]) if '--lote' in sys.argv else LOTE
+        central = mysql.connector.connect(**db_config)
+        try:
+            if accion == 'subir':
+                procesados, conflictos = subir(local, central, lote)
+                for c in conflictos:
+                    print(f"Conflicto: {c['tabla']} local {c['local_id']} (central {c['id']}) "
+                          f"ya está liquidada en el pago {c['pago_id']}; no se modificó")
+                print(f"{procesados} cambios sincronizados, {len(conflictos)} conflictos")
+            else:
+                bajar(local, central)
+        finally:
+            central.close()
+    finally:
+        local.close()
@@ -0,0 +1,85 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+import almacen_sqlite  # noqa: E402
+from almacen_sqlite import traducir  # noqa: E402
+
+
+def test_marcadores_y_porcentajes():
+    assert traducir("SELECT * FROM e WHERE id = %s AND n LIKE 'a%%'") == "SELECT * FROM e WHERE id = ? AND n LIKE 'a%'"
+    # Sin parámetros el SQL se deja tal cual, como hace mysql.connector
+    assert traducir("SELECT 1 WHERE n LIKE 'a%'", False) == "SELECT 1 WHERE n LIKE 'a%'"
+
+
+def test_quita_for_update():
+    assert traducir("SELECT * FROM jornadas WHERE id = %s FOR UPDATE") == "SELECT * FROM jornadas WHERE id = ?"
+
+
+def test_now_mas_menos_interval():
+    assert traducir("DELETE FROM c WHERE creado < NOW() - INTERVAL %s SECOND") == \
+        "DELETE FROM c WHERE creado < SUMAR_SEGUNDOS(-?)"
+    assert traducir("UPDATE r SET expira = NOW() + INTERVAL 30 SECOND", False) == \
+        "UPDATE r SET expira = SUMAR_SEGUNDOS(+30)"
+
+
+def test_date_sub():
+    assert traducir("SELECT DATE_SUB(CURDATE(), INTERVAL %s DAY)") == "SELECT date(CURDATE(), '-' || (?) || ' days')"
+
+
+def test_division_en_punto_flotante():
+    assert traducir("SELECT total / libras FROM p", False) == "SELECT total * 1.0 / libras FROM p"
+
+
+def test_on_duplicate_key_update():
+    assert traducir("""INSERT INTO v (tabla, version) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + VALUES(version)""") == """INSERT INTO v (tabla, version) VALUES (?, 1)
+        ON CONFLICT DO UPDATE SET version = version + excluded.version"""
+
+
+def test_delete_sin_limit():
+    assert traducir("DELETE FROM idempotencia WHERE expira < NOW() LIMIT 500", False) == \
+        "DELETE FROM idempotencia WHERE expira < NOW()"
+    assert traducir("SELECT * FROM e LIMIT 5", False) == "SELECT * FROM e LIMIT 5"
+
+
+def test_sql_traducido_corre_en_sqlite(base):
+    cursor = base.cursor(dictionary=True)
+    cursor.execute("""
+        INSERT INTO jornadas (empleados_id, fincas_id, fecha, libras_recolectadas, precio_libra)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (1, 1, date(2024, 3, 15), 7, Decimal('5')))
+    cursor.execute("""
+        SELECT fecha, DAYOFMONTH(fecha) AS dia, DATE_FORMAT(fecha, '%%Y-%%m') AS mes,
+               precio_libra / libras_recolectadas AS razon
+        FROM jornadas WHERE id = %s FOR UPDATE
+    """, (cursor.lastrowid,))
+    fila = cursor.fetchone()
+    assert fila['fecha'] == date(2024, 3, 15)
+    assert (fila['dia'], fila['mes']) == (15, '2024-03')
+    assert fila['razon'] == pytest.approx(5 / 7)
+    base.commit()
+
+
+def test_upsert_traducido(base):
+    cursor = base.cursor()
+    for _ in range(3):
+        cursor.execute("""
+            INSERT INTO versiones_tablas (tabla, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """, ('jornadas',))
+    cursor.execute("SELECT version FROM versiones_tablas WHERE tabla = %s", ('jornadas',))
+    assert cursor.fetchone() == (3,)
+
+
+def test_errores_con_errno_de_mysql(base):
+    cursor = base.cursor()
+    cursor.execute("INSERT INTO versiones_tablas (tabla, version) VALUES (%s, 1)", ('pagos',))
+    with pytest.raises(almacen_sqlite.Error) as error:
+        cursor.execute("INSERT INTO versiones_tablas (tabla, version) VALUES (%s, 1)", ('pagos',))
+    assert error.value.errno == almacen_sqlite.ERRNO_DUPLICADO
+    with pytest.raises(almacen_sqlite.Error) as error:
+        cursor.execute("SELECT * FROM no_existe")
+    assert error.value.errno == almacen_sqlite.ERRNO_SIN_TABLA
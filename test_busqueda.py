@@ -0,0 +1,72 @@
+import busqueda
+
+EMPLEADOS = [
+    {'id': 1, 'nombre': 'María López', 'cedula': '1-0234-0567'},
+    {'id': 2, 'nombre': 'Luis Lopera', 'cedula': '20345'},
+    {'id': 3, 'nombre': 'Ana María Solís', 'cedula': None},
+    {'id': 4, 'nombre': 'Lorena Mora', 'cedula': ''},
+]
+
+
+def _indice(filas=EMPLEADOS, version=None):
+    version = version or [1]
+    return busqueda.IndiceEmpleados(lambda: [dict(f) for f in filas], lambda: version[0], revisar=0)
+
+
+def _ids(resultado):
+    return [f['id'] for f in resultado]
+
+
+def test_prefijo_de_cualquier_palabra_sin_tildes_ni_mayusculas():
+    indice = _indice()
+    assert _ids(indice.buscar('LOP')) == [2, 1]
+    assert _ids(indice.buscar('solis')) == [3]
+
+
+def test_primero_los_que_empiezan_con_lo_buscado():
+    assert _ids(_indice().buscar('mar')) == [1, 3]
+
+
+def test_todas_las_palabras_deben_coincidir():
+    indice = _indice()
+    assert _ids(indice.buscar('maria so')) == [3]
+    assert _ids(indice.buscar('lo mo')) == [4]
+
+
+def test_cedula_exacta_sin_guiones_ni_espacios():
+    indice = _indice()
+    assert _ids(indice.buscar('10234 0567')) == [1]
+    assert indice.buscar('1023') == []
+
+
+def test_consulta_sin_cedula_no_devuelve_empleados_sin_cedula():
+    indice = _indice()
+    assert indice.buscar('-') == []
+    assert indice.buscar('   ') == []
+
+
+def test_limite():
+    assert len(_indice().buscar('l', limite=2)) == 2
+
+
+def test_guardar_y_eliminar_actualizan_el_indice():
+    indice = _indice()
+    indice.buscar('x')
+    indice.guardar({'id': 2, 'nombre': 'Luis Quirós', 'cedula': '999'})
+    assert _ids(indice.buscar('lop')) == [1]
+    assert _ids(indice.buscar('quiros')) == [2]
+    assert _ids(indice.buscar('999')) == [2]
+    assert indice.buscar('20345') == []
+    indice.eliminar(1)
+    assert indice.buscar('lop') == []
+
+
+def test_recarga_cuando_cambia_la_version():
+    filas = list(EMPLEADOS)
+    version = [1]
+    indice = _indice(filas, version)
+    assert indice.buscar('pedro') == []
+    filas.append({'id': 5, 'nombre': 'Pedro Rojas', 'cedula': '555'})
+    assert indice.buscar('pedro') == []
+    version[0] = 2
+    assert _ids(indice.buscar('pedro')) == [5]
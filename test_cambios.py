@@ -0,0 +1,86 @@
+import pytest
+
+import cambios
+
+
+@pytest.fixture(autouse=True)
+def sin_huecos_vistos():
+    cambios._huecos.clear()
+    yield
+    cambios._huecos.clear()
+
+
+def _insertar(cursor, *filas):
+    # (seq, tabla, fila_id, operacion) con seq explícito para dejar huecos a propósito
+    cursor.executemany("INSERT INTO cambios (seq, tabla, fila_id, operacion, creado) VALUES (%s, %s, %s, %s, NOW())",
+                       filas)
+
+
+def test_compactar_alta_y_modificaciones_quedan_en_alta():
+    leidos = [(1, 'jornadas', 7, 'I'), (2, 'jornadas', 7, 'U'), (3, 'pagos', 7, 'U'), (4, 'jornadas', 7, 'U')]
+    assert cambios.compactar(leidos) == [(3, 'pagos', 7, 'U'), (4, 'jornadas', 7, 'I')]
+
+
+def test_compactar_baja_gana_sobre_lo_anterior():
+    leidos = [(1, 'jornadas', 1, 'I'), (2, 'jornadas', 1, 'D'), (3, 'jornadas', 2, 'U'), (4, 'jornadas', 2, 'D')]
+    assert cambios.compactar(leidos) == [(2, 'jornadas', 1, 'D'), (4, 'jornadas', 2, 'D')]
+
+
+def test_registrar_y_leer_en_orden(base):
+    cursor = base.cursor()
+    cambios.registrar(cursor, 'jornadas', 'I', 1, 2, 3)
+    base.commit()
+    leidos, hasta, mas = cambios.leer(cursor, 0, 2)
+    assert leidos == [(1, 'jornadas', 1, 'I'), (2, 'jornadas', 2, 'I')]
+    assert (hasta, mas) == (2, True)
+    leidos, hasta, mas = cambios.leer(cursor, hasta, 2)
+    assert leidos == [(3, 'jornadas', 3, 'I')]
+    assert (hasta, mas) == (3, False)
+    assert cambios.ultimo(cursor) == 3
+
+
+def test_leer_espera_un_hueco_reciente(base, monkeypatch):
+    cursor = base.cursor()
+    _insertar(cursor, (1, 'pagos', 1, 'I'), (3, 'pagos', 3, 'I'))
+    base.commit()
+    reloj = [1000.0]
+    monkeypatch.setattr(cambios.time, 'monotonic', lambda: reloj[0])
+
+    leidos, hasta, mas = cambios.leer(cursor, 0, 10)
+    assert leidos == [(1, 'pagos', 1, 'I')]
+    assert (hasta, mas) == (1, False)
+
+    # Si la transacción confirma el seq faltante, se lee sin saltarlo
+    _insertar(cursor, (2, 'pagos', 2, 'I'))
+    base.commit()
+    leidos, hasta, mas = cambios.leer(cursor, hasta, 10)
+    assert [c[0] for c in leidos] == [2, 3]
+    assert hasta == 3
+
+
+def test_leer_salta_un_hueco_vencido(base, monkeypatch):
+    cursor = base.cursor()
+    _insertar(cursor, (1, 'pagos', 1, 'I'), (4, 'pagos', 4, 'I'))
+    base.commit()
+    reloj = [1000.0]
+    monkeypatch.setattr(cambios.time, 'monotonic', lambda: reloj[0])
+
+    assert cambios.leer(cursor, 1, 10) == ([], 1, False)
+    reloj[0] += cambios.ESPERA_HUECO - 1
+    assert cambios.leer(cursor, 1, 10) == ([], 1, False)
+    # La edad se cuenta desde la primera vez que se vio el hueco
+    reloj[0] += 1
+    assert cambios.leer(cursor, 1, 10) == ([(4, 'pagos', 4, 'I')], 4, False)
+
+
+def test_registrar_liquidacion_anota_sus_pagos_sin_huecos(base):
+    cursor = base.cursor()
+    cursor.executemany("""
+        INSERT INTO pagos (empleados_id, libras_totales, precio_libra_promedio, total, fecha_pago, liquidacion_id)
+        VALUES (%s, 100, 1.5, 150, '2024-03-01', %s)
+    """, [(1, 9), (2, 8), (3, 9)])
+    cambios.registrar_liquidacion(cursor, 9)
+    base.commit()
+    leidos, hasta, _ = cambios.leer(cursor, 0, 10)
+    assert leidos == [(1, 'pagos', 1, 'I'), (2, 'pagos', 3, 'I')]
+    assert hasta == 2
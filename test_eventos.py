@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip('flask')
+import eventos  # noqa: E402
+
+
+def _cambio(seq, tabla='jornadas'):
+    return {"seq": seq, "tabla": tabla, "id": seq, "operacion": "insertado", "fila": None}
+
+
+def _broker(buffer=10, historial=5, max_clientes=3, desde=0):
+    broker = eventos.Broker(buffer=buffer, historial=historial, max_clientes=max_clientes)
+    # Lo que hace VigiaCambios.iniciar
+    broker.completo_desde = desde
+    broker.ultimo = desde
+    return broker
+
+
+def _seqs(eventos_tomados):
+    return [datos['seq'] for tipo, datos in eventos_tomados if tipo == 'cambio']
+
+
+def test_publica_solo_a_las_tablas_suscritas():
+    broker = _broker()
+    jornadas = broker.suscribir(('jornadas',))
+    todas = broker.suscribir()
+    broker.publicar_cambio(_cambio(1))
+    broker.publicar_cambio(_cambio(2, 'pagos'))
+    assert _seqs(jornadas.tomar(0)) == [1]
+    assert _seqs(todas.tomar(0)) == [1, 2]
+
+
+def test_reconexion_dentro_del_historial_repite_lo_perdido():
+    broker = _broker()
+    for seq in range(1, 5):
+        broker.publicar_cambio(_cambio(seq))
+    suscripcion = broker.suscribir(desde=2)
+    assert not suscripcion.desbordada
+    assert _seqs(suscripcion.tomar(0)) == [3, 4]
+
+
+def test_reconexion_fuera_del_historial_pide_reiniciar():
+    broker = _broker(historial=2)
+    for seq in range(1, 6):
+        broker.publicar_cambio(_cambio(seq))
+    assert broker.completo_desde == 3
+    assert not broker.suscribir(desde=3).desbordada
+    assert broker.suscribir(desde=2).desbordada
+
+
+def test_cliente_lento_se_desborda_sin_frenar_a_los_demas():
+    broker = _broker(buffer=2)
+    lento = broker.suscribir()
+    rapido = broker.suscribir()
+    for seq in range(1, 4):
+        broker.publicar_cambio(_cambio(seq))
+        assert _seqs(rapido.tomar(0)) == [seq]
+    assert lento.desbordada
+    assert lento.tomar(0) == []
+    broker.cancelar(lento)
+    assert broker.estadisticas()["desbordados"] == 1
+
+
+def test_reiniciar_lleva_el_ultimo_seq_como_id():
+    broker = _broker(buffer=1)
+    suscripcion = broker.suscribir()
+    broker.publicar_cambio(_cambio(7))
+    broker.publicar_cambio(_cambio(8))
+    cuerpo = list(eventos.transmitir(broker, suscripcion))
+    assert cuerpo[-1].startswith("id: 8\nevent: reiniciar\n")
+    assert broker.clientes() == 0
+
+
+def test_limite_de_clientes():
+    broker = _broker(max_clientes=1)
+    suscripcion = broker.suscribir()
+    with pytest.raises(eventos.ClientesAgotados):
+        broker.suscribir()
+    broker.cancelar(suscripcion)
+    broker.suscribir()
+    assert broker.estadisticas()["rechazados"] == 1
+
+
+def test_totales_al_suscribirse():
+    broker = _broker()
+    broker.publicar_totales({"seq": 0, "fincas": []})
+    assert broker.suscribir().tomar(0) == [('totales', {"seq": 0, "fincas": []})]
+
+
+def test_formatear_sse():
+    assert eventos.formatear_sse('cambio', {"seq": 3}) == 'id: 3\nevent: cambio\ndata: {"seq":3}\n\n'
+    assert eventos.formatear_sse('totales', {"seq": 3}).startswith('event: totales\n')
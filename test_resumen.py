@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+
+import resumen
+
+HOY = date(2024, 3, 15)
+
+
+def _jornada(empleado, finca, libras, precio, fecha=HOY, **extra):
+    return dict(empleados_id=empleado, fincas_id=finca, fecha=fecha, libras_recolectadas=libras,
+                precio_libra=precio, **extra)
+
+
+def _insertar_jornadas(cursor, jornadas):
+    cursor.executemany("""
+        INSERT INTO jornadas (empleados_id, fincas_id, fecha, libras_recolectadas, precio_libra)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [(j['empleados_id'], j['fincas_id'], j['fecha'], j['libras_recolectadas'], j['precio_libra'])
+          for j in jornadas])
+
+
+def _resumen_jornadas(base):
+    cursor = base.cursor()
+    cursor.execute("""
+        SELECT fecha, empleados_id, fincas_id, jornadas, libras_recolectadas, total
+        FROM resumen_jornadas ORDER BY fecha, empleados_id, fincas_id
+    """)
+    return [(f, e, fi, j, Decimal(str(l)), Decimal(str(t))) for f, e, fi, j, l, t in cursor.fetchall()]
+
+
+def test_registrar_jornadas_agrupa_por_clave(base):
+    jornadas = [_jornada(1, 1, 100, '1.5'), _jornada(1, 1, 50, '2'), _jornada(2, 1, 10, '1'),
+                _jornada(1, 1, 20, '1', fecha=date(2024, 3, 16))]
+    cursor = base.cursor()
+    _insertar_jornadas(cursor, jornadas)
+    resumen.registrar_jornadas(cursor, jornadas)
+    base.commit()
+    assert _resumen_jornadas(base) == [
+        (HOY, 1, 1, 2, Decimal('150'), Decimal('250')),
+        (HOY, 2, 1, 1, Decimal('10'), Decimal('10')),
+        (date(2024, 3, 16), 1, 1, 1, Decimal('20'), Decimal('20')),
+    ]
+    assert resumen.verificar(base) == []
+
+
+def test_registrar_jornadas_suma_sobre_lo_existente(base):
+    cursor = base.cursor()
+    resumen.registrar_jornada(cursor, 1, 1, HOY, 100, '1.5')
+    resumen.registrar_jornadas(cursor, [_jornada(1, 1, 10, '1')])
+    assert _resumen_jornadas(base) == [(HOY, 1, 1, 2, Decimal('110'), Decimal('160'))]
+
+
+def test_restar_hasta_cero_borra_la_fila(base):
+    cursor = base.cursor()
+    jornadas = [_jornada(1, 1, 100, '1.5'), _jornada(1, 2, 40, '1')]
+    resumen.registrar_jornadas(cursor, jornadas)
+    resumen.registrar_jornadas(cursor, jornadas[:1], signo=-1)
+    assert _resumen_jornadas(base) == [(HOY, 1, 2, 1, Decimal('40'), Decimal('40'))]
+
+
+def test_signo_por_jornada_resta_la_version_anterior(base):
+    # Como en sincronizar.py: la versión anterior con signo -1 y la nueva con +1 en un solo lote
+    cursor = base.cursor()
+    anterior = _jornada(1, 1, 100, '1.5')
+    resumen.registrar_jornadas(cursor, [anterior])
+    resumen.registrar_jornadas(cursor, [dict(anterior, signo=-1), _jornada(1, 2, 80, '1.5', signo=1)])
+    assert _resumen_jornadas(base) == [(HOY, 1, 2, 1, Decimal('80'), Decimal('120'))]
+
+
+def test_lote_que_se_anula_no_escribe(base):
+    cursor = base.cursor()
+    jornada = _jornada(1, 1, 100, '1.5')
+    resumen.registrar_jornadas(cursor, [dict(jornada, signo=1), dict(jornada, signo=-1)])
+    resumen.registrar_jornadas(cursor, [])
+    assert _resumen_jornadas(base) == []
+
+
+def test_registrar_pagos_y_verificar(base):
+    cursor = base.cursor()
+    pagos = [dict(empleados_id=1, fecha_pago=HOY, libras_totales=100, precio_libra_promedio=1.5, total=150),
+             dict(empleados_id=1, fecha_pago=HOY, libras_totales=20, precio_libra_promedio=2, total=40)]
+    cursor.executemany("""
+        INSERT INTO pagos (empleados_id, libras_totales, precio_libra_promedio, total, fecha_pago)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [(p['empleados_id'], p['libras_totales'], p['precio_libra_promedio'], p['total'], p['fecha_pago'])
+          for p in pagos])
+    resumen.registrar_pagos(cursor, pagos)
+    base.commit()
+    cursor.execute("SELECT fecha, empleados_id, pagos, libras_totales, total FROM resumen_pagos")
+    assert cursor.fetchall() == [(HOY, 1, 2, 120, 190)]
+    assert resumen.verificar(base) == []